@@ -0,0 +1,83 @@
+# benchmarks/model_memory.py
+# Memory per token: dict-based layout (raw JSON dicts, candle and transaction dicts)
+# vs. slotted dataclasses + CandleSeries / TransactionSeries.
+#
+#   python -m benchmarks.model_memory [tokens] [candles_1m] [transactions]
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from core.models import CandleSeries, TokenSnapshot, TransactionSeries
+from utils.snapshot_decoder import SnapshotDecoder
+
+
+def _sample_token(rng: random.Random, i: int, n_candles: int, n_txns: int, template: dict):
+    snapshot = dict(template)
+    snapshot["tokenId"] = f"SYN{i:06d}_SOL_PUMP"
+    snapshot["contractAddress"] = f"SynContractAddr{i:06d}PUMP"
+    price = 0.00005
+    candles = []
+    for m in range(n_candles):
+        open_ = price
+        price *= 1 + rng.uniform(-0.03, 0.035)
+        candles.append({"timestamp": f"2024-07-30T{(m // 60) % 24:02d}:{m % 60:02d}:00Z", "open": open_,
+                        "high": max(open_, price) * 1.01, "low": min(open_, price) * 0.99,
+                        "close": price, "volume": rng.uniform(500, 5000)})
+    txns = [{"transactionId": f"TXN_{i}_{t}", "timestamp": f"2024-07-30T10:{t % 60:02d}:{t % 60:02d}Z",
+             "type": rng.choice(("BUY", "SELL")), "walletAddress": f"Wallet{rng.randrange(50):04d}Addr{i}",
+             "amountToken": rng.uniform(1e5, 1e7), "amountUSD": rng.uniform(10, 2000),
+             "pricePerTokenUSD": price} for t in range(n_txns)]
+    # Round-trip through JSON text so every token owns freshly allocated strings, as when loaded from disk
+    return json.dumps(snapshot), json.dumps({"1m": candles, "5m": candles[::5]}), json.dumps(txns)
+
+
+def _measure(build, raw_tokens) -> float:
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    kept = [build(*raw) for raw in raw_tokens]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del kept
+    return used / len(raw_tokens)
+
+
+def main():
+    n_tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_candles = int(sys.argv[2]) if len(sys.argv) > 2 else 240
+    n_txns = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    rng = random.Random(42)
+    with open("mock_data/token_snapshots.json", "r") as f:
+        template = json.load(f)[0]
+    raw_tokens = [_sample_token(rng, i, n_candles, n_txns, template) for i in range(n_tokens)]
+    decoder = SnapshotDecoder()
+
+    def dict_layout(snapshot, candles, txns):
+        return json.loads(snapshot), json.loads(candles), json.loads(txns)
+
+    def compact_layout(snapshot, candles, txns):
+        token = decoder.decode(TokenSnapshot, json.loads(snapshot))
+        token.historicalCandleData = {tf: CandleSeries.from_candles(c) for tf, c in json.loads(candles).items()}
+        token.transactionStream = TransactionSeries.from_transactions(json.loads(txns))
+        return token
+
+    rows = [
+        ("snapshot only", lambda s, c, t: json.loads(s), lambda s, c, t: decoder.decode(TokenSnapshot, json.loads(s))),
+        ("candles only", lambda s, c, t: json.loads(c),
+         lambda s, c, t: {tf: CandleSeries.from_candles(v) for tf, v in json.loads(c).items()}),
+        ("transactions only", lambda s, c, t: json.loads(t), lambda s, c, t: TransactionSeries.from_transactions(json.loads(t))),
+        ("full token", dict_layout, compact_layout),
+    ]
+    print(f"{n_tokens} tokens, {n_candles} 1m candles (+{len(range(0, n_candles, 5))} 5m), {n_txns} transactions each")
+    print(f"{'component':<20}{'dict layout':>14}{'compact':>14}{'ratio':>8}")
+    for name, baseline, compact in rows:
+        before = _measure(baseline, raw_tokens)
+        after = _measure(compact, raw_tokens)
+        print(f"{name:<20}{before / 1024:>11.1f} KB{after / 1024:>11.1f} KB{before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
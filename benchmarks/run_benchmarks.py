@@ -0,0 +1,220 @@
+# benchmarks/run_benchmarks.py
+# Per-stage and end-to-end timing of the scan on synthetic datasets
+# (benchmarks/synthetic_data.py). For each dataset it records wall time,
+# throughput, p50/p99 per-token latency and peak RSS for every stage, then writes
+# everything as JSON so runs from different commits can be compared.
+#
+#   python -m benchmarks.run_benchmarks [--scales 1000,10000] [--data-root DIR] [--candles json|store]
+#          [--out results.json] [--compare previous.json] [dataset_dir ...]
+#
+# Datasets missing under --data-root (one directory per scale) are generated first.
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic_data import generate
+from core.async_pipeline import AsyncPipeline
+from core.scanner import TokenScanner, RISKY_STATUSES
+from main_controller import load_tracked_whales
+from utils import data_loader
+from utils.candle_store import CandleStore
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KiB elsewhere
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """Collects per-stage wall time, item counts and (optionally) per-item latencies."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def batch(self, name: str, items: int, fn: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = fn()
+        self._record(name, time.perf_counter() - started, items, None)
+        return result
+
+    def each(self, name: str, items: Iterable[Any], fn: Callable[[Any], Any]) -> List[Any]:
+        latencies, results = [], []
+        started = time.perf_counter()
+        for item in items:
+            t0 = time.perf_counter()
+            results.append(fn(item))
+            latencies.append(time.perf_counter() - t0)
+        self._record(name, time.perf_counter() - started, len(latencies), np.array(latencies))
+        return results
+
+    def _record(self, name: str, seconds: float, items: int, latencies: Optional[np.ndarray]):
+        row = {"seconds": seconds, "items": items, "items_per_second": items / seconds if seconds > 0 else 0.0,
+               "p50_ms": None, "p99_ms": None, "peak_rss_mb": peak_rss_mb()}
+        if latencies is not None and len(latencies):
+            row["p50_ms"], row["p99_ms"] = (float(v) * 1000 for v in np.percentile(latencies, [50, 99]))
+        self.stages[name] = row
+
+
+def benchmark_dataset(data_dir: str, config: Dict, candles: str = "json") -> Dict[str, Any]:
+    config = dict(config, candle_store_path=None)
+    store_root = os.path.join(data_dir, "candle_store")
+    store = CandleStore(store_root) if candles == "store" and os.path.isdir(store_root) else None
+    historical_path = os.path.join(data_dir, "historical_data")
+    transaction_path = os.path.join(data_dir, "transaction_data")
+    tracked_whales = load_tracked_whales(os.path.join(data_dir, "whale_wallets.txt"))
+    timer = StageTimer()
+    devnull = open(os.devnull, "w")
+
+    tokens = timer.batch("load_snapshots", 0, lambda: data_loader.load_token_snapshots(
+        os.path.join(data_dir, "token_snapshots.json")))
+    loaded = timer.stages["load_snapshots"]
+    loaded.update(items=len(tokens), items_per_second=len(tokens) / loaded["seconds"] if loaded["seconds"] > 0 else 0.0)
+
+    # --- Stage by stage, on one scanner (no candle cache, so loads hit disk) ---
+    scanner = TokenScanner(config, tracked_whales, store, None, historical_path, transaction_path)
+    with contextlib.redirect_stdout(devnull):
+        candidates = timer.batch("recon", len(tokens), lambda: scanner.recon.filter_tokens(tokens))
+        security = timer.each("security", candidates, scanner.security.analyze)
+        passed = [(token, result) for token, result in zip(candidates, security) if result.overall_status not in RISKY_STATUSES]
+        safe = [token for token, _ in passed]
+        # Transactions first, as main_controller and the pipeline load them (bars from trades need them)
+        timer.each("load_transactions", safe, scanner.load_transactions)
+        timer.each("load_candles", safe, scanner.load_candles)
+        ta_results = timer.each("ta", safe, scanner.analyze_ta)
+        if config.get("ta_batch", False):
+            timer.batch("ta_batch", len(safe), lambda: scanner.ta.analyze_batch(safe))
+        whale_summaries = timer.each("whale", safe, scanner.whales.analyze)
+        inputs = list(zip(passed, ta_results, whale_summaries))
+        buys = timer.each("strategy_decision", inputs, lambda item: scanner.assess_buy(
+            item[0][0], item[1], item[2], item[0][1])[1])
+
+    # --- End to end: a fresh scanner, recon then the serial per-token flow, as main_controller runs it ---
+    for token in tokens:
+        token.historicalCandleData = None
+        token.transactionStream = None
+    fresh = TokenScanner(config, tracked_whales, store, None, historical_path, transaction_path)
+    active_positions: Dict[str, Dict] = {}
+
+    def scan_token(token):
+        fresh.load_transactions(token)
+        return fresh.process(token, active_positions)
+
+    with contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        e2e_candidates = fresh.recon.filter_tokens(tokens)
+        signals = timer.each("end_to_end_tokens", e2e_candidates, scan_token)
+        seconds = time.perf_counter() - started
+    timer.stages["end_to_end"] = {"seconds": seconds, "items": len(tokens),
+                                  "items_per_second": len(tokens) / seconds if seconds > 0 else 0.0,
+                                  "p50_ms": timer.stages["end_to_end_tokens"]["p50_ms"],
+                                  "p99_ms": timer.stages["end_to_end_tokens"]["p99_ms"], "peak_rss_mb": peak_rss_mb()}
+
+    # --- Pipeline mode: must hand every token the same TA and whale inputs as the serial flow ---
+    # Snapshots straight from the loader, as main_controller passes them in pipeline mode
+    pipeline_tokens = data_loader.load_token_snapshots(os.path.join(data_dir, "token_snapshots.json"))
+    pipeline = AsyncPipeline(TokenScanner(config, tracked_whales, store, None, historical_path, transaction_path), config)
+    with contextlib.redirect_stdout(devnull):
+        timer.batch("pipeline", len(pipeline_tokens), lambda: pipeline.run_sync(
+            pipeline.scanner.recon.filter_tokens(pipeline_tokens), {}))
+    devnull.close()
+    serial_inputs = {token.tokenId: (ta, whale) for token, ta, whale in zip(safe, ta_results, whale_summaries)}
+    mismatches = sorted(token_id for token_id, inputs in pipeline.inputs.items() if serial_inputs.get(token_id) != inputs)
+    return {
+        "data_dir": data_dir,
+        "tokens": len(tokens),
+        "candidates": len(candidates),
+        "security_passed": len(safe),
+        "buy_signals": sum(1 for buy in buys if buy is not None),
+        "end_to_end_signals": sum(len(s) for s in signals),
+        "pipeline_input_mismatches": mismatches,
+        "stages": timer.stages,
+    }
+
+
+def print_run(run: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"\n{run['data_dir']}: {run['tokens']} tokens, {run['candidates']} candidates, "
+          f"{run['security_passed']} passed security, {run['buy_signals']} buy signals")
+    if run.get("pipeline_input_mismatches"):
+        mismatches = run["pipeline_input_mismatches"]
+        print(f"Warning: pipeline TA/whale inputs differ from the serial run for {len(mismatches)} tokens, "
+              f"e.g. {', '.join(mismatches[:5])}")
+    print(f"{'stage':<20} {'seconds':>9} {'items/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8}" + (f" {'vs base':>8}" if baseline else ""))
+    for name, row in run["stages"].items():
+        line = (f"{name:<20} {row['seconds']:>9.3f} {row['items_per_second']:>11.0f} "
+                f"{row['p50_ms'] if row['p50_ms'] is not None else float('nan'):>8.3f} "
+                f"{row['p99_ms'] if row['p99_ms'] is not None else float('nan'):>8.3f} {row['peak_rss_mb']:>8.0f}")
+        base = (baseline or {}).get("stages", {}).get(name)
+        if base and base["items_per_second"]:
+            line += f" {row['items_per_second'] / base['items_per_second']:>7.2f}x"
+        print(line)
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--scales": "", "--data-root": "benchmarks/data", "--candles": "json", "--out": "benchmark_results.json",
+               "--compare": None}
+    for flag in list(options):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    data_dirs = list(args)
+    for scale in filter(None, options["--scales"].split(",")):
+        data_dir = os.path.join(options["--data-root"], scale)
+        if not os.path.exists(os.path.join(data_dir, "token_snapshots.json")):
+            print(f"Generating {scale} synthetic tokens in {data_dir}...")
+            generate(data_dir, int(scale), candles_mode="both" if options["--candles"] == "store" else "json",
+                     workers=os.cpu_count() or 1)
+        data_dirs.append(data_dir)
+    if not data_dirs:
+        data_dirs = [os.path.join(options["--data-root"], "1000")]
+        if not os.path.exists(os.path.join(data_dirs[0], "token_snapshots.json")):
+            generate(data_dirs[0], 1000, candles_mode="both" if options["--candles"] == "store" else "json")
+
+    baseline_runs = {}
+    if options["--compare"]:
+        with open(options["--compare"], "r") as f:
+            baseline_runs = {run["tokens"]: run for run in json.load(f)["runs"]}
+
+    runs = []
+    for data_dir in data_dirs:
+        run = benchmark_dataset(data_dir, config, options["--candles"])
+        print_run(run, baseline_runs.get(run["tokens"]))
+        runs.append(run)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "candles": options["--candles"],
+        "runs": runs,
+    }
+    with open(options["--out"], "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {options['--out']}")
+
+
+if __name__ == "__main__":
+    main()
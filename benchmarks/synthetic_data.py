@@ -0,0 +1,255 @@
+# benchmarks/synthetic_data.py
+# Seeded synthetic market data in the mock_data formats, for scaling runs:
+#
+#   <out>/token_snapshots.json                       JSON array of snapshot dicts
+#   <out>/historical_data/<tokenId>_ohlcv.json       {"1m": [candles], "5m": [candles]}
+#   <out>/transaction_data/<tokenId>_txns.json       list of transaction dicts
+#   <out>/candle_store/                              optional CandleStore (--candles store|both)
+#   <out>/whale_wallets.txt
+#
+# Every token is generated from its own (seed, index) stream, so the output does not
+# depend on --workers and any token can be regenerated on its own. Tokens follow one
+# of a few price regimes (pump, rug then floor, chop, bleed) and a share of them carry
+# risky security data, so every pipeline stage sees a realistic mix of outcomes.
+#
+#   python -m benchmarks.synthetic_data <out_dir> [tokens] [--seed S] [--bars B] [--txns T]
+#          [--txn-fraction F] [--whales W] [--candles json|store|both] [--workers N]
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from utils.candle_store import CandleStore, CandleColumns
+
+SUPPLY = 1_000_000_000 # Pump.fun-style fixed supply: market cap = price * 1e9
+COLLECTION_START = 1722333600 # 2024-07-30T10:00:00Z
+COLLECTION_SPREAD_MINUTES = 360 # Snapshots are collected over a six-hour window
+REGIMES = ("pump", "rug_floor", "chop", "bleed")
+REGIME_WEIGHTS = (0.25, 0.15, 0.4, 0.2)
+TICKER_LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+@lru_cache(maxsize=None)
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def whale_wallets(count: int) -> List[str]:
+    return [f"SynWhale{j:06d}SoLWalletADDRESS" for j in range(count)]
+
+
+def _price_path(rng: np.random.Generator, regime: str, bars: int) -> np.ndarray:
+    """Relative 1m close path ending at 1.0."""
+    steps = rng.normal(0.0, rng.uniform(0.01, 0.04), bars)
+    if regime == "pump":
+        steps += rng.uniform(0.002, 0.01)
+    elif regime == "bleed":
+        steps -= rng.uniform(0.002, 0.008)
+    elif regime == "rug_floor":
+        rug = rng.integers(bars // 4, bars // 2)
+        steps[:rug] += 0.006
+        steps[rug] -= rng.uniform(0.8, 1.6) # The rug candle
+        steps[rug + 1:] += rng.normal(0.0005, 0.002) # Slow base afterwards
+    path = np.exp(np.cumsum(steps))
+    return path / path[-1]
+
+
+def _ohlcv(rng: np.random.Generator, closes: np.ndarray, volume_scale: float) -> Tuple[np.ndarray, ...]:
+    opens = np.concatenate([[closes[0] * (1 + rng.normal(0, 0.01))], closes[:-1]])
+    wick = np.abs(rng.normal(0, 0.01, (2, len(closes))))
+    highs = np.maximum(opens, closes) * (1 + wick[0])
+    lows = np.minimum(opens, closes) * (1 - wick[1])
+    moves = np.abs(closes / opens - 1)
+    volumes = volume_scale * rng.lognormal(0.0, 0.6, len(closes)) * (1 + 20 * moves) # Volume follows volatility
+    return opens, highs, lows, closes, volumes
+
+
+def _resample_5m(opens, highs, lows, closes, volumes) -> Tuple[np.ndarray, ...]:
+    n = len(closes) // 5 * 5
+    start = len(closes) - n # Align 5m bars to end with the last 1m bar
+    shape = (-1, 5)
+    return (opens[start::5][:n // 5], highs[start:].reshape(shape).max(axis=1), lows[start:].reshape(shape).min(axis=1),
+            closes[start + 4::5], volumes[start:].reshape(shape).sum(axis=1))
+
+
+def _candle_dicts(timestamps: np.ndarray, ohlcv: Tuple[np.ndarray, ...]) -> List[Dict]:
+    opens, highs, lows, closes, volumes = (column.tolist() for column in ohlcv)
+    return [{"timestamp": _iso(ts), "open": o, "high": h, "low": l, "close": c, "volume": round(v, 2)}
+            for ts, o, h, l, c, v in zip(timestamps.tolist(), opens, highs, lows, closes, volumes)]
+
+
+def generate_token(seed: int, index: int, bars: int = 240, txns: int = 300, txn_fraction: float = 0.5,
+                   whales: List[str] = ()) -> Tuple[Dict, Dict[str, Tuple[np.ndarray, Tuple[np.ndarray, ...]]], List[Dict]]:
+    """One token: (snapshot dict, {timeframe: (timestamps, ohlcv columns)}, transactions)."""
+    rng = np.random.default_rng((seed, index))
+    regime = REGIMES[rng.choice(len(REGIMES), p=REGIME_WEIGHTS)]
+    origin_pump = rng.random() < 0.8
+    suffix = "PUMP" if origin_pump else "RAY"
+    token_id = f"SYN{index:07d}_SOL_{suffix}"
+    ticker = "".join(rng.choice(TICKER_LETTERS, rng.integers(3, 8)))
+
+    collected = COLLECTION_START + 60 * int(rng.integers(0, COLLECTION_SPREAD_MINUTES))
+    market_cap = float(math.exp(rng.uniform(math.log(2e4), math.log(2e7))))
+    price = market_cap / SUPPLY
+    closes = price * _price_path(rng, regime, bars)
+    ohlcv = _ohlcv(rng, closes, volume_scale=market_cap * rng.uniform(0.0005, 0.01))
+    timestamps = collected - 60 * np.arange(bars, 0, -1, dtype=np.int64) # Last bar closes at collection
+    ohlcv_5m = _resample_5m(*ohlcv)
+    timestamps_5m = timestamps[len(closes) - len(ohlcv_5m[0]) * 5::5]
+    candles = {"1m": (timestamps, ohlcv), "5m": (timestamps_5m, ohlcv_5m)}
+
+    transactions = []
+    whale_net, whale_buyers = 0.0, set()
+    if whales and rng.random() < txn_fraction:
+        count = int(rng.poisson(txns))
+        times = np.sort(collected - rng.integers(0, 3600, count))
+        buy_bias = {"pump": 0.65, "rug_floor": 0.55, "chop": 0.5, "bleed": 0.35}[regime]
+        is_buy = rng.random(count) < buy_bias
+        is_whale = rng.random(count) < 0.15
+        whale_ids = rng.integers(0, len(whales), count)
+        amounts = rng.lognormal(math.log(150), 1.2, count)
+        bar_index = np.clip((times - timestamps[0]) // 60, 0, bars - 1)
+        prices = closes[bar_index]
+        for k in range(count):
+            wallet = whales[whale_ids[k]] if is_whale[k] else f"SynWallet{index:07d}x{k:05d}"
+            usd = round(float(amounts[k]), 2)
+            transactions.append({
+                "transactionId": f"TXN_{token_id}_{k}", "timestamp": _iso(int(times[k])),
+                "type": "BUY" if is_buy[k] else "SELL", "walletAddress": wallet,
+                "amountToken": usd / float(prices[k]), "amountUSD": usd, "pricePerTokenUSD": float(prices[k])})
+            if is_whale[k] and times[k] > collected - 900:
+                whale_net += usd if is_buy[k] else -usd
+                if is_buy[k]:
+                    whale_buyers.add(wallet)
+
+    risky = rng.random() < 0.2 # A fifth of launches carry at least one red flag
+    bundled = rng.random() < 0.85
+    volumes = ohlcv[4]
+    snapshot = {
+        "tokenId": token_id,
+        "timestampCollected": _iso(collected),
+        "source": "Synthetic",
+        "contractAddress": f"Syn{index:07d}ContractAddr{suffix}",
+        "ticker": ticker,
+        "name": f"{ticker.title()} Synthetic",
+        "origin": "Pump.fun" if origin_pump else "Raydium",
+        "liquidityPool": "PumpSwap" if origin_pump else "Raydium",
+        "bondingCurvePercent": 100.0 if rng.random() < 0.7 else round(float(rng.uniform(20, 99)), 1),
+        "devMigrations": int(rng.integers(0, 5)),
+        "marketCap": round(market_cap, 2),
+        "liquidity": {"poolSizeUSD": round(market_cap * float(rng.uniform(0.1, 0.4)), 2),
+                      "lpBurnedPercent": 100.0 if not risky or rng.random() < 0.5 else round(float(rng.uniform(0, 98)), 1),
+                      "creationTimestamp": _iso(int(timestamps[0]))},
+        "volume": {"five_min_usd": round(float(volumes[-5:].sum()), 2), "one_hr_usd": round(float(volumes[-60:].sum()), 2)},
+        "holders": {"count": int(rng.integers(20, 5000)), "proHoldersCount": int(rng.integers(0, 300)),
+                    "top10HolderPercent": round(float(rng.uniform(4, 14) if not risky else rng.uniform(10, 60)), 2)},
+        "security": {
+            "mintAuthorityDisabled": bool(not risky or rng.random() < 0.6),
+            "freezeAuthorityDisabled": bool(not risky or rng.random() < 0.6),
+            "devHoldingsPercent": round(float(rng.uniform(0, 0.9) if not risky else rng.uniform(0, 20)), 2),
+            "insiderHoldingsPercent": round(float(rng.uniform(0, 10)), 2),
+            "sniperHoldingsPercent": round(float(rng.uniform(0, 10)), 2),
+            "bundlerAnalysis": {"totalBundledPercent": round(float(rng.uniform(0, 7) if not risky else rng.uniform(0, 40)), 2),
+                                "topBundlePercent": round(float(rng.uniform(0, 3)), 2),
+                                "freshWalletBundles": bool(risky and rng.random() < 0.4)} if bundled else None,
+            "isCopycat": bool(rng.random() < 0.03),
+            "paidDexScreenerProfile": bool(rng.random() < 0.4),
+            "developerWalletAddresses": [f"SynDev{index:07d}Wallet"],
+            "websiteDomainAgeDays": int(rng.integers(0, 365)),
+        },
+        "technicalAnalysis": {"priceUSD": float(closes[-1])},
+        "whaleActivity": {"netBuyVolumeLast15MinUSD": round(whale_net, 2), "distinctBuyingWhales": len(whale_buyers)},
+        "metaTags": [regime],
+        "solanaPriceUSD_atCollection": 150.0,
+    }
+    return snapshot, candles, transactions
+
+
+def _write_chunk(out_dir: str, seed: int, start: int, stop: int, bars: int, txns: int,
+                 txn_fraction: float, n_whales: int, candles_mode: str) -> List[str]:
+    """Writes the per-token files for tokens [start, stop); returns their snapshot JSON texts."""
+    whales = whale_wallets(n_whales)
+    store = CandleStore(os.path.join(out_dir, "candle_store")) if candles_mode in ("store", "both") else None
+    history_dir = os.path.join(out_dir, "historical_data")
+    txn_dir = os.path.join(out_dir, "transaction_data")
+    texts = []
+    for index in range(start, stop):
+        snapshot, candles, transactions = generate_token(seed, index, bars, txns, txn_fraction, whales)
+        token_id = snapshot["tokenId"]
+        if candles_mode in ("json", "both"):
+            with open(os.path.join(history_dir, f"{token_id}_ohlcv.json"), "w") as f:
+                json.dump({tf: _candle_dicts(ts, ohlcv) for tf, (ts, ohlcv) in candles.items()}, f, separators=(",", ":"))
+        if store is not None:
+            for timeframe, (timestamps, ohlcv) in candles.items():
+                store.append(token_id, timeframe, CandleColumns(timestamps, *ohlcv))
+        if transactions:
+            with open(os.path.join(txn_dir, f"{token_id}_txns.json"), "w") as f:
+                json.dump(transactions, f, separators=(",", ":"))
+        texts.append(json.dumps(snapshot, separators=(",", ":")))
+    return texts
+
+
+def generate(out_dir: str, tokens: int, seed: int = 42, bars: int = 240, txns: int = 300, txn_fraction: float = 0.5,
+             n_whales: int = 500, candles_mode: str = "json", workers: int = 1, chunk: int = 1000) -> Dict[str, float]:
+    for sub in ("historical_data", "transaction_data"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    with open(os.path.join(out_dir, "whale_wallets.txt"), "w") as f:
+        f.write("\n".join(whale_wallets(n_whales)) + "\n")
+
+    started = time.perf_counter()
+    args = [(out_dir, seed, start, min(start + chunk, tokens), bars, txns, txn_fraction, n_whales, candles_mode)
+            for start in range(0, tokens, chunk)]
+    # Snapshots are streamed into one JSON array in token order, chunk by chunk
+    with open(os.path.join(out_dir, "token_snapshots.json"), "w") as f:
+        f.write("[\n")
+        first = True
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_write_chunk, *zip(*args))
+        else:
+            pool = None
+            results = (_write_chunk(*a) for a in args)
+        try:
+            for texts in results:
+                for text in texts:
+                    f.write(text if first else ",\n" + text)
+                    first = False
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        f.write("\n]\n")
+    seconds = time.perf_counter() - started
+    return {"tokens": tokens, "seconds": seconds, "tokens_per_second": tokens / max(seconds, 1e-9)}
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--seed": 42, "--bars": 240, "--txns": 300, "--txn-fraction": 0.5, "--whales": 500,
+               "--candles": "json", "--workers": 1}
+    for flag, default in list(options.items()):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = type(default)(args[i + 1])
+            del args[i:i + 2]
+    if not args:
+        print("usage: python -m benchmarks.synthetic_data <out_dir> [tokens] [--seed S] [--bars B] [--txns T] "
+              "[--txn-fraction F] [--whales W] [--candles json|store|both] [--workers N]")
+        sys.exit(1)
+    out_dir = args[0]
+    tokens = int(args[1]) if len(args) > 1 else 1000
+    stats = generate(out_dir, tokens, seed=options["--seed"], bars=options["--bars"], txns=options["--txns"],
+                     txn_fraction=options["--txn-fraction"], n_whales=options["--whales"],
+                     candles_mode=options["--candles"], workers=options["--workers"])
+    print(f"Generated {stats['tokens']} tokens in {out_dir} in {stats['seconds']:.1f}s "
+          f"({stats['tokens_per_second']:.0f} tokens/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/ta_scaling.py
+# Scaling of process-pool TA (core.parallel_ta) from 1 worker up to N, on a
+# synthetic close matrix (random-walk prices, uneven history lengths).
+#
+#   python -m benchmarks.ta_scaling [tokens] [bars] [max_workers] [--json out.json]
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from core.parallel_ta import ParallelTA
+
+
+def _synthetic_closes(n_tokens: int, n_bars: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(n_bars // 2, n_bars + 1, n_tokens)
+    steps = rng.normal(0.0005, 0.03, (n_tokens, n_bars))
+    closes = 5e-5 * np.exp(np.cumsum(steps, axis=1))
+    closes[np.arange(n_bars)[None, :] >= lengths[:, None]] = np.nan # Left-aligned, NaN-padded
+    return closes, lengths
+
+
+def _worker_counts(max_workers: int):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    json_path = sys.argv[sys.argv.index("--json") + 1] if "--json" in sys.argv else None
+    if json_path in args:
+        args.remove(json_path)
+    n_tokens = int(args[0]) if len(args) > 0 else 20000
+    n_bars = int(args[1]) if len(args) > 1 else 240
+    max_workers = int(args[2]) if len(args) > 2 else (os.cpu_count() or 1)
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    closes, lengths = _synthetic_closes(n_tokens, n_bars)
+    token_ids = [f"SYN{i:07d}" for i in range(n_tokens)]
+
+    rows = []
+    baseline = None
+    for workers in _worker_counts(max_workers):
+        # 1 worker is the in-process batch kernel (the baseline); more workers go through the pool
+        with ParallelTA(dict(config, ta_workers=workers, ta_min_parallel_rows=0)) as parallel:
+            if workers > 1:
+                parallel.analyze_matrix(token_ids[:workers], closes[:workers], lengths[:workers]) # Start the pool
+            started = time.perf_counter()
+            parallel.analyze_matrix(token_ids, closes, lengths)
+            seconds = time.perf_counter() - started
+            chunk = parallel.last_chunk_rows or n_tokens
+        baseline = baseline or seconds
+        rows.append({"workers": workers, "seconds": seconds, "tokens_per_second": n_tokens / seconds,
+                     "speedup": baseline / seconds, "efficiency": baseline / seconds / workers, "chunk_rows": chunk})
+
+    print(f"{n_tokens} tokens x {n_bars} bars, cpu_count={os.cpu_count()}")
+    print(f"{'workers':>7} {'seconds':>9} {'tokens/s':>11} {'speedup':>8} {'effic.':>7} {'chunk':>7}")
+    for row in rows:
+        print(f"{row['workers']:>7} {row['seconds']:>9.3f} {row['tokens_per_second']:>11.0f} "
+              f"{row['speedup']:>7.2f}x {row['efficiency']:>7.2f} {row['chunk_rows']:>7}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"tokens": n_tokens, "bars": n_bars, "cpu_count": os.cpu_count(), "runs": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
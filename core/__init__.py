@@ -12,9 +12,13 @@ from .models import (
     DexScreenerSpecific,
     TokenSnapshot,
     Candle,
+    CandleSeries,
+    TransactionSeries,
     SecurityCheckResult,
     TechnicalAnalysisResult,
     WhaleSummaryResult,
     BuySignal,
     SellSignal
 )
+
+from .token_table import TokenTable
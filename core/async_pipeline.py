@@ -0,0 +1,171 @@
+# core/async_pipeline.py
+# asyncio pipeline mode for a scan: one stage per module, bounded queues between
+# stages (a slow stage backs up the ones before it instead of buffering the whole
+# universe), and a configurable number of workers per stage.
+#
+#   recon -> security -> load (candles + transactions) -> TA -> whales -> strategy -> decision
+#
+# Loading runs on threads so file/network I/O overlaps with the CPU stages, and TA
+# runs on a thread pool so it never blocks the event loop. The decision stage is
+# the only one that touches active_positions, and applies the same rules as
+# TokenScanner.process, so the pipeline emits the same Buy/Sell signals as the
+# serial loop (possibly in a different order).
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.models import TokenSnapshot, BuySignal, SellSignal, SecurityCheckResult, TechnicalAnalysisResult, WhaleSummaryResult
+from core.scanner import (TokenScanner, RISKY_STATUSES, count_signal, open_position, print_buy_signal, print_sell_signal,
+                          recheck_due)
+from utils.metrics import get_metrics
+
+STAGES = ("security", "load", "ta", "whale", "strategy", "decision")
+DEFAULT_CONCURRENCY = {"security": 1, "load": 8, "ta": 4, "whale": 1, "strategy": 1, "decision": 1}
+
+_DONE = object() # End-of-stream marker, one per downstream worker
+
+_metrics = get_metrics()
+
+
+class _Job:
+    __slots__ = ("token", "position", "security_result", "ta_result", "whale_summary", "strategies")
+
+    def __init__(self, token: TokenSnapshot, position: Optional[Dict]):
+        self.token = token
+        self.position = position
+        self.security_result: Optional[SecurityCheckResult] = None
+        self.ta_result: Optional[TechnicalAnalysisResult] = None
+        self.whale_summary: Optional[WhaleSummaryResult] = None
+        self.strategies: List[str] = []
+
+
+class AsyncPipeline:
+    def __init__(self, scanner: TokenScanner, config: Dict):
+        self.scanner = scanner
+        self.queue_size = config.get("pipeline_queue_size", 64)
+        self.concurrency = dict(DEFAULT_CONCURRENCY)
+        self.concurrency.update(config.get("pipeline_concurrency", {}))
+        self.stats: Dict[str, Dict[str, float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._positions: Dict[str, Dict] = {}
+        self._signals: List[Union[BuySignal, SellSignal]] = []
+        # TA and whale inputs each token reached the strategy stage with, for parity checks against the serial loop
+        self.inputs: Dict[str, Tuple[TechnicalAnalysisResult, WhaleSummaryResult]] = {}
+
+    # --- Stages: each takes a job and returns it, or None to drop it ---
+
+    async def _security(self, job: _Job) -> Optional[_Job]:
+        job.security_result = self.scanner.security.analyze(job.token)
+        if job.position is None and job.security_result.overall_status in RISKY_STATUSES:
+            print(f"Security Risk for {job.token.ticker}: {job.security_result.overall_status}.")
+            return None
+        return job
+
+    async def _load(self, job: _Job) -> Optional[_Job]:
+        token = job.token
+        if token.transactionStream is None: # Not loaded by the caller (main_controller leaves it to this stage)
+            await asyncio.to_thread(self.scanner.load_transactions, token)
+        # After the transactions, so tokens without candles get bars from their trades, as in the serial loop
+        await asyncio.to_thread(self.scanner.load_candles, token)
+        if not token.historicalCandleData and job.position is None:
+            print(f"No historical data for {token.ticker} to perform TA. Skipping TA.")
+            return None
+        return job
+
+    async def _ta(self, job: _Job) -> Optional[_Job]:
+        loop = asyncio.get_running_loop()
+        job.ta_result = await loop.run_in_executor(self._executor, self.scanner.analyze_ta, job.token)
+        return job
+
+    async def _whale(self, job: _Job) -> Optional[_Job]:
+        job.whale_summary = self.scanner.whales.analyze(job.token)
+        return job
+
+    async def _strategy(self, job: _Job) -> Optional[_Job]:
+        self.inputs[job.token.tokenId] = (job.ta_result, job.whale_summary)
+        job.strategies = self.scanner.strategy.get_applicable_strategies(
+            job.token, job.ta_result, job.whale_summary, job.security_result)
+        return job
+
+    async def _decision(self, job: _Job) -> Optional[_Job]:
+        token = job.token
+        if job.position is not None:
+            sell_signal = self.scanner.check_sell(token, job.position, job.ta_result, job.security_result)
+            if sell_signal:
+                print_sell_signal(sell_signal)
+                self._positions.pop(token.tokenId, None)
+                self._signals.append(sell_signal)
+                count_signal(sell_signal)
+                if self.scanner.journal is not None:
+                    self.scanner.journal.record_sell(sell_signal)
+                return None # Don't check for buy if we just sold
+            if job.security_result.overall_status in RISKY_STATUSES or not token.historicalCandleData:
+                return None
+        if job.strategies:
+            buy_signal = self.scanner.decision.generate_buy_signal(
+                token, job.strategies, job.ta_result, job.whale_summary, job.security_result)
+            if buy_signal:
+                print_buy_signal(buy_signal)
+                self._positions[token.tokenId] = open_position(buy_signal, job.security_result)
+                self._signals.append(buy_signal)
+                count_signal(buy_signal)
+                if self.scanner.journal is not None:
+                    self.scanner.journal.record_buy(buy_signal, self._positions[token.tokenId])
+        return None
+
+    # --- Plumbing ---
+
+    async def _run_stage(self, name: str, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], downstream_workers: int):
+        func = getattr(self, f"_{name}")
+        stats = self.stats[name] = {"jobs": 0, "busy_seconds": 0.0}
+
+        async def worker():
+            while True:
+                job = await inbox.get()
+                if job is _DONE:
+                    return
+                started = time.perf_counter()
+                result = await func(job)
+                elapsed = time.perf_counter() - started
+                stats["busy_seconds"] += elapsed
+                _metrics.observe("stage", elapsed, stage=name)
+                stats["jobs"] += 1
+                if result is not None and outbox is not None:
+                    await outbox.put(result) # Blocks while the next stage is full (backpressure)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency[name])))
+        if outbox is not None:
+            for _ in range(downstream_workers):
+                await outbox.put(_DONE)
+
+    async def _feed(self, tokens: List[TokenSnapshot], outbox: asyncio.Queue):
+        for token in tokens:
+            position = self._positions.get(token.tokenId)
+            if position is not None and not recheck_due(token, self._positions):
+                _metrics.inc("position_recheck_skipped")
+                continue
+            await outbox.put(_Job(token, position))
+        for _ in range(self.concurrency[STAGES[0]]):
+            await outbox.put(_DONE)
+
+    async def run(self, tokens: List[TokenSnapshot], active_positions: Dict[str, Dict]) -> List[Union[BuySignal, SellSignal]]:
+        """Pushes recon candidates through every stage; updates active_positions and returns the signals."""
+        self._positions = active_positions
+        self._signals = []
+        self.inputs = {}
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in STAGES]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency["ta"], thread_name_prefix="ta") as executor:
+            self._executor = executor
+            await asyncio.gather(
+                self._feed(tokens, queues[0]),
+                *(self._run_stage(name, queues[i], queues[i + 1] if i + 1 < len(STAGES) else None,
+                                  self.concurrency[STAGES[i + 1]] if i + 1 < len(STAGES) else 0)
+                  for i, name in enumerate(STAGES)))
+        self._executor = None
+        self.stats["total"] = {"jobs": len(tokens), "busy_seconds": time.perf_counter() - started}
+        return self._signals
+
+    def run_sync(self, tokens: List[TokenSnapshot], active_positions: Dict[str, Dict]) -> List[Union[BuySignal, SellSignal]]:
+        return asyncio.run(self.run(tokens, active_positions))
@@ -0,0 +1,306 @@
+# core/backtester.py
+# Event-driven backtest of StrategyEngine + DecisionEngine over recorded candles
+# and transaction streams.
+#
+# Each token history is replayed bar by bar. For every bar the backtester builds a
+# point-in-time view of the token and runs the live strategy and decision code on
+# it. The view has:
+#   - priceUSD = bar close,
+#   - volume.five_min_usd = traded volume over the last five minutes,
+#   - marketCap scaled from the snapshot by close / snapshot price,
+#   - streaming TA up to this bar,
+#   - the whale window over transactions seen so far.
+# Orders from a bar's signals fill at the next bar's open (no look-ahead). Stop
+# losses fill intrabar as soon as the bar's low reaches the stop. Security data
+# has no history, so each token's snapshot security result applies throughout.
+#
+#   python -m core.backtester [--workers N] [--json report.json] [token_id ...]
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core.models import TokenSnapshot, VolumeInfo, TechnicalAnalysisSnapshot, parse_timestamp
+from core.recon_filters import Reconnaissance
+from core.security_analyzer import SecurityAnalyzer
+from core.technical_analyzer import TechnicalAnalyzer
+from core.whale_tracker import WhaleTracker
+from core.strategy_engine import StrategyEngine
+from core.decision_engine import DecisionEngine
+from core.scanner import open_position
+from utils import data_loader
+from utils.candle_store import CandleStore, candles_to_columns
+
+STRATEGIES = ("MomentumRider", "PostRug", "AsiaTime")
+_TIMEFRAME_SECONDS = {"1m": 60, "5m": 300}
+
+
+@dataclass(slots=True)
+class Trade:
+    token_id: str
+    strategy: str
+    entry_time: int
+    entry_price: float
+    exit_time: int
+    exit_price: float # Quantity-weighted over partial exits
+    cost_usd: float
+    pnl_usd: float
+    exit_type: str # Sell type of the exit that closed the position
+    bars_held: int
+    partial_exits: int = 0
+
+
+class Backtester:
+    def __init__(self, config: Dict, tracked_whales: Any,
+                 historical_path: str = "mock_data/historical_data",
+                 transaction_path: str = "mock_data/transaction_data",
+                 candle_store: Optional[CandleStore] = None):
+        self.config = config
+        self.tracked_whales = tracked_whales
+        self.historical_path = historical_path
+        self.transaction_path = transaction_path
+        self.candle_store = candle_store
+        self.position_usd = config.get("backtest_position_usd", 100.0)
+        self.fee_rate = config.get("backtest_fee_rate", 0.01) # Per side, e.g. DEX + priority fees
+        self.slippage = config.get("backtest_slippage", 0.005)
+        self.partial_cooldown_bars = config.get("backtest_partial_cooldown_bars", 5)
+        self.security = SecurityAnalyzer(config)
+        self.recon = Reconnaissance(config)
+        self.strategy = StrategyEngine(config)
+        self.decision = DecisionEngine(config)
+        self.stop_loss_percent = config.get("stop_loss_percent", 0.25)
+
+    def _load_bars(self, token_id: str) -> Tuple[Optional[Any], str, int]:
+        """OHLCV columns of the finest timeframe available, its name and its bar length in seconds."""
+        if self.candle_store is not None:
+            data = self.candle_store.load(token_id)
+        else:
+            data = {tf: candles_to_columns(candles)
+                    for tf, candles in data_loader.load_historical_data(token_id, self.historical_path).items()}
+        for timeframe, seconds in _TIMEFRAME_SECONDS.items():
+            columns = data.get(timeframe)
+            if columns is not None and len(columns.timestamp):
+                return columns, timeframe, seconds
+        return None, "", 0
+
+    def _exit(self, position: Dict, price: float, quantity: float, bar_time: int, exit_type: str):
+        proceeds = quantity * price * (1 - self.fee_rate)
+        position["amount_held"] -= quantity
+        position["proceeds_usd"] += proceeds
+        position["exit_quantity"] += quantity
+        position["exit_value"] += quantity * price
+        position["last_exit_type"] = exit_type
+        position["last_exit_time"] = bar_time
+
+    def _close_trade(self, token_id: str, position: Dict, bars_held: int) -> Trade:
+        return Trade(
+            token_id=token_id, strategy=position["buy_strategy"], entry_time=position["entry_time"],
+            entry_price=position["entry_price"], exit_time=position["last_exit_time"],
+            exit_price=position["exit_value"] / position["exit_quantity"] if position["exit_quantity"] else 0.0,
+            cost_usd=position["cost_usd"], pnl_usd=position["proceeds_usd"] - position["cost_usd"],
+            exit_type=position["last_exit_type"], bars_held=bars_held, partial_exits=position["partial_exits"])
+
+    def run_token(self, snapshot: TokenSnapshot) -> List[Trade]:
+        """Replays one token's history; returns its closed round trips (open ones are closed at the last bar)."""
+        token_id = snapshot.tokenId
+        bars, timeframe, bar_seconds = self._load_bars(token_id)
+        if bars is None:
+            return []
+        transactions = data_loader.load_transaction_stream(token_id, self.transaction_path)
+        txn_times = [parse_timestamp(txn["timestamp"]) for txn in transactions]
+
+        ta = TechnicalAnalyzer(self.config) # Fresh streaming state per history
+        whales = WhaleTracker(self.config, self.tracked_whales)
+        security_result = self.security.analyze(snapshot)
+
+        # One mutable point-in-time view, updated in place each bar
+        token = TokenSnapshot(**{name: getattr(snapshot, name) for name in snapshot.__dataclass_fields__})
+        token.volume = VolumeInfo()
+        token.technicalAnalysis = TechnicalAnalysisSnapshot()
+        token.historicalCandleData = None
+        token.transactionStream = None
+        snapshot_price = snapshot.technicalAnalysis.priceUSD if snapshot.technicalAnalysis else None
+        window_bars = max(1, 300 // bar_seconds)
+
+        timestamps = bars.timestamp.tolist()
+        opens, highs, lows = bars.open.tolist(), bars.high.tolist(), bars.low.tolist()
+        closes, volumes = bars.close.tolist(), bars.volume.tolist()
+
+        trades: List[Trade] = []
+        position: Optional[Dict] = None
+        pending_buy = None # BuySignal waiting for the next bar's open
+        pending_sell = None
+        last_partial_bar = -10**9
+        rolling_volume = 0.0
+        next_txn = 0
+
+        for i, bar_time in enumerate(timestamps):
+            bar_open = opens[i]
+            # --- Fills of orders placed at the previous close ---
+            if pending_sell is not None and position is not None:
+                quantity = position["amount_held"] if pending_sell.sell_type != "TAKE_PROFIT_PARTIAL" \
+                    else position["amount_held"] * (pending_sell.partial_sell_percent or 0.25)
+                self._exit(position, bar_open * (1 - self.slippage), quantity, bar_time, pending_sell.sell_type)
+                if pending_sell.sell_type == "TAKE_PROFIT_PARTIAL":
+                    position["partial_exits"] += 1
+                else:
+                    trades.append(self._close_trade(token_id, position, i - position["entry_bar"]))
+                    position = None
+                pending_sell = None
+            if pending_buy is not None and position is None:
+                fill = bar_open * (1 + self.slippage)
+                position = open_position(pending_buy, security_result)
+                position.update(entry_price=fill, amount_held=self.position_usd * (1 - self.fee_rate) / fill,
+                                cost_usd=self.position_usd, proceeds_usd=0.0, exit_quantity=0.0, exit_value=0.0,
+                                partial_exits=0, entry_time=bar_time, entry_bar=i,
+                                last_exit_type="", last_exit_time=bar_time)
+                pending_buy = None
+
+            # --- Point-in-time state at this bar's close ---
+            close = closes[i]
+            rolling_volume += volumes[i]
+            if i >= window_bars:
+                rolling_volume -= volumes[i - window_bars]
+            token.volume.five_min_usd = rolling_volume
+            token.technicalAnalysis.priceUSD = close
+            if snapshot_price and snapshot.marketCap:
+                token.marketCap = snapshot.marketCap * close / snapshot_price
+            bar_end = bar_time + bar_seconds
+            while next_txn < len(transactions) and txn_times[next_txn] < bar_end:
+                whales.ingest(token_id, transactions[next_txn])
+                next_txn += 1
+            ta_result = ta.update_candle(token_id, {"timestamp": bar_time, "close": close, "volume": volumes[i]},
+                                         timeframe)
+            whale_summary = whales.summary(token_id, bar_end)
+
+            if position is not None:
+                # Intrabar stop loss: fills at the stop (or the open, if the bar gapped through it)
+                stop_price = position["entry_price"] * (1 - self.stop_loss_percent)
+                if lows[i] <= stop_price:
+                    self._exit(position, min(bar_open, stop_price) * (1 - self.slippage), position["amount_held"],
+                               bar_time, "STOP_LOSS")
+                    trades.append(self._close_trade(token_id, position, i - position["entry_bar"]))
+                    position = None
+                    continue
+                sell_signal = self.decision.generate_sell_signal(token, position, ta_result, security_result)
+                if sell_signal is not None:
+                    if sell_signal.sell_type == "TAKE_PROFIT_PARTIAL":
+                        if i - last_partial_bar < self.partial_cooldown_bars:
+                            continue # A partial exit was just taken
+                        last_partial_bar = i
+                    pending_sell = sell_signal
+                continue
+
+            if pending_buy is None and self.recon.passes(token):
+                applicable = self.strategy.get_applicable_strategies(token, ta_result, whale_summary, security_result)
+                if applicable:
+                    pending_buy = self.decision.generate_buy_signal(token, applicable, ta_result, whale_summary, security_result)
+
+        if position is not None: # Mark to market at the last close
+            self._exit(position, closes[-1] * (1 - self.slippage), position["amount_held"], timestamps[-1], "END_OF_DATA")
+            trades.append(self._close_trade(token_id, position, len(timestamps) - 1 - position["entry_bar"]))
+        return trades
+
+    def run(self, snapshots: Sequence[TokenSnapshot]) -> List[Trade]:
+        trades = []
+        for snapshot in snapshots:
+            trades.extend(self.run_token(snapshot))
+        return trades
+
+
+def summarize(trades: Sequence[Trade], strategies: Sequence[str] = STRATEGIES) -> Dict[str, Dict[str, float]]:
+    """Per-strategy (and "ALL") trade count, hit rate, PnL, return and max drawdown of realized PnL."""
+    report = {}
+    for name in list(strategies) + ["ALL"]:
+        subset = sorted((t for t in trades if name == "ALL" or t.strategy == name), key=lambda t: (t.exit_time, t.token_id))
+        pnl = 0.0
+        peak = 0.0
+        max_drawdown = 0.0
+        for trade in subset: # Equity curve of realized PnL in exit-time order
+            pnl += trade.pnl_usd
+            peak = max(peak, pnl)
+            max_drawdown = max(max_drawdown, peak - pnl)
+        cost = sum(t.cost_usd for t in subset)
+        wins = sum(1 for t in subset if t.pnl_usd > 0)
+        report[name] = {
+            "trades": len(subset),
+            "hit_rate": wins / len(subset) if subset else 0.0,
+            "pnl_usd": pnl,
+            "return_pct": 100.0 * pnl / cost if cost else 0.0,
+            "max_drawdown_usd": max_drawdown,
+            "avg_bars_held": sum(t.bars_held for t in subset) / len(subset) if subset else 0.0,
+        }
+    return report
+
+
+_worker_backtester: Optional[Backtester] = None
+
+
+def _init_worker(config: Dict, tracked_whales: Any, historical_path: str, transaction_path: str, store_root: Optional[str]):
+    global _worker_backtester
+    store = CandleStore(store_root) if store_root else None
+    _worker_backtester = Backtester(config, tracked_whales, historical_path, transaction_path, store)
+
+
+def _run_chunk(snapshots: List[TokenSnapshot]) -> List[Trade]:
+    return _worker_backtester.run(snapshots)
+
+
+def run_parallel(backtester: Backtester, snapshots: Sequence[TokenSnapshot], workers: int) -> List[Trade]:
+    """Shards token histories across processes; each worker loads its own candles and transactions."""
+    snapshots = list(snapshots)
+    if workers <= 1 or len(snapshots) < 2:
+        return backtester.run(snapshots)
+    chunk = max(1, math.ceil(len(snapshots) / (workers * 4)))
+    store_root = backtester.candle_store.root if backtester.candle_store is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backtester.config, backtester.tracked_whales, backtester.historical_path,
+                                       backtester.transaction_path, store_root)) as pool:
+        chunks = pool.map(_run_chunk, [snapshots[i:i + chunk] for i in range(0, len(snapshots), chunk)])
+        return [trade for trades in chunks for trade in trades]
+
+
+def main():
+    args = sys.argv[1:]
+    workers, json_path = 1, None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    if "--json" in args:
+        i = args.index("--json")
+        json_path = args[i + 1]
+        del args[i:i + 2]
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    from main_controller import load_tracked_whales
+    tracked_whales = load_tracked_whales(config.get("tracked_whale_wallets_file", ""), config.get("tracked_whale_index_file"))
+    store_path = config.get("candle_store_path")
+    store = CandleStore(store_path) if store_path and os.path.isdir(store_path) else None
+    snapshots = data_loader.load_token_snapshots(config.get("backtest_snapshots_file", "mock_data/token_snapshots.json"))
+    if args:
+        snapshots = [s for s in snapshots if s.tokenId in set(args)]
+
+    backtester = Backtester(config, tracked_whales, candle_store=store)
+    started = time.perf_counter()
+    trades = run_parallel(backtester, snapshots, workers)
+    seconds = time.perf_counter() - started
+    report = summarize(trades)
+
+    print(f"Backtest: {len(snapshots)} token histories in {seconds:.2f}s ({len(snapshots) / max(seconds, 1e-9) * 60:.0f}/min)")
+    print(f"{'strategy':<14} {'trades':>6} {'hit rate':>8} {'PnL $':>10} {'return %':>9} {'max DD $':>9} {'avg bars':>8}")
+    for name, row in report.items():
+        print(f"{name:<14} {row['trades']:>6} {row['hit_rate']:>8.1%} {row['pnl_usd']:>10.2f} "
+              f"{row['return_pct']:>9.2f} {row['max_drawdown_usd']:>9.2f} {row['avg_bars_held']:>8.1f}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"tokens": len(snapshots), "seconds": seconds, "report": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
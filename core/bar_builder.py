@@ -0,0 +1,169 @@
+# core/bar_builder.py
+# OHLCV bars built straight from a token's trades (transactionStream records:
+# timestamp, pricePerTokenUSD, amountUSD), for tokens that trade before any candle
+# feed exists. One pass, O(1) per trade.
+#
+# Trades may arrive late or out of order. A bar stays open (and keeps accepting
+# trades, ordered by trade time rather than arrival) until the newest trade seen
+# is grace_seconds past the bar's end; it is then final and moved into a
+# CandleSeries. Trades for an already final bar are counted and dropped. Memory is
+# bounded: only the bars inside the grace window are open, and the final series
+# keeps at most max_bars bars. Minutes without trades become flat zero-volume bars
+# at the previous close (trade_bars_fill_gaps), so bar k is always k timeframes in.
+#
+# The output is a CandleSeries, which TechnicalAnalyzer and CandleResampler take as-is.
+from typing import Any, Dict, List, Optional
+
+from core.models import CandleSeries, TransactionSeries, parse_timestamp
+from core.resampler import TIMEFRAME_SECONDS
+
+
+class _TokenBars:
+    __slots__ = ("series", "open_bars", "watermark", "closed_through", "consumed")
+
+    def __init__(self):
+        self.series = CandleSeries() # Final bars
+        # bucket start -> [first trade time, open, high, low, last trade time, close, volume]
+        self.open_bars: Dict[int, List[float]] = {}
+        self.watermark: Optional[int] = None # Newest trade time seen
+        self.closed_through: Optional[int] = None # Buckets starting before this are final
+        self.consumed = 0 # Entries of the token's transactionStream already ingested
+
+
+class TradeBarBuilder:
+    def __init__(self, config: Dict, timeframe: Optional[str] = None):
+        self.timeframe = timeframe or config.get("trade_bars_timeframe", "1m")
+        if self.timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported trade bar timeframe: {self.timeframe}")
+        self.seconds = TIMEFRAME_SECONDS[self.timeframe]
+        self.grace_seconds = config.get("trade_bars_grace_seconds", 30)
+        self.max_bars = config.get("trade_bars_max_bars", 2000)
+        self.fill_gaps = config.get("trade_bars_fill_gaps", True)
+        self._tokens: Dict[str, _TokenBars] = {}
+        self.trades = 0
+        self.late_trades = 0 # Arrived after their bar was final (dropped)
+
+    def _state(self, token_id: str) -> _TokenBars:
+        state = self._tokens.get(token_id)
+        if state is None:
+            state = self._tokens[token_id] = _TokenBars()
+        return state
+
+    # --- Ingest ---
+
+    def add_trade(self, token_id: str, timestamp: int, price: float, amount_usd: float) -> bool:
+        """Folds one trade (epoch seconds, USD price per token, USD size) in. False if it was dropped."""
+        if not price > 0: # Also rejects NaN
+            return False
+        state = self._state(token_id)
+        bucket = timestamp - timestamp % self.seconds
+        if state.closed_through is not None and bucket < state.closed_through:
+            self.late_trades += 1
+            return False
+        self.trades += 1
+        bar = state.open_bars.get(bucket)
+        if bar is None:
+            state.open_bars[bucket] = [timestamp, price, price, price, timestamp, price, amount_usd]
+        else:
+            if timestamp < bar[0]: # Earlier than anything seen for this bar: new open
+                bar[0], bar[1] = timestamp, price
+            if timestamp >= bar[4]: # Ties go to the later arrival
+                bar[4], bar[5] = timestamp, price
+            if price > bar[2]:
+                bar[2] = price
+            if price < bar[3]:
+                bar[3] = price
+            bar[6] += amount_usd
+        if state.watermark is None or timestamp > state.watermark:
+            state.watermark = timestamp
+            self._close_through(state, timestamp - self.grace_seconds)
+        return True
+
+    def add_transaction(self, token_id: str, txn: Dict[str, Any]) -> bool:
+        try:
+            timestamp = parse_timestamp(txn["timestamp"])
+            amount_usd = float(txn.get("amountUSD") or 0.0)
+            price = txn.get("pricePerTokenUSD")
+            if price is None: # Derive it from the two amounts when the feed leaves it out
+                price = amount_usd / float(txn.get("amountToken") or 0.0)
+            price = float(price)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            return False
+        return self.add_trade(token_id, timestamp, price, amount_usd)
+
+    def sync(self, token_id: str, stream: Any) -> int:
+        """Ingests the entries of a transactionStream (dicts or TransactionSeries) not consumed yet."""
+        if not stream:
+            return 0
+        state = self._state(token_id)
+        if state.consumed > len(stream): # Stream was replaced by a shorter one; start over
+            self.reset(token_id)
+            state = self._state(token_id)
+        start = state.consumed
+        if isinstance(stream, TransactionSeries):
+            for timestamp, price, amount_usd in zip(stream.timestamp[start:], stream.price_usd[start:],
+                                                    stream.amount_usd[start:]):
+                self.add_trade(token_id, timestamp, price, amount_usd)
+        else:
+            for txn in stream[start:]:
+                self.add_transaction(token_id, txn)
+        state.consumed = len(stream)
+        return len(stream) - start
+
+    def advance(self, token_id: str, now: int):
+        """Finalizes bars whose grace window has passed by wall-clock time `now`, even if no newer trade came."""
+        state = self._tokens.get(token_id)
+        if state is not None:
+            self._close_through(state, now - self.grace_seconds)
+
+    # --- Finalization ---
+
+    def _close_through(self, state: _TokenBars, cutoff: int):
+        """Makes every bucket that ended at or before `cutoff` final."""
+        closed_through = cutoff - cutoff % self.seconds # First bucket that may still change
+        if state.closed_through is not None and closed_through <= state.closed_through:
+            return
+        state.closed_through = closed_through
+        for bucket in sorted(b for b in state.open_bars if b < closed_through):
+            self._append(state.series, bucket, state.open_bars.pop(bucket))
+        if len(state.series) > 2 * self.max_bars: # Trim in chunks so appends stay amortized O(1)
+            state.series.drop_first(len(state.series) - self.max_bars)
+
+    def _append(self, series: CandleSeries, bucket: int, bar: List[float]):
+        if self.fill_gaps and len(series):
+            previous_close = series.close[-1]
+            start = max(series.timestamp[-1] + self.seconds, bucket - self.max_bars * self.seconds)
+            for gap in range(start, bucket, self.seconds):
+                series.append(gap, previous_close, previous_close, previous_close, previous_close, 0.0)
+        series.append(bucket, bar[1], bar[2], bar[3], bar[5], bar[6])
+
+    # --- Output ---
+
+    def series(self, token_id: str, include_open: bool = False) -> CandleSeries:
+        """The token's bars. include_open adds the bars still inside the grace window, which may change,
+        on a copy (the final series itself is returned as-is otherwise)."""
+        state = self._tokens.get(token_id)
+        if state is None:
+            return CandleSeries()
+        if not include_open or not state.open_bars:
+            return state.series
+        series = CandleSeries()
+        for name in CandleSeries.COLUMNS:
+            getattr(series, name).extend(getattr(state.series, name))
+        for bucket in sorted(state.open_bars):
+            self._append(series, bucket, state.open_bars[bucket])
+        return series
+
+    def candle_data(self, token_id: str, include_open: bool = True) -> Dict[str, CandleSeries]:
+        """{timeframe: CandleSeries} in the shape of historicalCandleData, for TechnicalAnalyzer."""
+        return {self.timeframe: self.series(token_id, include_open)}
+
+    def reset(self, token_id: Optional[str] = None):
+        if token_id is None:
+            self._tokens.clear()
+        else:
+            self._tokens.pop(token_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"tokens": len(self._tokens), "trades": self.trades, "late_trades": self.late_trades,
+                "open_bars": sum(len(state.open_bars) for state in self._tokens.values())}
@@ -1,25 +1,123 @@
 from typing import List, Dict, Optional, Tuple
+import numpy as np
 from core.models import (
     TokenSnapshot, TechnicalAnalysisResult, WhaleSummaryResult,
-    SecurityCheckResult, BuySignal, SellSignal
+    SecurityCheckResult, BuySignal, SellSignal, BuyReason
 )
 
+# Confidence = dec_confidence_base + the weights of the BuyReason bits set, clipped to [0, 1] and
+# rounded to 6 decimals (so 0.5 + 0.1 + 0.1 - 0.2 meets a 0.5 threshold).
+# dec_confidence_weights in the config overrides these by name.
+DEFAULT_CONFIDENCE_WEIGHTS = {
+    "EMA_BULLISH_CROSS_RECENT": 0.1,
+    "RSI_NEUTRAL_RISING": 0.05,
+    "MACD_BULLISH": 0.1,
+    "STRONG_VOLUME": 0.1,
+    "WHALE_BUYING": 0.1,
+    "HOCKEY_STICK": 0.1,
+    "FLOOR_FORMATION": 0.15,
+    "BLOW_OFF_TOP": -0.2, # Chasing a spike that already reversed
+}
+
 class DecisionEngine:
     def __init__(self, config: Dict):
         self.config = config
         self.min_confidence_buy = config.get("dec_min_confidence_buy", 0.6)
+        self.confidence_base = config.get("dec_confidence_base", 0.5)
+        self.whale_buying_min_usd = config.get("dec_whale_buying_min_usd", 750.0)
+        weights = dict(DEFAULT_CONFIDENCE_WEIGHTS, **config.get("dec_confidence_weights", {}))
+        unknown = [name for name in weights if name not in BuyReason.__members__]
+        if unknown:
+            raise ValueError(f"Unknown reasons in dec_confidence_weights: {unknown}")
+        # (bit, weight) pairs, applied in the same order by confidence() and score_batch()
+        self.weights: List[Tuple[int, float]] = [(int(BuyReason[name]), weight) for name, weight in weights.items() if weight]
+
+    def stop_loss_price(self, position: Dict) -> float:
+        return position['entry_price'] * (1 - self.config.get("stop_loss_percent", 0.25))
+
+    def take_profit_price(self, position: Dict) -> Optional[float]:
+        """Price of the strategy's fixed take-profit target, if it has one (only PostRug does)."""
+        if position.get("buy_strategy") == "PostRug":
+            return position['entry_price'] * (1 + self.config.get("post_rug_take_profit_percent", 0.50))
+        return None
 
-    def _calculate_confidence(self, reasons: List[str], strategy: str) -> float:
-        # Very basic confidence calculation
-        score = 0.5 # Base
-        if "BULLISH_CROSS_RECENT" in str(reasons): score += 0.1
-        if "RSI_NEUTRAL_RISING" in str(reasons): score += 0.05
-        if "MACD_BULLISH_MOMENTUM" in str(reasons): score += 0.1
-        if "STRONG_VOLUME" in str(reasons): score += 0.1
-        if "WHALE_BUYING" in str(reasons): score += 0.1
-        if strategy == "PostRug" and "FLOOR_FORMATION" in str(reasons): score += 0.15
-        return min(1.0, score)
+    # --- Confidence ---
+
+    def confidence(self, flags: int) -> float:
+        score = self.confidence_base
+        for bit, weight in self.weights:
+            if flags & bit:
+                score += weight
+        return float(np.round(min(1.0, max(0.0, score)), 6))
+
+    def score_batch(self, flags: np.ndarray) -> np.ndarray:
+        """confidence() for an array of BuyReason bit sets (any shape), one vectorized pass per weight."""
+        flags = np.asarray(flags)
+        score = np.full(flags.shape, self.confidence_base, dtype=np.float64)
+        for bit, weight in self.weights:
+            score += weight * ((flags & bit) != 0)
+        return np.round(np.clip(score, 0.0, 1.0), 6)
+
+    def _confirm(self, strategy: str, token: TokenSnapshot, ta_result: TechnicalAnalysisResult,
+                 whale_summary: WhaleSummaryResult) -> Tuple[bool, BuyReason]:
+        """Whether the strategy's buy conditions hold, and the reason bits behind it."""
+        volume = token.volume.five_min_usd or 0
+        flags = BuyReason.NONE
+        if ta_result.ema_cross_state == "BULLISH_CROSS_RECENT":
+            flags |= BuyReason.EMA_BULLISH_CROSS_RECENT
+        if ta_result.rsi_state == "NEUTRAL_RISING":
+            flags |= BuyReason.RSI_NEUTRAL_RISING
+        macd_bullish = ta_result.macd_state in ["BULLISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST"]
+        if macd_bullish:
+            flags |= BuyReason.MACD_BULLISH
+        if whale_summary.net_buy_volume_usd_15m > self.whale_buying_min_usd:
+            flags |= BuyReason.WHALE_BUYING
+        if ta_result.identified_pattern == "BLOW_OFF_TOP":
+            flags |= BuyReason.BLOW_OFF_TOP
 
+        buy = False
+        if strategy == "MomentumRider":
+            buy = (ta_result.ema_cross_state in ["BULLISH_CROSS_RECENT", "BULLISH_ABOVE"] and
+                   ta_result.rsi_state not in ["OVERBOUGHT"] and (ta_result.rsi_14_value or 100) < 65 and # Give some room
+                   macd_bullish and
+                   volume > self.config.get("momentum_min_volume_buy_confirm", 25000) and
+                   whale_summary.net_buy_volume_usd_15m > self.config.get("momentum_min_whale_buy_confirm", 750.0))
+            if buy:
+                flags |= BuyReason.STRONG_VOLUME | BuyReason.WHALE_BUYING
+        elif strategy == "PostRug":
+            buy = (ta_result.identified_pattern == "FLOOR_FORMATION_DOUBLE_BOUNCE" and
+                   ta_result.rsi_state == "NEUTRAL_RISING" and (ta_result.rsi_14_value or 0) < 50 and # Ensure it's still low
+                   volume > self.config.get("post_rug_min_volume_buy_confirm", 20000))
+            if buy:
+                flags |= BuyReason.FLOOR_FORMATION | BuyReason.STRONG_VOLUME
+        elif strategy == "AsiaTime":
+            hockey_stick = ta_result.identified_pattern == "POTENTIAL_HOCKEY_STICK"
+            strong_volume = volume > self.config.get("asia_min_volume_buy_confirm", 60000)
+            buy = hockey_stick or (ta_result.ema_cross_state == "BULLISH_ABOVE" and strong_volume)
+            if hockey_stick:
+                flags |= BuyReason.HOCKEY_STICK
+            if strong_volume:
+                flags |= BuyReason.STRONG_VOLUME
+        return buy, flags
+
+    def _render_reasons(self, strategy: str, flags: BuyReason, token: TokenSnapshot,
+                        ta_result: TechnicalAnalysisResult, whale_summary: WhaleSummaryResult) -> List[str]:
+        """Human-readable reasoning; only built for signals that are actually emitted."""
+        reasons = [f"Strategy: {strategy}"]
+        if strategy == "MomentumRider":
+            reasons.append(f"TA: EMA {ta_result.ema_cross_state}, RSI {ta_result.rsi_state} ({ta_result.rsi_14_value:.2f}), MACD {ta_result.macd_state}")
+        elif strategy == "PostRug":
+            reasons.append(f"TA: Pattern {ta_result.identified_pattern}, RSI {ta_result.rsi_state} ({ta_result.rsi_14_value or 0:.2f})")
+        elif strategy == "AsiaTime":
+            reasons.append(f"TA: Pattern {ta_result.identified_pattern or 'Strong Upward EMA'}, EMA {ta_result.ema_cross_state}")
+        if flags & BuyReason.STRONG_VOLUME:
+            suffix = " for Asia time" if strategy == "AsiaTime" else ""
+            reasons.append(f"Volume: 5min Vol ${(token.volume.five_min_usd or 0):.0f} > Threshold{suffix}")
+        if flags & BuyReason.WHALE_BUYING:
+            reasons.append(f"Whales: Net Buy ${whale_summary.net_buy_volume_usd_15m:.0f} > Threshold")
+        if flags & BuyReason.BLOW_OFF_TOP:
+            reasons.append("Caution: Pattern BLOW_OFF_TOP")
+        return reasons
 
     def generate_buy_signal(
         self,
@@ -38,47 +136,19 @@ class DecisionEngine:
 
         # Prioritize strategies or pick the first one for simplicity
         strategy_to_use = applicable_strategies[0]
-        reasons = [f"Strategy: {strategy_to_use}"]
-        buy = False
-
-        # --- Logic for each strategy ---
-        if strategy_to_use == "MomentumRider":
-            if (ta_result.ema_cross_state in ["BULLISH_CROSS_RECENT", "BULLISH_ABOVE"] and
-                ta_result.rsi_state not in ["OVERBOUGHT"] and (ta_result.rsi_14_value or 100) < 65 and # Give some room
-                ta_result.macd_state in ["BULLISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST"] and
-                (token.volume.five_min_usd or 0) > self.config.get("momentum_min_volume_buy_confirm", 25000) and
-                whale_summary.net_buy_volume_usd_15m > self.config.get("momentum_min_whale_buy_confirm", 750.0)):
-                buy = True
-                reasons.append(f"TA: EMA {ta_result.ema_cross_state}, RSI {ta_result.rsi_state} ({ta_result.rsi_14_value:.2f}), MACD {ta_result.macd_state}")
-                reasons.append(f"Volume: 5min Vol ${(token.volume.five_min_usd or 0):.0f} > Threshold")
-                reasons.append(f"Whales: Net Buy ${whale_summary.net_buy_volume_usd_15m:.0f} > Threshold")
-
-        elif strategy_to_use == "PostRug":
-            if (ta_result.identified_pattern == "FLOOR_FORMATION_DOUBLE_BOUNCE" and
-                ta_result.rsi_state == "NEUTRAL_RISING" and (ta_result.rsi_14_value or 0) < 50 and # Ensure it's still low
-                (token.volume.five_min_usd or 0) > self.config.get("post_rug_min_volume_buy_confirm", 20000)):
-                buy = True
-                reasons.append(f"TA: Pattern {ta_result.identified_pattern}, RSI {ta_result.rsi_state} ({ta_result.rsi_14_value:.2f})")
-                reasons.append(f"Volume: 5min Vol ${(token.volume.five_min_usd or 0):.0f} > Threshold")
-
-        elif strategy_to_use == "AsiaTime":
-             if (ta_result.identified_pattern == "POTENTIAL_HOCKEY_STICK" or \
-                (ta_result.ema_cross_state == "BULLISH_ABOVE" and (token.volume.five_min_usd or 0) > self.config.get("asia_min_volume_buy_confirm", 60000))):
-                buy = True
-                reasons.append(f"TA: Pattern {ta_result.identified_pattern or 'Strong Upward EMA'}, EMA {ta_result.ema_cross_state}")
-                reasons.append(f"Volume: 5min Vol ${(token.volume.five_min_usd or 0):.0f} > Threshold for Asia time")
-
+        buy, flags = self._confirm(strategy_to_use, token, ta_result, whale_summary)
 
         if buy:
-            confidence = self._calculate_confidence(reasons, strategy_to_use)
+            confidence = self.confidence(flags)
             if confidence >= self.min_confidence_buy and token.technicalAnalysis and token.technicalAnalysis.priceUSD:
                 entry_price = token.technicalAnalysis.priceUSD
                 # Suggest a small range around current price
                 entry_range = (entry_price * 0.995, entry_price * 1.005)
                 return BuySignal(
                     token_id=token.tokenId, contract_address=token.contractAddress, ticker=token.ticker,
-                    strategy=strategy_to_use, suggested_entry_price_range=entry_range,
-                    confidence_score=confidence, reasoning=reasons
+                    strategy=strategy_to_use, suggested_entry_price_range=entry_range, confidence_score=confidence,
+                    reasoning=self._render_reasons(strategy_to_use, flags, token, ta_result, whale_summary),
+                    reason_flags=int(flags)
                 )
         return None
 
@@ -93,7 +163,7 @@ class DecisionEngine:
         # --- Stop Loss First ---
         if token.technicalAnalysis and token.technicalAnalysis.priceUSD:
             current_price = token.technicalAnalysis.priceUSD
-            stop_loss_price = current_position['entry_price'] * (1 - self.config.get("stop_loss_percent", 0.25)) # 25% SL
+            stop_loss_price = self.stop_loss_price(current_position) # 25% SL by default
             if current_price <= stop_loss_price:
                 return SellSignal(token.tokenId, token.contractAddress, token.ticker, "STOP_LOSS", current_price,
                                   [f"Price hit stop loss level of ${stop_loss_price:.6f}"], "STOP_LOSS")
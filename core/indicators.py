@@ -0,0 +1,256 @@
+# core/indicators.py
+# Incremental (O(1) per candle) and batched NumPy versions of the indicators
+# TechnicalAnalyzer uses. Both reproduce the pandas_ta definitions, so streamed or
+# batched series end up at the same values as a full recompute per token.
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmaState:
+    """EMA seeded with the SMA of the first `length` values (pandas_ta.ema default)."""
+    __slots__ = ("length", "alpha", "count", "seed_sum", "value")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+            return None
+        if self.count == self.length:
+            self.seed_sum += x
+            self.value = self.seed_sum / self.length
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+    def clone(self) -> "EmaState":
+        copy = EmaState.__new__(EmaState)
+        copy.length, copy.alpha, copy.count, copy.seed_sum, copy.value = \
+            self.length, self.alpha, self.count, self.seed_sum, self.value
+        return copy
+
+
+class RmaState:
+    """Wilder moving average as pandas_ta.rma computes it: ewm(alpha=1/length, min_periods=length)."""
+    __slots__ = ("length", "decay", "count", "weighted_sum", "weight_total", "value")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.count = 0
+        self.weighted_sum = 0.0
+        self.weight_total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> Optional[float]:
+        # pandas' adjusted ewm is a ratio of two geometric sums, both O(1) to roll forward
+        self.count += 1
+        self.weighted_sum = x + self.decay * self.weighted_sum
+        self.weight_total = 1.0 + self.decay * self.weight_total
+        if self.count >= self.length:
+            self.value = self.weighted_sum / self.weight_total
+        return self.value
+
+    def clone(self) -> "RmaState":
+        copy = RmaState.__new__(RmaState)
+        copy.length, copy.decay, copy.count, copy.weighted_sum, copy.weight_total, copy.value = \
+            self.length, self.decay, self.count, self.weighted_sum, self.weight_total, self.value
+        return copy
+
+
+class RsiState:
+    __slots__ = ("prev_close", "gains", "losses", "value")
+
+    def __init__(self, length: int):
+        self.prev_close: Optional[float] = None
+        self.gains = RmaState(length)
+        self.losses = RmaState(length)
+        self.value: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        if self.prev_close is None: # First diff is NaN and ignored by ewm
+            self.prev_close = close
+            return None
+        change = close - self.prev_close
+        self.prev_close = close
+        avg_gain = self.gains.update(change if change > 0 else 0.0)
+        avg_loss = self.losses.update(-change if change < 0 else 0.0)
+        if avg_gain is None or avg_loss is None:
+            return None
+        total = avg_gain + avg_loss
+        self.value = 100.0 * avg_gain / total if total > 0 else float("nan")
+        return self.value
+
+    def clone(self) -> "RsiState":
+        copy = RsiState.__new__(RsiState)
+        copy.prev_close, copy.gains, copy.losses, copy.value = \
+            self.prev_close, self.gains.clone(), self.losses.clone(), self.value
+        return copy
+
+
+class MacdState:
+    """MACD line, signal and histogram; the signal EMA starts at the first valid MACD value."""
+    __slots__ = ("fast", "slow", "signal_ema", "macd", "signal", "histogram")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EmaState(fast)
+        self.slow = EmaState(slow)
+        self.signal_ema = EmaState(signal)
+        self.macd: Optional[float] = None
+        self.signal: Optional[float] = None
+        self.histogram: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        fast_value = self.fast.update(close)
+        slow_value = self.slow.update(close)
+        if fast_value is None or slow_value is None:
+            return None
+        self.macd = fast_value - slow_value
+        self.signal = self.signal_ema.update(self.macd)
+        if self.signal is not None:
+            self.histogram = self.macd - self.signal
+        return self.histogram
+
+    def clone(self) -> "MacdState":
+        copy = MacdState.__new__(MacdState)
+        copy.fast, copy.slow, copy.signal_ema = self.fast.clone(), self.slow.clone(), self.signal_ema.clone()
+        copy.macd, copy.signal, copy.histogram = self.macd, self.signal, self.histogram
+        return copy
+
+
+class IndicatorState:
+    """Per-token (and per-timeframe) streaming state for EMA short/long, RSI and MACD.
+
+    Keeps the previous bar's values as well, since the cross/rising/falling
+    states compare the last two points, and with window > 0 the last `window`
+    closes and volumes for the pattern detectors (core/patterns.py).
+    """
+    __slots__ = (
+        "ema_short", "ema_long", "rsi", "macd", "bars", "last_timestamp",
+        "prev_ema_short", "prev_ema_long", "prev_rsi", "prev_histogram", "partial_base",
+        "window", "closes", "volumes",
+    )
+
+    def __init__(self, ema_short: int = 9, ema_long: int = 21, rsi_period: int = 14,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9, window: int = 0):
+        self.ema_short = EmaState(ema_short)
+        self.ema_long = EmaState(ema_long)
+        self.rsi = RsiState(rsi_period)
+        self.macd = MacdState(macd_fast, macd_slow, macd_signal)
+        self.bars = 0
+        self.last_timestamp = None # ISO string for dict candles, epoch seconds for columnar ones
+        self.prev_ema_short: Optional[float] = None
+        self.prev_ema_long: Optional[float] = None
+        self.prev_rsi: Optional[float] = None
+        self.prev_histogram: Optional[float] = None
+        self.partial_base: Optional["IndicatorState"] = None # State before the last bar, while that bar is partial
+        self.window = window
+        # Recent bars, trimmed to `window` in chunks so appends stay amortized O(1)
+        self.closes: List[float] = []
+        self.volumes: List[float] = []
+
+    def update(self, close: float, timestamp=None, partial: bool = False, volume: float = 0.0):
+        """Appends one bar. partial=True marks it as still forming: a later update with the same
+        timestamp replaces it instead of appending (e.g. a 5m bar rebuilt from each new 1m bar)."""
+        if self.partial_base is not None:
+            if timestamp is not None and timestamp == self.last_timestamp:
+                self._restore(self.partial_base) # Replace the forming bar
+                if self.window:
+                    self.closes.pop()
+                    self.volumes.pop()
+            self.partial_base = None
+        if partial:
+            self.partial_base = self.clone(with_window=False)
+        self.prev_ema_short = self.ema_short.value
+        self.prev_ema_long = self.ema_long.value
+        self.prev_rsi = self.rsi.value
+        self.prev_histogram = self.macd.histogram
+
+        self.ema_short.update(close)
+        self.ema_long.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bars += 1
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        if self.window:
+            self.closes.append(close)
+            self.volumes.append(volume)
+            if len(self.closes) > 2 * self.window:
+                del self.closes[:-self.window], self.volumes[:-self.window]
+
+    def clone(self, with_window: bool = True) -> "IndicatorState":
+        copy = IndicatorState.__new__(IndicatorState)
+        copy.ema_short, copy.ema_long = self.ema_short.clone(), self.ema_long.clone()
+        copy.rsi, copy.macd = self.rsi.clone(), self.macd.clone()
+        copy.bars, copy.last_timestamp = self.bars, self.last_timestamp
+        copy.prev_ema_short, copy.prev_ema_long = self.prev_ema_short, self.prev_ema_long
+        copy.prev_rsi, copy.prev_histogram = self.prev_rsi, self.prev_histogram
+        copy.partial_base = None
+        copy.window = self.window
+        # Without the window the copy is only good for _restore(), which keeps the current one
+        copy.closes = list(self.closes) if with_window else []
+        copy.volumes = list(self.volumes) if with_window else []
+        return copy
+
+    def _restore(self, base: "IndicatorState"):
+        self.ema_short, self.ema_long, self.rsi, self.macd = base.ema_short, base.ema_long, base.rsi, base.macd
+        self.bars, self.last_timestamp = base.bars, base.last_timestamp
+        self.prev_ema_short, self.prev_ema_long = base.prev_ema_short, base.prev_ema_long
+        self.prev_rsi, self.prev_histogram = base.prev_rsi, base.prev_histogram
+
+
+# --- Batched versions ---
+# Rows are tokens, columns are bars, left-aligned and NaN-padded on the right, so
+# bar k sits in column k for every row and SMA seeds line up across the batch.
+# Each function makes one pass over the columns with row-vectorized updates.
+
+def ema_rows(values: np.ndarray, length: int, start: int = 0) -> np.ndarray:
+    """Row-wise pandas_ta.ema, seeded with the SMA of columns [start, start + length)."""
+    out = np.full(values.shape, np.nan)
+    seed_col = start + length - 1
+    if values.shape[1] <= seed_col:
+        return out
+    alpha = 2.0 / (length + 1)
+    out[:, seed_col] = values[:, start:seed_col + 1].mean(axis=1)
+    for col in range(seed_col + 1, values.shape[1]):
+        out[:, col] = alpha * values[:, col] + (1.0 - alpha) * out[:, col - 1]
+    return out
+
+
+def rma_rows(values: np.ndarray, length: int, start: int = 0) -> np.ndarray:
+    """Row-wise pandas_ta.rma (adjusted ewm, alpha=1/length, min_periods=length)."""
+    out = np.full(values.shape, np.nan)
+    decay = 1.0 - 1.0 / length
+    weighted_sum = np.zeros(values.shape[0])
+    weight_total = 0.0
+    for col in range(start, values.shape[1]):
+        weighted_sum = values[:, col] + decay * weighted_sum
+        weight_total = 1.0 + decay * weight_total
+        if col - start + 1 >= length:
+            out[:, col] = weighted_sum / weight_total
+    return out
+
+
+def rsi_rows(closes: np.ndarray, length: int) -> np.ndarray:
+    change = np.full(closes.shape, np.nan)
+    change[:, 1:] = closes[:, 1:] - closes[:, :-1]
+    avg_gain = rma_rows(np.where(change > 0, change, 0.0), length, start=1)
+    avg_loss = rma_rows(np.where(change < 0, -change, 0.0), length, start=1)
+    total = avg_gain + avg_loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, 100.0 * avg_gain / total, np.nan)
+
+
+def macd_rows(closes: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Returns (macd, signal, histogram) matrices."""
+    macd = ema_rows(closes, fast) - ema_rows(closes, slow)
+    signal_line = ema_rows(macd, signal, start=slow - 1) # Signal starts at the first valid MACD value
+    return macd, signal_line, macd - signal_line
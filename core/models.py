@@ -1,20 +1,26 @@
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from datetime import datetime, timezone
+from enum import IntFlag
+from typing import List, Dict, Optional, Any, Tuple, Iterable, Iterator
 
-@dataclass
+# Hot model classes are slotted (no per-instance __dict__); with a 100k-token universe
+# the dict overhead alone is several hundred bytes per object.
+
+@dataclass(slots=True)
 class LinkInfo:
     x: Optional[str] = None
     telegram: Optional[str] = None
     website: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class LiquidityInfo:
     poolSizeUSD: Optional[float] = None
     lpBurnedPercent: Optional[float] = None
     creationTimestamp: Optional[str] = None
     lpTokenAddress: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class VolumeInfo:
     five_min_usd: Optional[float] = field(default=None, metadata={'json_name': '5minUSD'})
     one_hr_usd: Optional[float] = field(default=None, metadata={'json_name': '1hrUSD'})
@@ -22,26 +28,26 @@ class VolumeInfo:
     twenty_four_hr_usd: Optional[float] = field(default=None, metadata={'json_name': '24hrUSD'})
 
 
-@dataclass
+@dataclass(slots=True)
 class HolderInfo:
     count: Optional[int] = None
     proHoldersCount: Optional[int] = None
     top10HolderPercent: Optional[float] = None
 
-@dataclass
+@dataclass(slots=True)
 class BundleAnalysisInfo:
     totalBundledPercent: Optional[float] = None
     topBundlePercent: Optional[float] = None
     freshWalletBundles: Optional[bool] = None
 
-@dataclass
+@dataclass(slots=True)
 class XAccountRecycleCheck:
     checkedTimestamp: Optional[str] = None
     status: Optional[str] = None # "CLEAN", "SUSPICIOUS_RECENT_CHANGE", etc.
     accountAgeYears: Optional[float] = None
     previousUsernames: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class SecurityInfo:
     mintAuthorityDisabled: Optional[bool] = None
     freezeAuthorityDisabled: Optional[bool] = None
@@ -55,14 +61,14 @@ class SecurityInfo:
     xAccountRecycleCheck: Optional[XAccountRecycleCheck] = None
     websiteDomainAgeDays: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class MacdInfo:
     value: Optional[float] = None
     signal: Optional[float] = None
     histogram: Optional[float] = None
     state: Optional[str] = None # "BULLISH_DIVERGENCE", etc.
 
-@dataclass
+@dataclass(slots=True)
 class TechnicalAnalysisSnapshot:
     priceUSD: Optional[float] = None
     emaCross_9_21: Optional[str] = None # "BULLISH_CROSS_RECENT", etc.
@@ -70,16 +76,16 @@ class TechnicalAnalysisSnapshot:
     macd: Optional[MacdInfo] = None
     chartPattern: Optional[str] = None # "EARLY_UPTREND", etc.
 
-@dataclass
+@dataclass(slots=True)
 class WhaleActivitySnapshot:
     netBuyVolumeLast15MinUSD: Optional[float] = None
     distinctBuyingWhales: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class DexScreenerSpecific:
     boostScore: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class TokenSnapshot:
     tokenId: str
     timestampCollected: str
@@ -104,11 +110,12 @@ class TokenSnapshot:
     metaTags: List[str] = field(default_factory=list)
     solanaPriceUSD_atCollection: Optional[float] = None
     # These are added by the system, not directly from API typically
-    historicalCandleData: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict) # e.g. {"1m": [candle_dict, ...]}
-    transactionStream: List[Dict[str, Any]] = field(default_factory=list)
+    # Candles per timeframe: a list of candle dicts, or a CandleSeries / CandleColumns (typed columns)
+    historicalCandleData: Dict[str, Any] = field(default_factory=dict) # e.g. {"1m": [candle_dict, ...]}
+    transactionStream: Any = None # List of transaction dicts or a TransactionSeries; None until loaded
 
 
-@dataclass
+@dataclass(slots=True)
 class Candle:
     timestamp: str
     open: float
@@ -117,13 +124,161 @@ class Candle:
     close: float
     volume: float
 
-@dataclass
+def parse_timestamp(value: Any) -> int:
+    """ISO-8601 string (as in the mock JSON) or number -> epoch seconds."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+
+
+def _iso_timestamp(epoch_seconds: int) -> str:
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class CandleSeries:
+    """OHLCV bars for one token/timeframe in typed arrays (8 bytes per value, no per-bar objects).
+
+    Exposes the same column attributes as utils.candle_store.CandleColumns, so
+    TechnicalAnalyzer consumes it directly. as_numpy() gives zero-copy views;
+    drop them before appending, since an array can't grow while a view exists.
+    """
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume")
+    COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self):
+        self.timestamp = array("q") # Epoch seconds
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+        self.volume = array("d")
+
+    @classmethod
+    def from_candles(cls, candles: Iterable[Dict[str, Any]]) -> "CandleSeries":
+        series = cls()
+        for candle in candles:
+            try:
+                series.append(parse_timestamp(candle["timestamp"]), float(candle["open"]), float(candle["high"]),
+                              float(candle["low"]), float(candle["close"]), float(candle["volume"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return series
+
+    def append(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float):
+        self.timestamp.append(timestamp)
+        self.open.append(open_)
+        self.high.append(high)
+        self.low.append(low)
+        self.close.append(close)
+        self.volume.append(volume)
+
+    def replace_last(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float):
+        """Overwrites the last bar in place (a bar that is still forming)."""
+        self.timestamp[-1] = timestamp
+        self.open[-1] = open_
+        self.high[-1] = high
+        self.low[-1] = low
+        self.close[-1] = close
+        self.volume[-1] = volume
+
+    def drop_first(self, count: int):
+        """Removes the oldest `count` bars (bounds memory for long-running series)."""
+        for name in self.COLUMNS:
+            del getattr(self, name)[:count]
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def bars(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.itemsize * len(col) for col in (self.timestamp, self.open, self.high,
+                                                        self.low, self.close, self.volume))
+
+    def __getitem__(self, i: int) -> "Candle":
+        return Candle(_iso_timestamp(self.timestamp[i]), self.open[i], self.high[i],
+                      self.low[i], self.close[i], self.volume[i])
+
+    def __iter__(self) -> Iterator["Candle"]:
+        for i in range(len(self.timestamp)):
+            yield self[i]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [{"timestamp": c.timestamp, "open": c.open, "high": c.high, "low": c.low,
+                 "close": c.close, "volume": c.volume} for c in self]
+
+    def as_numpy(self):
+        import numpy as np # Only needed by callers that want array views
+        from utils.candle_store import CandleColumns
+        return CandleColumns(*[np.frombuffer(getattr(self, name), dtype=np.int64 if name == "timestamp" else np.float64)
+                               for name in self.COLUMNS])
+
+
+class TransactionSeries:
+    """A token's transaction stream in typed arrays.
+
+    Wallet addresses are interned: wallet[i] indexes into `wallets`, so a wallet
+    that trades a hundred times is stored once. side is +1 for BUY, -1 for SELL.
+    """
+    __slots__ = ("timestamp", "side", "wallet", "amount_token", "amount_usd", "price_usd",
+                 "wallets", "_wallet_ids")
+
+    def __init__(self):
+        self.timestamp = array("q") # Epoch seconds
+        self.side = array("b")
+        self.wallet = array("l")
+        self.amount_token = array("d")
+        self.amount_usd = array("d")
+        self.price_usd = array("d")
+        self.wallets: List[str] = []
+        self._wallet_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Dict[str, Any]]) -> "TransactionSeries":
+        series = cls()
+        for txn in transactions:
+            try:
+                series.append(parse_timestamp(txn["timestamp"]), txn.get("type", "BUY"), txn.get("walletAddress", ""),
+                              float(txn.get("amountToken") or 0.0), float(txn.get("amountUSD") or 0.0),
+                              float(txn.get("pricePerTokenUSD") or 0.0))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return series
+
+    def append(self, timestamp: int, side: str, wallet: str, amount_token: float, amount_usd: float, price_usd: float):
+        wallet_id = self._wallet_ids.get(wallet)
+        if wallet_id is None:
+            wallet_id = self._wallet_ids[wallet] = len(self.wallets)
+            self.wallets.append(wallet)
+        self.timestamp.append(timestamp)
+        self.side.append(1 if side == "BUY" else -1)
+        self.wallet.append(wallet_id)
+        self.amount_token.append(amount_token)
+        self.amount_usd.append(amount_usd)
+        self.price_usd.append(price_usd)
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.itemsize * len(col) for col in (self.timestamp, self.side, self.wallet, self.amount_token,
+                                                        self.amount_usd, self.price_usd))
+
+    def wallet_at(self, i: int) -> str:
+        return self.wallets[self.wallet[i]]
+
+
+@dataclass(slots=True)
 class SecurityCheckResult:
     token_id: str
     overall_status: str # "SAFE", "MODERATE_RISK", "HIGH_RISK", "SCAM_LIKELY"
     details: List[Dict[str, str]] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class TechnicalAnalysisResult:
     token_id: str
     ema_9_value: Optional[float] = None
@@ -137,13 +292,25 @@ class TechnicalAnalysisResult:
     macd_state: Optional[str] = None # "BULLISH_MOMENTUM", "BEARISH_MOMENTUM"
     identified_pattern: Optional[str] = None # "HOCKEY_STICK", "FLOOR_FORMATION"
 
-@dataclass
+@dataclass(slots=True)
 class WhaleSummaryResult:
     token_id: str
     net_buy_volume_usd_15m: float = 0.0
     distinct_buying_whales_15m: int = 0
 
-@dataclass
+class BuyReason(IntFlag):
+    """Why a buy was confirmed, one bit per reason; DecisionEngine weights them into confidence_score."""
+    NONE = 0
+    EMA_BULLISH_CROSS_RECENT = 1 << 0
+    RSI_NEUTRAL_RISING = 1 << 1
+    MACD_BULLISH = 1 << 2 # Histogram crossed or is positive
+    STRONG_VOLUME = 1 << 3 # 5min volume above the strategy's buy-confirm threshold
+    WHALE_BUYING = 1 << 4 # Tracked whales net buyers over 15 min
+    HOCKEY_STICK = 1 << 5
+    FLOOR_FORMATION = 1 << 6
+    BLOW_OFF_TOP = 1 << 7 # Counts against the buy
+
+@dataclass(slots=True)
 class BuySignal:
     token_id: str
     contract_address: str
@@ -152,8 +319,9 @@ class BuySignal:
     suggested_entry_price_range: Tuple[float, float]
     confidence_score: float # 0.0 to 1.0
     reasoning: List[str] = field(default_factory=list)
+    reason_flags: int = 0 # BuyReason bits
 
-@dataclass
+@dataclass(slots=True)
 class SellSignal:
     token_id: str
     contract_address: str
@@ -161,5 +329,5 @@ class SellSignal:
     strategy: str # or "TA_EXIT" / "STOP_LOSS"
     suggested_exit_price: float
     reasoning: List[str] = field(default_factory=list)
-    sell_type: str # "TAKE_PROFIT_FULL", "TAKE_PROFIT_PARTIAL", "STOP_LOSS"
+    sell_type: str = "TAKE_PROFIT_FULL" # "TAKE_PROFIT_FULL", "TAKE_PROFIT_PARTIAL", "STOP_LOSS"
     partial_sell_percent: Optional[float] = None
\ No newline at end of file
@@ -0,0 +1,193 @@
+# core/parallel_ta.py
+# Process-pool TA across many tokens. TechnicalAnalyzer's batch kernels run under
+# the GIL, so one process uses one core; here the token rows are sharded across
+# worker processes instead.
+#
+# Candle data is never pickled per task: either the close matrix is written once
+# into a multiprocessing.shared_memory block that every worker maps, or (for a
+# CandleStore) workers memory-map the column files themselves and only token ids
+# travel. Each task returns compact tuples, which become TechnicalAnalysisResults
+# in the parent.
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models import TokenSnapshot, TechnicalAnalysisResult
+from core.technical_analyzer import TechnicalAnalyzer
+from utils.candle_store import CandleStore
+
+# Order of the values in a result tuple (after the three state strings)
+VALUE_FIELDS = ("ema_9_value", "ema_21_value", "rsi_14_value", "macd_value", "macd_signal_value", "macd_histogram_value")
+STATE_FIELDS = ("ema_cross_state", "rsi_state", "macd_state")
+
+ResultTuple = Tuple[Optional[str], Optional[str], Optional[str], Optional[float], Optional[float],
+                    Optional[float], Optional[float], Optional[float], Optional[float]]
+
+_worker_analyzer: Optional[TechnicalAnalyzer] = None # One per worker process, built by the initializer
+
+
+def _init_worker(config: Dict):
+    global _worker_analyzer
+    _worker_analyzer = TechnicalAnalyzer(config)
+
+
+def _rows_to_tuples(fields: Dict[str, np.ndarray], valid: np.ndarray) -> List[Optional[ResultTuple]]:
+    values = np.stack([fields[name] for name in VALUE_FIELDS], axis=1).tolist()
+    states = list(zip(*(fields[name] for name in STATE_FIELDS)))
+    return [
+        states[row] + tuple(None if v != v else v for v in values[row]) if valid[row] else None
+        for row in range(len(values))
+    ]
+
+
+def _analyze_rows(analyzer: TechnicalAnalyzer, closes: np.ndarray, lengths: np.ndarray) -> List[Optional[ResultTuple]]:
+    valid = lengths >= analyzer.min_bars
+    if not valid.any():
+        return [None] * len(lengths)
+    width = int(lengths.max())
+    fields = analyzer.analyze_close_matrix(closes[:, :width], lengths)
+    return _rows_to_tuples(fields, valid)
+
+
+def _shm_task(shm_name: str, shape: Tuple[int, int], start: int, stop: int,
+              lengths: np.ndarray) -> List[Optional[ResultTuple]]:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    try:
+        return _analyze_rows(_worker_analyzer, matrix[start:stop], lengths)
+    finally:
+        del matrix # Release the buffer export before closing the mapping
+        shm.close()
+
+
+def _store_rows(analyzer: TechnicalAnalyzer, store_root: str, token_ids: Sequence[str]) -> List[Optional[ResultTuple]]:
+    store = CandleStore(store_root)
+    series = [analyzer._select_series(store.load(token_id)) for token_id in token_ids]
+    lengths = np.array([0 if pair is None else len(pair[0]) for pair in series], dtype=np.int64)
+    closes = np.full((len(series), int(lengths.max()) if len(series) else 0), np.nan, dtype=np.float64)
+    for row, pair in enumerate(series):
+        if pair is not None:
+            closes[row, :len(pair[0])] = pair[0]
+    # The store has volumes, so these tuples carry identified_pattern as a trailing element
+    patterns = analyzer.detect_patterns(series)
+    return [row if row is None else row + (pattern,)
+            for row, pattern in zip(_analyze_rows(analyzer, closes, lengths), patterns)]
+
+
+def _store_task(store_root: str, token_ids: Sequence[str]) -> List[Optional[ResultTuple]]:
+    return _store_rows(_worker_analyzer, store_root, token_ids)
+
+
+class ParallelTA:
+    def __init__(self, config: Dict):
+        self.config = config
+        self.analyzer = TechnicalAnalyzer(config) # Parent-side: row selection, pilot runs, small batches
+        self.workers = config.get("ta_workers", 0) or os.cpu_count() or 1
+        self.chunk_rows = config.get("ta_chunk_rows", 0) # 0 = auto-tune per call
+        self.target_task_seconds = config.get("ta_target_task_seconds", 0.05)
+        self.chunk_bytes_budget = config.get("ta_chunk_bytes_budget", 64 * 1024 * 1024)
+        self.min_parallel_rows = config.get("ta_min_parallel_rows", 256) # Below this, the pool costs more than it saves
+        self.last_chunk_rows = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.config,))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self) -> "ParallelTA":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tune_chunk_rows(self, closes: np.ndarray, lengths: np.ndarray) -> int:
+        """Rows per task: about target_task_seconds of work, measured on a small pilot slice,
+        capped so every worker gets several tasks and a chunk's intermediates fit the byte budget."""
+        rows, width = closes.shape
+        if self.chunk_rows:
+            return max(1, min(self.chunk_rows, rows))
+        pilot = min(rows, 64)
+        started = time.perf_counter()
+        _analyze_rows(self.analyzer, closes[:pilot], lengths[:pilot])
+        seconds_per_row = max((time.perf_counter() - started) / pilot, 1e-7)
+        by_time = int(self.target_task_seconds / seconds_per_row)
+        # analyze_close_matrix keeps ~12 float64 matrices of the chunk's shape alive
+        by_memory = self.chunk_bytes_budget // max(1, width * 8 * 12)
+        by_balance = math.ceil(rows / (self.workers * 4))
+        return max(1, min(by_time, by_memory, by_balance))
+
+    def _results(self, token_ids: Sequence[str], tuples: Sequence[Optional[ResultTuple]],
+                 patterns: Optional[Sequence[Optional[str]]] = None) -> List[TechnicalAnalysisResult]:
+        results = []
+        for i, (token_id, row) in enumerate(zip(token_ids, tuples)):
+            if row is None:
+                results.append(TechnicalAnalysisResult(token_id=token_id))
+                continue
+            values = dict(zip(STATE_FIELDS + VALUE_FIELDS, row))
+            if len(row) > len(STATE_FIELDS + VALUE_FIELDS):
+                pattern = row[-1]
+            else:
+                pattern = patterns[i] if patterns is not None else None
+            results.append(TechnicalAnalysisResult(token_id=token_id, identified_pattern=pattern, **values))
+        return results
+
+    def analyze_matrix(self, token_ids: Sequence[str], closes: np.ndarray, lengths: np.ndarray,
+                       patterns: Optional[Sequence[Optional[str]]] = None) -> List[TechnicalAnalysisResult]:
+        """TA over a left-aligned, NaN-padded close matrix (one row per token), sharded across the pool.
+        Closes alone carry no volume, so identified_pattern comes from `patterns` if given."""
+        rows = closes.shape[0]
+        if rows < self.min_parallel_rows or self.workers <= 1:
+            return self._results(token_ids, _analyze_rows(self.analyzer, closes, lengths), patterns)
+
+        chunk = self.last_chunk_rows = self.tune_chunk_rows(closes, lengths)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, closes.nbytes))
+        shared = np.ndarray(closes.shape, dtype=np.float64, buffer=shm.buf)
+        try:
+            shared[:] = closes
+            pool = self._get_pool()
+            futures = [pool.submit(_shm_task, shm.name, closes.shape, start, min(start + chunk, rows),
+                                   lengths[start:start + chunk])
+                       for start in range(0, rows, chunk)]
+            tuples = [row for future in futures for row in future.result()]
+        finally:
+            del shared
+            shm.close()
+            shm.unlink()
+        return self._results(token_ids, tuples, patterns)
+
+    def analyze_batch(self, tokens: List[TokenSnapshot]) -> List[TechnicalAnalysisResult]:
+        """Same results as TechnicalAnalyzer.analyze_batch, computed across worker processes."""
+        series = [self.analyzer._batch_series(token) for token in tokens]
+        lengths = np.array([0 if pair is None else len(pair[0]) for pair in series], dtype=np.int64)
+        closes = np.full((len(tokens), int(lengths.max()) if len(tokens) else 0), np.nan, dtype=np.float64)
+        for row, pair in enumerate(series):
+            if pair is not None:
+                closes[row, :len(pair[0])] = pair[0]
+        for token, pair in zip(tokens, series):
+            if pair is None:
+                print(f"TA: Not enough data for {token.ticker} on primary timeframes.")
+        # Patterns only look at the last `lookback` bars of each row: cheap enough for the parent
+        patterns = self.analyzer.detect_patterns(series)
+        return self.analyze_matrix([token.tokenId for token in tokens], closes, lengths, patterns)
+
+    def analyze_store(self, token_ids: Sequence[str], store: CandleStore, chunk_rows: int = 0) -> List[TechnicalAnalysisResult]:
+        """TA for tokens in a CandleStore; workers memory-map the column files, only ids are sent."""
+        token_ids = list(token_ids)
+        if len(token_ids) < self.min_parallel_rows or self.workers <= 1:
+            return self._results(token_ids, _store_rows(self.analyzer, store.root, token_ids))
+        chunk = self.last_chunk_rows = chunk_rows or self.chunk_rows or math.ceil(len(token_ids) / (self.workers * 4))
+        pool = self._get_pool()
+        futures = [pool.submit(_store_task, store.root, token_ids[start:start + chunk])
+                   for start in range(0, len(token_ids), chunk)]
+        return self._results(token_ids, [row for future in futures for row in future.result()])
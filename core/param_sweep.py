@@ -0,0 +1,511 @@
+# core/param_sweep.py
+# Threshold sweep over recorded token histories. The backtester re-runs the live
+# strategy/decision code for every bar, which is fine for one configuration but far
+# too slow to tune the thresholds in config.json. Here every bar's point-in-time
+# inputs (TA states and RSI, 5m volume, market cap, whale net flow, security) are
+# computed once per history. A chunk of C threshold combinations is then replayed
+# over all N tokens at once: each bar is a handful of (C, N) boolean masks for the
+# StrategyEngine/DecisionEngine rules plus the backtester's fill and exit rules.
+#
+# Only thresholds that act on those precomputed inputs can be swept (SWEEP_PARAMS).
+# TA periods and RSI overbought/oversold levels change the indicators themselves
+# and stay at their config values.
+#
+#   python -m core.param_sweep [--samples N] [--seed S] [--top K] [--csv out.csv] [token_id ...]
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from core.backtester import Backtester
+from core.indicators import ema_rows, rsi_rows, macd_rows
+from core.models import BuyReason, TokenSnapshot, parse_timestamp
+from core.patterns import BLOW_OFF_TOP, FLOOR_FORMATION, HOCKEY_STICK
+from core.strategy_engine import EMA_STATES, RSI_STATES, MACD_STATES, RISKY_STATUSES
+from core.technical_analyzer import TechnicalAnalyzer
+from core.whale_tracker import WhaleTracker
+from utils import data_loader
+from utils.candle_store import CandleStore
+
+# Config keys the sweep can vary, with the defaults StrategyEngine/DecisionEngine use
+SWEEP_PARAMS = {
+    "recon_min_market_cap": 70000,
+    "recon_max_market_cap": 11000000,
+    "recon_min_5min_volume": 10000,
+    "asia_min_volume": 50000,
+    "asia_min_volume_buy_confirm": 60000,
+    "post_rug_min_volume": 15000,
+    "post_rug_min_volume_buy_confirm": 20000,
+    "post_rug_take_profit_percent": 0.50,
+    "momentum_min_volume": 20000,
+    "momentum_min_whale_net_buy": 500.0,
+    "momentum_min_volume_buy_confirm": 25000,
+    "momentum_min_whale_buy_confirm": 750.0,
+    "dec_min_confidence_buy": 0.6,
+    "stop_loss_percent": 0.25,
+    "partial_sell_amount_percent": 0.25,
+    "rsi_sell_threshold": 75,
+}
+
+# Integer codes for the TA states and patterns are StrategyTable's (0 = no result yet):
+# EMA_STATES, RSI_STATES, MACD_STATES and core.patterns.PATTERNS, index + 1
+
+# Strategy codes, in the order the sweep picks the first applicable one
+ASIA, POST_RUG, MOMENTUM = 1, 2, 3
+STRATEGY_CODES = {"AsiaTime": ASIA, "PostRug": POST_RUG, "MomentumRider": MOMENTUM}
+
+
+def _codes(states: np.ndarray, names: Sequence[str]) -> np.ndarray:
+    out = np.zeros(states.shape, dtype=np.int8)
+    for code, name in enumerate(names, 1):
+        out[states == name] = code
+    return out
+
+
+def _max_drawdowns(exits: List[tuple], combos: int) -> np.ndarray:
+    """Max drawdown of each combination's realized PnL in exit-time order, as backtester.summarize computes it."""
+    out = np.zeros(combos)
+    if not exits:
+        return out
+    combo, exit_time, rank, pnl = (np.concatenate(parts) for parts in zip(*exits))
+    order = np.lexsort((rank, exit_time, combo))
+    combo, pnl = combo[order], pnl[order]
+    bounds = np.searchsorted(combo, np.arange(combos + 1))
+    for c in np.flatnonzero(np.diff(bounds)).tolist():
+        equity = np.cumsum(pnl[bounds[c]:bounds[c + 1]])
+        peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+        out[c] = (peak - equity).max()
+    return out
+
+
+class SweepFeatures(NamedTuple):
+    """Per-bar inputs, bar-major (T, N) so each bar is one contiguous row; padded bars are invalid."""
+    token_ids: List[str]
+    valid: np.ndarray
+    timestamp: np.ndarray # Bar open times (epoch seconds), 0 on padded bars
+    last_bar: np.ndarray # (N,) index of each token's final bar, -1 if it has none
+    open: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume_5m: np.ndarray
+    market_cap: np.ndarray
+    whale_net: np.ndarray
+    rsi: np.ndarray
+    ema_state: np.ndarray
+    rsi_state: np.ndarray
+    macd_state: np.ndarray
+    pattern: np.ndarray
+    strategy_ok: np.ndarray # (N,) security allows StrategyEngine to suggest anything
+    decision_ok: np.ndarray # (N,) security allows DecisionEngine to buy
+
+    @property
+    def bars(self) -> int:
+        return self.close.shape[0]
+
+
+class ParameterSweep:
+    def __init__(self, config: Dict, tracked_whales: Any,
+                 historical_path: str = "mock_data/historical_data",
+                 transaction_path: str = "mock_data/transaction_data",
+                 candle_store: Optional[CandleStore] = None):
+        self.config = config
+        # Data loading, security and fill/fee settings are the backtester's, so results line up with it
+        self.backtester = Backtester(config, tracked_whales, historical_path, transaction_path, candle_store)
+        self.ta = TechnicalAnalyzer(config)
+        self.strategies = self.backtester.strategy.table # Strategy masks, with swept thresholds per combination
+        self.chunk_combos = config.get("sweep_chunk_combos", 512) # Combinations replayed together
+        self.rank_by = config.get("sweep_rank_by", "pnl_usd")
+        self.features: Optional[SweepFeatures] = None
+
+    # --- Precompute (once per set of histories) ---
+
+    def _whale_net(self, token_id: str, timestamps: np.ndarray, bar_seconds: int) -> np.ndarray:
+        transactions = data_loader.load_transaction_stream(token_id, self.backtester.transaction_path)
+        whales = WhaleTracker(self.config, self.backtester.tracked_whales)
+        txn_times = [parse_timestamp(txn["timestamp"]) for txn in transactions]
+        out = np.zeros(len(timestamps))
+        next_txn = 0
+        for i, bar_time in enumerate(timestamps.tolist()):
+            bar_end = bar_time + bar_seconds
+            while next_txn < len(transactions) and txn_times[next_txn] < bar_end:
+                whales.ingest(token_id, transactions[next_txn])
+                next_txn += 1
+            out[i] = whales.summary(token_id, bar_end).net_buy_volume_usd_15m
+        return out
+
+    def prepare(self, snapshots: Sequence[TokenSnapshot]) -> SweepFeatures:
+        histories = []
+        for snapshot in snapshots:
+            bars, _, bar_seconds = self.backtester._load_bars(snapshot.tokenId)
+            if bars is not None:
+                histories.append((snapshot, bars, bar_seconds))
+        n = len(histories)
+        width = max((bars.bars for _, bars, _ in histories), default=0)
+        matrices = {name: np.full((n, width), np.nan) for name in
+                    ("open", "low", "close", "volume", "volume_5m", "market_cap", "whale_net")}
+        timestamps = np.zeros((n, width), dtype=np.int64)
+        lengths = np.zeros(n, dtype=np.int64)
+        strategy_ok = np.zeros(n, dtype=bool)
+        decision_ok = np.zeros(n, dtype=bool)
+
+        for row, (snapshot, bars, bar_seconds) in enumerate(histories):
+            length = lengths[row] = bars.bars
+            closes = np.asarray(bars.close, dtype=np.float64)
+            timestamps[row, :length] = bars.timestamp
+            matrices["open"][row, :length] = bars.open
+            matrices["low"][row, :length] = bars.low
+            matrices["close"][row, :length] = closes
+            matrices["volume"][row, :length] = bars.volume
+            volume_sum = np.cumsum(np.asarray(bars.volume, dtype=np.float64))
+            window = max(1, 300 // bar_seconds)
+            rolling = volume_sum.copy()
+            rolling[window:] -= volume_sum[:-window]
+            matrices["volume_5m"][row, :length] = rolling
+            snapshot_price = snapshot.technicalAnalysis.priceUSD if snapshot.technicalAnalysis else None
+            if snapshot_price and snapshot.marketCap:
+                matrices["market_cap"][row, :length] = snapshot.marketCap * closes / snapshot_price
+            elif snapshot.marketCap is not None:
+                matrices["market_cap"][row, :length] = snapshot.marketCap
+            matrices["whale_net"][row, :length] = self._whale_net(snapshot.tokenId, bars.timestamp, bar_seconds)
+            status = self.backtester.security.analyze_status(snapshot)
+            strategy_ok[row] = status not in RISKY_STATUSES
+            decision_ok[row] = status in ("SAFE", "MODERATE_RISK")
+
+        # Every bar's TA state at once: the same kernels as analyze_close_matrix, kept for all columns
+        ta = self.ta
+        closes = matrices["close"]
+        with np.errstate(invalid="ignore"):
+            ema_short = ema_rows(closes, ta.ema_short_period)
+            ema_long = ema_rows(closes, ta.ema_long_period)
+            rsi = rsi_rows(closes, ta.rsi_period)
+            _, _, macd_hist = macd_rows(closes, ta.macd_fast, ta.macd_slow, ta.macd_signal)
+            shift = lambda m: np.concatenate([np.full((n, 1), np.nan), m[:, :-1]], axis=1)
+            ema_state = _codes(ta._classify_ema_cross_rows(ema_short, ema_long, shift(ema_short), shift(ema_long)), EMA_STATES)
+            rsi_state = _codes(ta._classify_rsi_rows(rsi, shift(rsi)), RSI_STATES)
+            macd_state = _codes(ta._classify_macd_rows(macd_hist, shift(macd_hist)), MACD_STATES)
+        columns = np.arange(width)[None, :]
+        valid = columns < lengths[:, None]
+        warm = columns >= ta.min_bars - 1 # Streaming TA reports nothing before min_bars closes
+        for states in (ema_state, rsi_state, macd_state):
+            states[~(valid & warm)] = 0
+        rsi = np.where(valid & warm, rsi, np.nan)
+        # Patterns at every bar from the same rolling windows TechnicalAnalyzer streams over
+        if ta.patterns is not None:
+            pattern = ta.patterns.detect_rows(closes, matrices["volume"])
+            pattern[~(valid & warm)] = 0
+        else:
+            pattern = np.zeros((n, width), dtype=np.int8)
+
+        bar_major = lambda m: np.ascontiguousarray(m.T)
+        self.features = SweepFeatures(
+            token_ids=[snapshot.tokenId for snapshot, _, _ in histories],
+            valid=bar_major(valid), timestamp=bar_major(timestamps), last_bar=lengths - 1,
+            open=bar_major(matrices["open"]), low=bar_major(matrices["low"]), close=bar_major(closes),
+            volume_5m=bar_major(matrices["volume_5m"]), market_cap=bar_major(matrices["market_cap"]),
+            whale_net=bar_major(matrices["whale_net"]), rsi=bar_major(rsi),
+            ema_state=bar_major(ema_state), rsi_state=bar_major(rsi_state), macd_state=bar_major(macd_state),
+            pattern=bar_major(pattern),
+            strategy_ok=strategy_ok, decision_ok=decision_ok)
+        return self.features
+
+    # --- Combinations ---
+
+    def base_params(self) -> Dict[str, float]:
+        return {key: float(self.config.get(key, default)) for key, default in SWEEP_PARAMS.items()}
+
+    def grid(self, values: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+        """Cartesian product of the given values; unswept parameters keep their config value."""
+        self._check_keys(values)
+        keys = list(values)
+        combos = list(itertools.product(*(values[key] for key in keys)))
+        params = {key: np.full(len(combos), value) for key, value in self.base_params().items()}
+        for i, key in enumerate(keys):
+            params[key] = np.array([combo[i] for combo in combos], dtype=np.float64)
+        return params
+
+    def sample(self, ranges: Dict[str, Sequence[float]], samples: int, seed: int = 0) -> Dict[str, np.ndarray]:
+        """Uniform random combinations within each parameter's [low, high]."""
+        self._check_keys(ranges)
+        rng = np.random.default_rng(seed)
+        params = {key: np.full(samples, value) for key, value in self.base_params().items()}
+        for key, bounds in ranges.items():
+            params[key] = rng.uniform(min(bounds), max(bounds), samples)
+        return params
+
+    @staticmethod
+    def _check_keys(spec: Dict[str, Any]):
+        unknown = [key for key in spec if key not in SWEEP_PARAMS]
+        if unknown:
+            raise ValueError(f"Not sweepable: {', '.join(unknown)} (see SWEEP_PARAMS)")
+
+    # --- Evaluation ---
+
+    def _simulate(self, params: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Replays all tokens for a chunk of combinations; mirrors Backtester.run_token bar for bar.
+
+        Position state lives in (C, N) arrays, but each bar only touches the cells that hold
+        a position or an order (found with nonzero) plus the tokens that could signal a buy.
+        """
+        f = self.features
+        bt = self.backtester
+        combos, tokens = len(params["stop_loss_percent"]), len(f.token_ids)
+        usd, fee, slippage, cooldown = bt.position_usd, bt.fee_rate, bt.slippage, bt.partial_cooldown_bars
+        stop_percent = params["stop_loss_percent"]
+        take_profit = params["post_rug_take_profit_percent"]
+        rsi_sell = params["rsi_sell_threshold"]
+        partial_percent = params["partial_sell_amount_percent"]
+
+        shape = (combos, tokens)
+        in_position = np.zeros(shape, dtype=bool)
+        entry_price = np.ones(shape)
+        quantity = np.zeros(shape)
+        proceeds = np.zeros(shape)
+        strategy = np.zeros(shape, dtype=np.int8)
+        entry_bar = np.zeros(shape, dtype=np.int64)
+        last_partial = np.full(shape, -10**9, dtype=np.int64)
+        stopped_bar = np.full(shape, -1, dtype=np.int64) # Bar of the last intrabar stop (no re-entry that bar)
+        pending_buy = np.zeros(shape, dtype=np.int8) # Strategy code of a buy waiting for the next open
+        pending_sell = np.zeros(shape, dtype=np.int8) # 1 = partial, 2 = full
+
+        token_rank = np.argsort(np.argsort(f.token_ids, kind="stable"), kind="stable")
+        by_strategy = len(STRATEGY_CODES) + 1
+        pnl = np.zeros((combos, by_strategy))
+        trades = np.zeros((combos, by_strategy), dtype=np.int64)
+        wins = np.zeros(combos, dtype=np.int64)
+        bars_held = np.zeros(combos, dtype=np.int64)
+        exits = [] # (combo, exit time, token rank, pnl) per closed trade, for the drawdown curve
+
+        def close_trades(rows: np.ndarray, cols: np.ndarray, bar: int):
+            trade_pnl = proceeds[rows, cols] - usd
+            codes = strategy[rows, cols]
+            np.add.at(pnl, (rows, codes), trade_pnl)
+            np.add.at(trades, (rows, codes), 1)
+            np.add.at(wins, rows, trade_pnl > 0)
+            np.add.at(bars_held, rows, bar - entry_bar[rows, cols])
+            exits.append((rows, f.timestamp[bar][cols], token_rank[cols], trade_pnl))
+            in_position[rows, cols] = False
+
+        ending_tokens = {}
+        for col, bar in enumerate(f.last_bar.tolist()):
+            ending_tokens.setdefault(bar, []).append(col)
+
+        for t in range(f.bars):
+            bar_open, low, close = f.open[t], f.low[t], f.close[t]
+
+            # Fills of orders placed at the previous close
+            rows, cols = np.nonzero(pending_sell)
+            if rows.size:
+                kinds = pending_sell[rows, cols]
+                sold = quantity[rows, cols] * np.where(kinds == 1, partial_percent[rows], 1.0)
+                proceeds[rows, cols] += sold * (bar_open[cols] * (1 - slippage) * (1 - fee))
+                quantity[rows, cols] -= sold
+                pending_sell[rows, cols] = 0
+                full = kinds == 2
+                close_trades(rows[full], cols[full], t)
+            rows, cols = np.nonzero(pending_buy)
+            if rows.size:
+                fill = bar_open[cols] * (1 + slippage)
+                entry_price[rows, cols] = fill
+                quantity[rows, cols] = usd * (1 - fee) / fill
+                proceeds[rows, cols] = 0.0
+                strategy[rows, cols] = pending_buy[rows, cols]
+                entry_bar[rows, cols] = t
+                in_position[rows, cols] = True
+                pending_buy[rows, cols] = 0
+
+            rows, cols = np.nonzero(in_position)
+            if rows.size:
+                # Intrabar stop loss, then the TA / take-profit exits at the close
+                entry = entry_price[rows, cols]
+                stop_price = entry * (1 - stop_percent[rows])
+                hit = low[cols] <= stop_price
+                if hit.any():
+                    r, c = rows[hit], cols[hit]
+                    proceeds[r, c] += quantity[r, c] * np.minimum(bar_open[c], stop_price[hit]) * (1 - slippage) * (1 - fee)
+                    quantity[r, c] = 0.0
+                    stopped_bar[r, c] = t
+                    close_trades(r, c, t)
+                    rows, cols, entry = rows[~hit], cols[~hit], entry[~hit]
+                ema, macd, rsi_state = f.ema_state[t][cols], f.macd_state[t][cols], f.rsi_state[t][cols]
+                full = (((strategy[rows, cols] == POST_RUG) & (close[cols] / entry >= 1 + take_profit[rows]))
+                        | (ema == 2) | (macd == 2)) # BEARISH_CROSS_RECENT / BEARISH_CROSS_HIST
+                overbought = (rsi_state == 1) & (np.nan_to_num(f.rsi[t][cols], nan=0.0) > rsi_sell[rows])
+                partial = ~full & overbought & (t - last_partial[rows, cols] >= cooldown)
+                pending_sell[rows[full], cols[full]] = 2
+                pending_sell[rows[partial], cols[partial]] = 1
+                last_partial[rows[partial], cols[partial]] = t
+
+            ending = ending_tokens.get(t)
+            candidates, buys = self._buy_signals(t, params, ending)
+            if candidates.size:
+                flat = ~in_position[:, candidates] & (stopped_bar[:, candidates] != t)
+                pending_buy[:, candidates] = np.where(flat, buys, 0)
+
+            if ending: # Mark to market at the last close
+                rows, cols = np.nonzero(in_position[:, ending])
+                if rows.size:
+                    cols = np.asarray(ending)[cols]
+                    proceeds[rows, cols] += quantity[rows, cols] * close[cols] * (1 - slippage) * (1 - fee)
+                    quantity[rows, cols] = 0.0
+                    pending_sell[rows, cols] = 0
+                    close_trades(rows, cols, t)
+
+        total_trades = trades.sum(axis=1)
+        total_pnl = pnl.sum(axis=1)
+        held = np.maximum(total_trades, 1)
+        result = {
+            "trades": total_trades,
+            "hit_rate": np.where(total_trades > 0, wins / held, 0.0),
+            "pnl_usd": total_pnl,
+            "return_pct": np.where(total_trades > 0, 100.0 * total_pnl / (held * usd), 0.0),
+            "max_drawdown_usd": _max_drawdowns(exits, combos),
+            "avg_bars_held": np.where(total_trades > 0, bars_held / held, 0.0),
+        }
+        for name, code in STRATEGY_CODES.items():
+            result[f"{name}_trades"] = trades[:, code]
+            result[f"{name}_pnl_usd"] = pnl[:, code]
+        return result
+
+    def _buy_signals(self, t: int, params: Dict[str, np.ndarray], ending: Optional[List[int]]):
+        """Tokens that could get a buy signal at bar t's close, and the (C, k) strategy code each
+        combination's signal would have (0 = none) for those tokens."""
+        f = self.features
+        close, volume, market_cap = f.close[t], f.volume_5m[t], f.market_cap[t]
+        ema, rsi_state, macd, pattern, rsi = f.ema_state[t], f.rsi_state[t], f.macd_state[t], f.pattern[t], f.rsi[t]
+        with np.errstate(invalid="ignore"):
+            # Threshold-free conditions first: most bars of most tokens drop out here
+            rsi_or_100 = np.where(np.isnan(rsi), 100.0, rsi) # (rsi_14_value or 100)
+            rsi_or_0 = np.where(np.isnan(rsi), 0.0, rsi)
+            bullish = (((ema == 1) | (ema == 3)) & (rsi_state != 1) & ((macd == 1) | (macd == 3)))
+            eligible = (f.valid[t] & f.strategy_ok & f.decision_ok & (close > 0)
+                        & (market_cap != 0) & ~np.isnan(market_cap) & (volume != 0)
+                        & ((pattern == HOCKEY_STICK) | (ema == 3) | (pattern == FLOOR_FORMATION) | (bullish & (rsi_or_100 < 68))))
+            if ending:
+                eligible[ending] = False # A signal on the last bar would never fill
+            candidates = np.flatnonzero(eligible)
+            if not candidates.size:
+                return candidates, None
+
+            p = {key: values[:, None] for key, values in params.items()} # (C, 1) against (k,)
+            volume, market_cap, whale = volume[candidates], market_cap[candidates], f.whale_net[t][candidates]
+            ema, rsi_state, macd, pattern = ema[candidates], rsi_state[candidates], macd[candidates], pattern[candidates]
+            rsi_or_100, rsi_or_0 = rsi_or_100[candidates], rsi_or_0[candidates]
+            bullish = bullish[candidates]
+            hockey_stick, floor = pattern == HOCKEY_STICK, pattern == FLOOR_FORMATION
+
+            recon = ((market_cap >= p["recon_min_market_cap"]) & (market_cap <= p["recon_max_market_cap"])
+                     & (volume >= p["recon_min_5min_volume"]))
+            # StrategyEngine's table, evaluated for every combination at once; the first applicable one is used
+            masks = self.strategies.masks(
+                {"identified_pattern": pattern, "ema_cross_state": ema, "rsi_state": rsi_state,
+                 "macd_state": macd, "rsi_14_value": rsi[candidates], "volume_5m_usd": volume,
+                 "whale_net_buy_15m": whale}, p)
+            shape = (len(next(iter(params.values()))), candidates.size)
+            choice = np.select([np.broadcast_to(masks[name], shape) for name in self.strategies.names],
+                               [STRATEGY_CODES.get(name, 0) for name in self.strategies.names], default=0)
+
+            confirm = np.select(
+                [choice == ASIA, choice == POST_RUG, choice == MOMENTUM],
+                [hockey_stick | ((ema == 3) & (volume > p["asia_min_volume_buy_confirm"])),
+                 floor & (rsi_state == 3) & (rsi_or_0 < 50) & (volume > p["post_rug_min_volume_buy_confirm"]),
+                 bullish & (rsi_or_100 < 65) & (volume > p["momentum_min_volume_buy_confirm"])
+                 & (whale > p["momentum_min_whale_buy_confirm"])],
+                default=False)
+            # DecisionEngine._confirm's BuyReason bits (only read where confirm holds), scored by score_batch
+            strong_volume = np.select(
+                [choice == ASIA, choice == POST_RUG, choice == MOMENTUM],
+                [volume > p["asia_min_volume_buy_confirm"], volume > p["post_rug_min_volume_buy_confirm"],
+                 volume > p["momentum_min_volume_buy_confirm"]],
+                default=False)
+            whale_buying = ((whale > self.backtester.decision.whale_buying_min_usd)
+                            | ((choice == MOMENTUM) & (whale > p["momentum_min_whale_buy_confirm"])))
+            reasons = [
+                (BuyReason.EMA_BULLISH_CROSS_RECENT, ema == 1),
+                (BuyReason.RSI_NEUTRAL_RISING, rsi_state == 3),
+                (BuyReason.MACD_BULLISH, (macd == 1) | (macd == 3)),
+                (BuyReason.STRONG_VOLUME, strong_volume),
+                (BuyReason.WHALE_BUYING, whale_buying),
+                (BuyReason.HOCKEY_STICK, (choice == ASIA) & hockey_stick),
+                (BuyReason.FLOOR_FORMATION, (choice == POST_RUG) & floor),
+                (BuyReason.BLOW_OFF_TOP, pattern == BLOW_OFF_TOP),
+            ]
+            flags = np.zeros(shape, dtype=np.int64)
+            for bit, present in reasons:
+                flags |= np.where(present, int(bit), 0)
+            confidence = self.backtester.decision.score_batch(flags)
+            buy = recon & confirm & (confidence >= p["dec_min_confidence_buy"])
+        return candidates, np.where(buy, choice, 0).astype(np.int8)
+
+    def evaluate(self, params: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Metrics per combination (one array per metric), evaluated chunk_combos at a time."""
+        if self.features is None:
+            raise RuntimeError("Call prepare() with the token histories first.")
+        total = len(next(iter(params.values())))
+        chunks = []
+        for start in range(0, total, self.chunk_combos):
+            chunks.append(self._simulate({key: values[start:start + self.chunk_combos] for key, values in params.items()}))
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]} if chunks else {}
+
+    def rank(self, params: Dict[str, np.ndarray], metrics: Dict[str, np.ndarray],
+             swept: Optional[Sequence[str]] = None) -> List[Dict[str, float]]:
+        """Rows of swept parameters + metrics, best rank_by first (ties: smaller drawdown)."""
+        swept = list(swept or params)
+        order = np.lexsort((metrics["max_drawdown_usd"], -metrics[self.rank_by]))
+        rows = []
+        for i in order.tolist():
+            row = {key: float(params[key][i]) for key in swept}
+            row.update({name: values[i].item() for name, values in metrics.items()})
+            rows.append(row)
+        return rows
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"--samples": 0, "--seed": 0, "--top": 20, "--csv": None}
+    for flag in list(options):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1] if flag == "--csv" else int(args[i + 1])
+            del args[i:i + 2]
+
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    from main_controller import load_tracked_whales
+    tracked_whales = load_tracked_whales(config.get("tracked_whale_wallets_file", ""), config.get("tracked_whale_index_file"))
+    store_path = config.get("candle_store_path")
+    store = CandleStore(store_path) if store_path and os.path.isdir(store_path) else None
+    snapshots = data_loader.load_token_snapshots(config.get("backtest_snapshots_file", "mock_data/token_snapshots.json"))
+    if args:
+        snapshots = [s for s in snapshots if s.tokenId in set(args)]
+
+    sweep = ParameterSweep(config, tracked_whales, candle_store=store)
+    started = time.perf_counter()
+    features = sweep.prepare(snapshots)
+    prepared = time.perf_counter()
+    spec = config.get("sweep_grid", {})
+    # The grid's values double as [min, max] ranges for random sampling
+    params = sweep.sample(spec, options["--samples"], options["--seed"]) if options["--samples"] else sweep.grid(spec)
+    metrics = sweep.evaluate(params)
+    rows = sweep.rank(params, metrics, swept=list(spec))
+    finished = time.perf_counter()
+
+    print(f"Sweep: {len(rows)} combinations x {len(features.token_ids)} histories ({features.bars} bars); "
+          f"precompute {prepared - started:.2f}s, evaluate {finished - prepared:.2f}s")
+    header = list(spec) + ["trades", "hit_rate", "pnl_usd", "max_drawdown_usd"]
+    print(" ".join(f"{name[:14]:>14}" for name in header))
+    for row in rows[:options["--top"]]:
+        print(" ".join(f"{row[name]:>14.4g}" for name in header))
+    if options["--csv"]:
+        with open(options["--csv"], "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else header)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# core/patterns.py
+# Chart-pattern detectors over rolling windows of close and volume, for the
+# identified_pattern field StrategyEngine and DecisionEngine branch on:
+#
+#   POTENTIAL_HOCKEY_STICK         a tight, low base, then a breakout well above it
+#                                  on accelerating volume
+#   FLOOR_FORMATION_DOUBLE_BOUNCE  after a deep drawdown, two lows at about the same
+#                                  level with a bounce in between, price back above them
+#   BLOW_OFF_TOP                   a parabolic run-up on a volume spike, then a sharp
+#                                  retrace from the peak
+#
+# Everything works on the same left-aligned, NaN-padded (tokens x bars) matrices as
+# core/indicators.py: detect_rows() labels every bar of every row (the parameter
+# sweep uses that), detect_last() only the last bar of each series, from its last
+# `lookback` bars, so the cost per token is bounded however long its history is.
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+PATTERNS = ("POTENTIAL_HOCKEY_STICK", "FLOOR_FORMATION_DOUBLE_BOUNCE", "BLOW_OFF_TOP")
+HOCKEY_STICK, FLOOR_FORMATION, BLOW_OFF_TOP = 1, 2, 3 # Codes; 0 = no pattern
+
+
+def _rolling(values: np.ndarray, window: int, reduce) -> np.ndarray:
+    """reduce() over the trailing `window` bars of each column; NaN where the window doesn't fit."""
+    out = np.full(values.shape, np.nan)
+    if 0 < window <= values.shape[1]:
+        out[:, window - 1:] = reduce(sliding_window_view(values, window, axis=1), axis=-1)
+    return out
+
+
+def _shift(values: np.ndarray, bars: int) -> np.ndarray:
+    """The value from `bars` columns earlier."""
+    if bars <= 0:
+        return values
+    out = np.full(values.shape, np.nan)
+    if bars < values.shape[1]:
+        out[:, bars:] = values[:, :-bars]
+    return out
+
+
+def _window(values: np.ndarray, window: int, offset: int, reduce, last: bool) -> np.ndarray:
+    """reduce() over `window` bars ending `offset` bars before each bar, for every column,
+    or (last=True) only for the last column, as a (rows, 1) matrix."""
+    if not last:
+        return _shift(_rolling(values, window, reduce), offset)
+    stop = values.shape[1] - offset
+    if window <= 0 or stop - window < 0:
+        return np.full((values.shape[0], 1), np.nan)
+    return reduce(values[:, stop - window:stop], axis=1)[:, None]
+
+
+def _at(values: np.ndarray, offset: int, last: bool) -> np.ndarray:
+    """The value `offset` bars before each bar (or only the last one)."""
+    if not last:
+        return _shift(values, offset)
+    if offset >= values.shape[1]:
+        return np.full((values.shape[0], 1), np.nan)
+    return values[:, values.shape[1] - 1 - offset][:, None]
+
+
+class PatternDetector:
+    def __init__(self, config: Dict):
+        # Hockey stick: base of base_bars ending breakout_bars ago
+        self.hs_base_bars = config.get("pattern_hs_base_bars", 15)
+        self.hs_breakout_bars = config.get("pattern_hs_breakout_bars", 5)
+        self.hs_base_max_range = config.get("pattern_hs_base_max_range", 0.30) # (max - min) / max of the base
+        self.hs_min_gain = config.get("pattern_hs_min_gain", 0.30) # Close vs. the base's high
+        self.hs_volume_accel = config.get("pattern_hs_volume_accel", 2.0) # Breakout vs. base mean volume
+        # Floor: two halves of floor_bars, after a drawdown from the high of the last drawdown_bars
+        self.floor_bars = config.get("pattern_floor_bars", 20)
+        self.floor_drawdown_bars = config.get("pattern_floor_drawdown_bars", 60)
+        self.floor_min_drawdown = config.get("pattern_floor_min_drawdown", 0.50)
+        self.floor_tolerance = config.get("pattern_floor_tolerance", 0.10) # Lows within 10% of each other
+        self.floor_min_bounce = config.get("pattern_floor_min_bounce", 0.10) # Peak between them
+        # Blow-off top: run-up over blowoff_bars, volume spike vs. the blowoff_base_bars before
+        self.blowoff_bars = config.get("pattern_blowoff_bars", 15)
+        self.blowoff_base_bars = config.get("pattern_blowoff_base_bars", 15)
+        self.blowoff_min_gain = config.get("pattern_blowoff_min_gain", 1.0)
+        self.blowoff_volume_spike = config.get("pattern_blowoff_volume_spike", 3.0)
+        self.blowoff_retrace = config.get("pattern_blowoff_retrace", 0.20)
+        self.lookback = max(self.hs_base_bars + self.hs_breakout_bars, self.floor_bars, self.floor_drawdown_bars,
+                            self.blowoff_bars + self.blowoff_base_bars)
+
+    # --- Detectors (boolean matrices: every bar, or with last=True only the last one) ---
+
+    def _hockey_stick(self, closes: np.ndarray, volumes: np.ndarray, last: bool) -> np.ndarray:
+        base, breakout = self.hs_base_bars, self.hs_breakout_bars
+        base_high = _window(closes, base, breakout, np.max, last)
+        base_low = _window(closes, base, breakout, np.min, last)
+        base_volume = _window(volumes, base, breakout, np.mean, last)
+        recent_volume = _window(volumes, breakout, 0, np.mean, last)
+        return ((base_high - base_low <= self.hs_base_max_range * base_high)
+                & (_at(closes, 0, last) >= (1 + self.hs_min_gain) * base_high)
+                & (recent_volume >= self.hs_volume_accel * base_volume) & (recent_volume > 0))
+
+    def _floor_formation(self, closes: np.ndarray, last: bool) -> np.ndarray:
+        window = self.floor_bars
+        half = window // 2
+        first_low = _window(closes, window - half, half, np.min, last)
+        second_low = _window(closes, half, 0, np.min, last)
+        middle_high = _window(closes, half, half // 2, np.max, last)
+        floor = np.fmin(first_low, second_low)
+        # The drawdown high may come from a shorter history than drawdown_bars (NaN padding is skipped)
+        lead = self.floor_drawdown_bars - 1
+        padded = np.concatenate([np.full((closes.shape[0], lead), np.nan), closes], axis=1)
+        peak = _window(padded, self.floor_drawdown_bars, 0, np.fmax.reduce, last)
+        if not last:
+            peak = peak[:, lead:]
+        return ((floor <= (1 - self.floor_min_drawdown) * peak)
+                & (np.abs(first_low - second_low) <= self.floor_tolerance * floor)
+                & (middle_high >= (1 + self.floor_min_bounce) * floor)
+                & (_at(closes, 0, last) > np.fmax(first_low, second_low)))
+
+    def _blow_off_top(self, closes: np.ndarray, volumes: np.ndarray, last: bool) -> np.ndarray:
+        run = self.blowoff_bars
+        peak = _window(closes, run, 0, np.max, last)
+        peak_volume = _window(volumes, run, 0, np.max, last)
+        base_volume = _window(volumes, self.blowoff_base_bars, run, np.mean, last)
+        return ((peak >= (1 + self.blowoff_min_gain) * _at(closes, run - 1, last))
+                & (peak_volume >= self.blowoff_volume_spike * base_volume) & (peak_volume > 0)
+                & (_at(closes, 0, last) <= (1 - self.blowoff_retrace) * peak))
+
+    def _codes(self, closes: np.ndarray, volumes: np.ndarray, last: bool) -> np.ndarray:
+        # A blow-off top wins over a hockey stick (it's one that already reversed), which wins over a floor
+        with np.errstate(invalid="ignore"):
+            return np.select(
+                [self._blow_off_top(closes, volumes, last), self._hockey_stick(closes, volumes, last),
+                 self._floor_formation(closes, last)],
+                [BLOW_OFF_TOP, HOCKEY_STICK, FLOOR_FORMATION], default=0).astype(np.int8)
+
+    # --- Batch API ---
+
+    def detect_rows(self, closes: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+        """Pattern code (see PATTERNS; 0 = none) for every bar of every row."""
+        return self._codes(np.asarray(closes, dtype=np.float64), np.asarray(volumes, dtype=np.float64), False)
+
+    def detect_last(self, closes: Sequence[Sequence[float]], volumes: Sequence[Sequence[float]]) -> np.ndarray:
+        """Pattern code at the last bar of each series, from its last `lookback` bars only."""
+        rows = len(closes)
+        if not rows:
+            return np.zeros(0, dtype=np.int8)
+        tail_closes = np.full((rows, self.lookback), np.nan)
+        tail_volumes = np.full((rows, self.lookback), np.nan)
+        for row in range(rows):
+            bars = min(len(closes[row]), self.lookback)
+            if bars:
+                # Right-aligned, so every row's last bar is the last column
+                tail_closes[row, self.lookback - bars:] = np.asarray(closes[row][-bars:], dtype=np.float64)
+                tail_volumes[row, self.lookback - bars:] = np.asarray(volumes[row][-bars:], dtype=np.float64)
+        return self._codes(tail_closes, tail_volumes, True)[:, 0]
+
+    def detect(self, closes: Sequence[float], volumes: Sequence[float]) -> Optional[str]:
+        """identified_pattern for one series (None when nothing matches)."""
+        code = int(self.detect_last([closes], [volumes])[0])
+        return PATTERNS[code - 1] if code else None
+
+
+def pattern_names(codes: np.ndarray) -> List[Optional[str]]:
+    return [PATTERNS[code - 1] if code else None for code in codes.tolist()]
@@ -0,0 +1,183 @@
+# core/position_book.py
+# Open positions plus the price levels that should wake them up. A drop-in
+# replacement for the plain active_positions dict: it's a mutable mapping of
+# token_id -> position, and every insert/update/delete keeps the trigger index in
+# step.
+#
+# Each position has a stop-loss level (price falls to it) and, for PostRug, a
+# take-profit level (price rises to it), both from DecisionEngine. A price tick is
+# a float compare against those two levels, so a tick that crosses nothing costs
+# next to nothing. on_ticks() does the same for a whole batch of ticks with one
+# vectorized compare over the level arrays and returns only the crossed ones.
+# A heap of next re-check times (stale entries skipped lazily) provides the
+# scheduled cadence: the full TA + security re-check (generate_sell_signal) only
+# needs to run for positions that were triggered or whose re-check is due.
+import heapq
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.decision_engine import DecisionEngine
+from core.models import TokenSnapshot
+
+
+class Trigger(NamedTuple):
+    token_id: str
+    kind: str # "STOP_LOSS" or "TAKE_PROFIT"
+    trigger_price: float
+    price: float
+
+
+class PositionBook(MutableMapping):
+    def __init__(self, config: Dict, decision: Optional[DecisionEngine] = None, capacity: int = 1024):
+        self.decision = decision or DecisionEngine(config)
+        self.recheck_seconds = config.get("position_recheck_seconds", 60.0)
+        self._positions: Dict[str, Dict] = {}
+        self._levels: Dict[str, Tuple[float, float]] = {} # token_id -> (stop, take profit)
+        self._slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._stops = np.full(capacity, -np.inf) # Slot-indexed copies of _levels for on_ticks
+        self._targets = np.full(capacity, np.inf)
+        self._next_check: Dict[str, float] = {}
+        self._schedule: List[Tuple[float, str]] = [] # (due time, token_id); stale when _next_check disagrees
+        self.ticks = 0
+        self.triggers = 0
+
+    # --- Mapping interface (what active_positions callers use) ---
+
+    def __getitem__(self, token_id: str) -> Dict:
+        return self._positions[token_id]
+
+    def __setitem__(self, token_id: str, position: Dict):
+        is_new = token_id not in self._positions
+        self._positions[token_id] = position
+        stop = self.decision.stop_loss_price(position)
+        target = self.decision.take_profit_price(position)
+        levels = (stop, target if target is not None else float("inf"))
+        self._levels[token_id] = levels
+        slot = self._slots.get(token_id)
+        if slot is None:
+            slot = self._free_slots.pop() if self._free_slots else len(self._slots)
+            if slot >= len(self._stops):
+                self._stops = np.concatenate([self._stops, np.full(len(self._stops), -np.inf)])
+                self._targets = np.concatenate([self._targets, np.full(len(self._targets), np.inf)])
+            self._slots[token_id] = slot
+        self._stops[slot], self._targets[slot] = levels
+        if is_new: # The buy just looked at everything; next full re-check one cadence from now
+            self.mark_checked(token_id)
+
+    def __delitem__(self, token_id: str):
+        del self._positions[token_id]
+        del self._levels[token_id]
+        slot = self._slots.pop(token_id)
+        self._stops[slot], self._targets[slot] = -np.inf, np.inf
+        self._free_slots.append(slot)
+        self._next_check.pop(token_id, None) # Its schedule entry is now stale and skipped when popped
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, token_id) -> bool:
+        return token_id in self._positions
+
+    # --- Triggers ---
+
+    def levels(self, token_id: str) -> Tuple[float, float]:
+        """(stop-loss price, take-profit price); inf when the strategy has no take profit."""
+        return self._levels[token_id]
+
+    def on_tick(self, token_id: str, price: float) -> List[Trigger]:
+        """Triggers crossed by one price tick (empty for tokens without a position)."""
+        self.ticks += 1
+        levels = self._levels.get(token_id)
+        if levels is None:
+            return []
+        stop, target = levels
+        if price <= stop:
+            self.triggers += 1
+            return [Trigger(token_id, "STOP_LOSS", stop, price)]
+        if price >= target:
+            self.triggers += 1
+            return [Trigger(token_id, "TAKE_PROFIT", target, price)]
+        return []
+
+    def on_ticks(self, token_ids: Sequence[str], prices: Sequence[float]) -> List[Trigger]:
+        """Batch version of on_tick: one vectorized compare, Python work only for crossed positions."""
+        self.ticks += len(token_ids)
+        slots = np.fromiter((self._slots.get(token_id, -1) for token_id in token_ids), dtype=np.int64, count=len(token_ids))
+        prices = np.asarray(prices, dtype=np.float64)
+        held = slots >= 0
+        safe_slots = np.where(held, slots, 0)
+        stops, targets = self._stops[safe_slots], self._targets[safe_slots]
+        hit_stop = held & (prices <= stops)
+        hit_target = held & ~hit_stop & (prices >= targets)
+        triggers = []
+        for i in np.flatnonzero(hit_stop | hit_target):
+            if hit_stop[i]:
+                triggers.append(Trigger(token_ids[i], "STOP_LOSS", float(stops[i]), float(prices[i])))
+            else:
+                triggers.append(Trigger(token_ids[i], "TAKE_PROFIT", float(targets[i]), float(prices[i])))
+        self.triggers += len(triggers)
+        return triggers
+
+    # --- Re-check cadence ---
+
+    def mark_checked(self, token_id: str, now: Optional[float] = None):
+        """Records a full re-check and schedules the next one recheck_seconds later."""
+        due = (now if now is not None else time.time()) + self.recheck_seconds
+        self._next_check[token_id] = due
+        heapq.heappush(self._schedule, (due, token_id))
+        if len(self._schedule) > 2 * len(self._next_check) + 64: # Drop superseded entries now and then
+            self._schedule = [(t, token) for token, t in self._next_check.items()]
+            heapq.heapify(self._schedule)
+
+    def request_check(self, token_id: str):
+        """Makes the position's full re-check due immediately (e.g. for positions restored at startup)."""
+        self._next_check[token_id] = 0.0
+        heapq.heappush(self._schedule, (0.0, token_id))
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Held tokens whose scheduled re-check is due, earliest first."""
+        now = now if now is not None else time.time()
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            due_time, token_id = heapq.heappop(self._schedule)
+            if self._next_check.get(token_id) == due_time:
+                due.append(token_id)
+        return due
+
+    def is_due(self, token: TokenSnapshot, now: Optional[float] = None) -> bool:
+        """What needs_check() would answer, without counting a tick or rescheduling (for planners
+        that decide whether to process the token at all, before process() calls needs_check())."""
+        token_id = token.tokenId
+        if token_id not in self._positions:
+            return True
+        now = now if now is not None else time.time()
+        price = token.technicalAnalysis.priceUSD if token.technicalAnalysis else None
+        if not price:
+            return True
+        stop, target = self._levels[token_id]
+        return price <= stop or price >= target or self._next_check.get(token_id, 0.0) <= now
+
+    def needs_check(self, token: TokenSnapshot, now: Optional[float] = None) -> bool:
+        """Whether a held token should get the full re-check now: its current price crossed a trigger,
+        or its cadence is due (also when there's no price to compare). Reschedules it if so."""
+        token_id = token.tokenId
+        if token_id not in self._positions:
+            return True
+        now = now if now is not None else time.time()
+        price = token.technicalAnalysis.priceUSD if token.technicalAnalysis else None
+        triggered = bool(self.on_tick(token_id, price)) if price else False
+        if triggered or not price or self._next_check.get(token_id, 0.0) <= now:
+            self.mark_checked(token_id, now)
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {"positions": len(self._positions), "ticks": self.ticks, "triggers": self.triggers,
+                "scheduled": len(self._schedule)}
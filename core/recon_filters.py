@@ -1,6 +1,11 @@
 # core/recon_filters.py
-from typing import List, Dict
+from typing import List, Dict, Union
+import numpy as np
 from core.models import TokenSnapshot
+from core.token_table import TokenTable
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
 
 class Reconnaissance:
     def __init__(self, config: Dict):
@@ -9,24 +14,47 @@ class Reconnaissance:
         self.min_5min_volume = config.get("recon_min_5min_volume", 10000)
         # Add other config params like boost status if needed
 
-    def filter_tokens(self, tokens: List[TokenSnapshot]) -> List[TokenSnapshot]:
-        potential_candidates = []
-        for token in tokens:
-            if not token.marketCap or not token.volume or not token.volume.five_min_usd:
-                # print(f"Skipping {token.ticker} due to missing marketCap or 5min volume.")
-                continue
-
-            if not (self.min_market_cap <= token.marketCap <= self.max_market_cap):
-                # print(f"Skipping {token.ticker} due to market cap: {token.marketCap}")
-                continue
-            if token.volume.five_min_usd < self.min_5min_volume:
-                # print(f"Skipping {token.ticker} due to 5min volume: {token.volume.five_min_usd}")
-                continue
-
-            # Add pump.fun origin preference, boost status filters here if desired
-            # if token.origin and token.origin.lower() != "pump.fun":
-            #     continue
-
-            potential_candidates.append(token)
+    def filter_mask(self, table: TokenTable) -> np.ndarray:
+        """Boolean mask over the table's rows; same rules as the per-token checks it replaced."""
+        market_cap = table.column("marketCap")
+        volume_5m = table.column("volume.five_min_usd")
+        # Missing values are NaN and fail every comparison; zero counts as missing, as `not value` did
+        return ((market_cap != 0) & (volume_5m != 0)
+                & (market_cap >= self.min_market_cap) & (market_cap <= self.max_market_cap)
+                & (volume_5m >= self.min_5min_volume))
+
+    def passes(self, token: TokenSnapshot) -> bool:
+        """Single-token form of filter_mask, for callers that see one token at a time (e.g. a backtest bar)."""
+        market_cap = token.marketCap
+        volume_5m = token.volume.five_min_usd if token.volume else None
+        if not market_cap or not volume_5m:
+            return False
+        return self.min_market_cap <= market_cap <= self.max_market_cap and volume_5m >= self.min_5min_volume
+
+    def filter_indices(self, table: TokenTable) -> np.ndarray:
+        """Candidate row indices, narrowed first through the table's sorted market-cap index."""
+        rows = table.market_cap_range(self.min_market_cap, self.max_market_cap)
+        market_cap = table.column("marketCap")[rows]
+        volume_5m = table.column("volume.five_min_usd")[rows]
+        keep = (market_cap != 0) & (volume_5m != 0) & (volume_5m >= self.min_5min_volume)
+        # Add pump.fun origin preference, boost status filters here if desired
+        return rows[keep]
+
+    @staticmethod
+    def _count(tokens_in: int, tokens_out: int):
+        _metrics.inc("recon_tokens_in", tokens_in)
+        _metrics.inc("recon_tokens_out", tokens_out)
+
+    def filter_tokens(self, tokens: Union[List[TokenSnapshot], TokenTable]) -> Union[List[TokenSnapshot], TokenTable]:
+        """A list of snapshots comes back as a list; a TokenTable comes back as a table of the candidates."""
+        if isinstance(tokens, TokenTable):
+            candidates = tokens.subset(self.filter_indices(tokens))
+            self._count(len(tokens), len(candidates))
+            print(f"Recon: {len(candidates)} potential candidates from {len(tokens)}.")
+            return candidates
+
+        table = TokenTable.from_snapshots(tokens, ("marketCap", "volume.five_min_usd"))
+        potential_candidates = table.take(np.flatnonzero(self.filter_mask(table)))
+        self._count(len(tokens), len(potential_candidates))
         print(f"Recon: {len(potential_candidates)} potential candidates from {len(tokens)}.")
-        return potential_candidates
\ No newline at end of file
+        return potential_candidates
@@ -0,0 +1,155 @@
+# core/resampler.py
+# Higher-timeframe bars (5m, 15m, 1h by default) maintained incrementally from 1m
+# bars. Each timeframe keeps a CandleSeries whose last bar is the one currently
+# forming: a new 1m bar either extends it in place (high/low/close/volume) or, once
+# it falls in the next bucket, starts a new bar. A 1m bar re-sent with the same
+# timestamp (the 1m bar itself still forming) replaces its earlier version.
+#
+# With TA enabled every touched bar is also pushed into a per-timeframe streaming
+# IndicatorState as a partial bar, so TA on any timeframe is one O(1) update per
+# 1m bar rather than a DataFrame over the re-aggregated history.
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.indicators import IndicatorState
+from core.models import CandleSeries, TechnicalAnalysisResult, parse_timestamp
+from core.technical_analyzer import TechnicalAnalyzer
+
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400}
+
+Bar = Tuple[int, float, float, float, float, float] # timestamp, open, high, low, close, volume
+
+
+class _TimeframeBars:
+    __slots__ = ("seconds", "series", "bucket", "members", "state")
+
+    def __init__(self, seconds: int, state: Optional[IndicatorState]):
+        self.seconds = seconds
+        self.state = state # Streaming TA state fed with the forming bar, when TA is enabled
+        self.series = CandleSeries()
+        self.bucket: Optional[int] = None # Start time of the forming bar
+        self.members: List[Bar] = [] # 1m bars of the forming bar, kept so one can be replaced
+
+
+class CandleResampler:
+    def __init__(self, config: Dict, timeframes: Optional[List[str]] = None, with_ta: bool = False):
+        self.timeframes = list(timeframes or config.get("resample_timeframes") or ["5m", "15m", "1h"])
+        unknown = [tf for tf in self.timeframes if tf not in TIMEFRAME_SECONDS]
+        if unknown:
+            raise ValueError(f"Unsupported resample timeframes: {unknown}")
+        self.max_bars = config.get("resample_max_bars", 2000) # Per timeframe; older bars are dropped
+        self.ta = TechnicalAnalyzer(config) if with_ta else None
+        self._tokens: Dict[str, Dict[str, _TimeframeBars]] = {}
+        self._last_minute: Dict[str, int] = {} # token_id -> timestamp of the newest 1m bar consumed
+        self.late_bars = 0 # 1m bars for buckets that had already closed (ignored)
+
+    def _bars(self, token_id: str) -> Dict[str, _TimeframeBars]:
+        bars = self._tokens.get(token_id)
+        if bars is None:
+            bars = self._tokens[token_id] = {
+                tf: _TimeframeBars(TIMEFRAME_SECONDS[tf], self.ta.stream_state(token_id, tf) if self.ta else None)
+                for tf in self.timeframes}
+        return bars
+
+    def add(self, token_id: str, timestamp: int, open_: float, high: float, low: float, close: float,
+            volume: float) -> List[str]:
+        """Folds one 1m bar (epoch-second timestamp) into every timeframe; returns the timeframes it changed."""
+        bar = (timestamp, open_, high, low, close, volume)
+        changed = []
+        for timeframe, tf in self._bars(token_id).items():
+            if self._fold(tf, bar):
+                changed.append(timeframe)
+                if tf.state is not None:
+                    tf.state.update(tf.series.close[-1], tf.bucket, True, tf.series.volume[-1])
+        if timestamp > self._last_minute.get(token_id, -1):
+            self._last_minute[token_id] = timestamp
+        if not changed:
+            self.late_bars += 1
+        return changed
+
+    def _fold(self, tf: _TimeframeBars, bar: Bar) -> bool:
+        timestamp = bar[0]
+        bucket = timestamp - timestamp % tf.seconds
+        series = tf.series
+        if tf.bucket is None or bucket > tf.bucket: # First 1m bar of a new bar
+            tf.bucket = bucket
+            tf.members = [bar]
+            series.append(bucket, *bar[1:])
+            if len(series) > 2 * self.max_bars: # Trim in chunks so appends stay amortized O(1)
+                series.drop_first(len(series) - self.max_bars)
+            return True
+        if bucket < tf.bucket:
+            return False
+        members = tf.members
+        if timestamp > members[-1][0]: # The usual case: extend the forming bar in place
+            members.append(bar)
+            i = len(series) - 1
+            series.replace_last(bucket, series.open[i], max(series.high[i], bar[2]), min(series.low[i], bar[3]),
+                                bar[4], series.volume[i] + bar[5])
+            return True
+        # A replaced or out-of-order 1m bar inside the forming bar: rebuild it from its members
+        i = bisect.bisect_left(members, timestamp, key=lambda member: member[0])
+        if members[i][0] == timestamp:
+            members[i] = bar
+        else:
+            members.insert(i, bar)
+        series.replace_last(bucket, members[0][1], max(m[2] for m in members), min(m[3] for m in members),
+                            members[-1][4], sum(m[5] for m in members))
+        return True
+
+    def add_candle(self, token_id: str, candle: Dict[str, Any]) -> List[str]:
+        """add() for a candle dict as in the mock JSON (ISO or epoch timestamp); malformed candles are skipped."""
+        try:
+            return self.add(token_id, parse_timestamp(candle["timestamp"]), float(candle["open"]),
+                            float(candle["high"]), float(candle["low"]), float(candle["close"]),
+                            float(candle["volume"]))
+        except (KeyError, TypeError, ValueError):
+            return []
+
+    def sync(self, token_id: str, candles: Any) -> int:
+        """Feeds the 1m bars of `candles` (dicts or columns) not consumed yet, plus the newest consumed
+        one again in case it was still forming. Returns how many bars were fed."""
+        last = self._last_minute.get(token_id)
+        if hasattr(candles, "close") and hasattr(candles, "timestamp"):
+            # Sorted epoch seconds: the first bar to feed is a binary search away
+            start = 0 if last is None else int(np.searchsorted(candles.timestamp, last, side="left"))
+            columns = [getattr(candles, name)[start:].tolist() for name in CandleSeries.COLUMNS]
+            for row in zip(*columns):
+                self.add(token_id, *row)
+            return len(columns[0])
+        new_candles = []
+        for candle in reversed(candles or []):
+            new_candles.append(candle)
+            try:
+                if last is not None and parse_timestamp(candle["timestamp"]) <= last:
+                    break
+            except (KeyError, TypeError, ValueError):
+                continue
+        for candle in reversed(new_candles):
+            self.add_candle(token_id, candle)
+        return len(new_candles)
+
+    # --- Output ---
+
+    def series(self, token_id: str, timeframe: str) -> Optional[CandleSeries]:
+        """The token's bars on one timeframe, the last one possibly still forming."""
+        bars = self._tokens.get(token_id)
+        return bars[timeframe].series if bars is not None and timeframe in bars else None
+
+    def candle_data(self, token_id: str) -> Dict[str, CandleSeries]:
+        """{timeframe: CandleSeries}, ready to merge into historicalCandleData for TechnicalAnalyzer."""
+        return {timeframe: tf.series for timeframe, tf in self._tokens.get(token_id, {}).items()}
+
+    def analyze(self, token_id: str, timeframe: str) -> TechnicalAnalysisResult:
+        """Streaming TA on one resampled timeframe (requires with_ta=True)."""
+        if self.ta is None:
+            raise ValueError("CandleResampler was created without TA (with_ta=False)")
+        return self.ta.stream_result(token_id, timeframe)
+
+    def reset(self, token_id: str):
+        self._tokens.pop(token_id, None)
+        self._last_minute.pop(token_id, None)
+        if self.ta is not None:
+            self.ta.reset_stream(token_id)
@@ -0,0 +1,208 @@
+# core/scanner.py
+# The per-token steps of a scan (sell check for held positions, security gate,
+# candle loading, TA, whale flow, strategy selection, buy decision), shared by the
+# serial loop in main_controller, the asyncio pipeline and anything else that
+# needs to run the same decisions.
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from core.models import TokenSnapshot, TechnicalAnalysisResult, WhaleSummaryResult, SecurityCheckResult, BuySignal, SellSignal
+from core.recon_filters import Reconnaissance
+from core.security_analyzer import SecurityAnalyzer
+from core.technical_analyzer import TechnicalAnalyzer
+from core.whale_tracker import WhaleTracker
+from core.strategy_engine import StrategyEngine, RISKY_STATUSES
+from core.decision_engine import DecisionEngine
+from core.position_book import PositionBook
+from core.resampler import CandleResampler
+from core.bar_builder import TradeBarBuilder
+from utils import data_loader
+from utils.candle_cache import CandleCache
+from utils.candle_store import CandleStore
+from utils.metrics import get_metrics
+from utils.signal_journal import SignalJournal
+
+_metrics = get_metrics()
+
+
+def count_signal(signal: Union[BuySignal, SellSignal]):
+    if isinstance(signal, BuySignal):
+        _metrics.inc("signals_emitted", side="buy", kind=signal.strategy)
+    else:
+        _metrics.inc("signals_emitted", side="sell", kind=signal.sell_type)
+
+
+def recheck_due(token: TokenSnapshot, active_positions: Dict[str, Dict]) -> bool:
+    """False when a PositionBook says the held token's price is inside its stop/take-profit band and its
+    scheduled re-check isn't due, so the TA + security re-check can be skipped. Plain dicts always re-check."""
+    if isinstance(active_positions, PositionBook):
+        return active_positions.needs_check(token)
+    return True
+
+
+def print_sell_signal(sell_signal: SellSignal):
+    print(f"SELL SIGNAL for {sell_signal.ticker}: Type: {sell_signal.sell_type}, Price: ${sell_signal.suggested_exit_price:.6f}")
+    for reason in sell_signal.reasoning: print(f"  - {reason}")
+
+
+def print_buy_signal(buy_signal: BuySignal):
+    print(f"BUY SIGNAL for {buy_signal.ticker}: Strategy: {buy_signal.strategy}, Confidence: {buy_signal.confidence_score:.2f}")
+    print(f"  Entry Range: ${buy_signal.suggested_entry_price_range[0]:.6f} - ${buy_signal.suggested_entry_price_range[1]:.6f}")
+    for reason in buy_signal.reasoning: print(f"  - {reason}")
+
+
+def open_position(buy_signal: BuySignal, security_result: SecurityCheckResult) -> Dict:
+    """The position record kept in active_positions after a (simulated) buy."""
+    return {
+        "entry_price": (buy_signal.suggested_entry_price_range[0] + buy_signal.suggested_entry_price_range[1]) / 2,
+        "amount_held": 1000, # Dummy amount
+        "buy_strategy": buy_signal.strategy,
+        "initial_security_status": security_result.overall_status # Store for sell logic
+    }
+
+
+class TokenScanner:
+    def __init__(self, config: Dict, tracked_whales: Any,
+                 candle_store: Optional[CandleStore] = None, candle_cache: Optional[CandleCache] = None,
+                 historical_path: str = "mock_data/historical_data",
+                 transaction_path: str = "mock_data/transaction_data",
+                 journal: Optional[SignalJournal] = None):
+        self.config = config
+        self.candle_store = candle_store
+        self.candle_cache = candle_cache
+        self.historical_path = historical_path
+        self.transaction_path = transaction_path
+        self.journal = journal # Durable record of signals and position changes (utils/signal_journal.py)
+
+        self.recon = Reconnaissance(config)
+        self.security = SecurityAnalyzer(config)
+        self.ta = TechnicalAnalyzer(config)
+        self.whales = WhaleTracker(config, tracked_whales)
+        self.strategy = StrategyEngine(config)
+        self.decision = DecisionEngine(config)
+        self.bar_builder = TradeBarBuilder(config) if config.get("trade_bars", False) else None
+        # 5m/15m/1h bars derived from 1m for timeframes the data doesn't provide (resample_timeframes)
+        resample_timeframes = config.get("resample_timeframes", [])
+        self.resampler = CandleResampler(config, resample_timeframes) if resample_timeframes else None
+        # Streaming TA keeps per-token indicator state, so re-checks only pay for new candles
+        self.analyze_ta = self.ta.analyze_incremental if config.get("ta_incremental", False) else self.ta.analyze
+
+    # --- Individual steps ---
+
+    def load_candles(self, token: TokenSnapshot) -> Dict[str, Any]:
+        candles = data_loader.load_historical_data(
+            token.tokenId, self.historical_path, self.candle_store, self.candle_cache)
+        if self.bar_builder is not None and not candles and token.transactionStream:
+            # No candle feed yet (e.g. a token minutes after launch): bars from its own trades
+            self.bar_builder.sync(token.tokenId, token.transactionStream)
+            candles = self.bar_builder.candle_data(token.tokenId)
+        if self.resampler is not None and candles and candles.get("1m") is not None:
+            # Higher timeframes kept up to date from the 1m feed; only new 1m bars are folded in.
+            # A new dict, since the loaded one may be shared through the candle cache.
+            self.resampler.sync(token.tokenId, candles["1m"])
+            resampled = self.resampler.candle_data(token.tokenId)
+            candles = dict(candles, **{tf: series for tf, series in resampled.items() if tf not in candles})
+        token.historicalCandleData = candles
+        return token.historicalCandleData
+
+    def load_transactions(self, token: TokenSnapshot):
+        token.transactionStream = data_loader.load_transaction_stream(token.tokenId, self.transaction_path)
+        return token.transactionStream
+
+    def forget(self, token_id: str):
+        """Drops every step's per-token state (whale window, streaming TA, derived bars) for a token that
+        left the universe; a long-running scan would otherwise keep it forever."""
+        self.whales.reset(token_id)
+        self.ta.reset_stream(token_id)
+        if self.resampler is not None:
+            self.resampler.reset(token_id)
+        if self.bar_builder is not None:
+            self.bar_builder.reset(token_id)
+        data_loader.forget_historical_data(token_id)
+
+    def check_sell(self, token: TokenSnapshot, position: Dict,
+                   ta_result: TechnicalAnalysisResult, security_result: SecurityCheckResult) -> Optional[SellSignal]:
+        return self.decision.generate_sell_signal(token, position, ta_result, security_result)
+
+    def assess_buy(self, token: TokenSnapshot, ta_result: TechnicalAnalysisResult, whale_summary: WhaleSummaryResult,
+                   security_result: SecurityCheckResult) -> Tuple[List[str], Optional[BuySignal]]:
+        with _metrics.timer("stage", stage="strategy"):
+            applicable_strategies = self.strategy.get_applicable_strategies(token, ta_result, whale_summary, security_result)
+        if not applicable_strategies:
+            return applicable_strategies, None
+        with _metrics.timer("stage", stage="decision"):
+            buy_signal = self.decision.generate_buy_signal(
+                token, applicable_strategies, ta_result, whale_summary, security_result)
+        return applicable_strategies, buy_signal
+
+    # --- The serial per-token flow ---
+
+    def process(self, token: TokenSnapshot, active_positions: Dict[str, Dict],
+                ta_result: Optional[TechnicalAnalysisResult] = None) -> List[Union[BuySignal, SellSignal]]:
+        """Runs every step for one token, updating active_positions. Returns the signals emitted.
+
+        ta_result may be passed in when it was already computed (e.g. by a batch TA pass).
+        """
+        print(f"\n--- Analyzing Token: {token.ticker} ({token.contractAddress}) ---")
+        signals: List[Union[BuySignal, SellSignal]] = []
+
+        # If we have an active position, check for SELL signals first
+        if token.tokenId in active_positions:
+            if not recheck_due(token, active_positions):
+                _metrics.inc("position_recheck_skipped")
+                return signals
+            # Re-run TA and Security for current state. With static mock data this is the same
+            # snapshot, so TA runs on its historical candles rather than a fresh feed.
+            with _metrics.timer("stage", stage="load"):
+                self.load_candles(token)
+            with _metrics.timer("stage", stage="ta"):
+                current_ta_result = self.analyze_ta(token)
+            with _metrics.timer("stage", stage="security"):
+                current_security_result = self.security.analyze(token) # Re-check security
+            with _metrics.timer("stage", stage="decision"):
+                sell_signal = self.check_sell(token, active_positions[token.tokenId], current_ta_result, current_security_result)
+            if sell_signal:
+                print_sell_signal(sell_signal)
+                # Simulate selling:
+                del active_positions[token.tokenId]
+                signals.append(sell_signal)
+                count_signal(sell_signal)
+                if self.journal is not None:
+                    self.journal.record_sell(sell_signal)
+                return signals # Don't check for buy if we just sold
+
+        # If no active position, or didn't sell, check for BUY signals
+        with _metrics.timer("stage", stage="security"):
+            security_result = self.security.analyze(token)
+        if security_result.overall_status in RISKY_STATUSES:
+            print(f"Security Risk for {token.ticker}: {security_result.overall_status}. Details:")
+            # for detail in security_result.details: print(f"  - {detail['check']}: {detail['status']} - {detail['reason']}")
+            return signals
+
+        # Load historical data for TA
+        with _metrics.timer("stage", stage="load"):
+            candles = self.load_candles(token)
+        if not candles:
+            print(f"No historical data for {token.ticker} to perform TA. Skipping TA.")
+            return signals # For now, TA is required
+
+        if ta_result is None:
+            with _metrics.timer("stage", stage="ta"):
+                ta_result = self.analyze_ta(token)
+        with _metrics.timer("stage", stage="whale"):
+            whale_summary = self.whales.analyze(token) # Rolling window over transactionStream, else the snapshot
+
+        print(f"  TA: EMA: {ta_result.ema_cross_state}, RSI: {ta_result.rsi_state} ({ta_result.rsi_14_value:.2f}), MACD: {ta_result.macd_state}")
+        print(f"  Whales: Net Buy 15m: ${whale_summary.net_buy_volume_usd_15m:.0f}, Buyers: {whale_summary.distinct_buying_whales_15m}")
+        print(f"  Security: {security_result.overall_status}")
+
+        applicable_strategies, buy_signal = self.assess_buy(token, ta_result, whale_summary, security_result)
+        print(f"  Applicable Strategies: {applicable_strategies}")
+        if buy_signal:
+            print_buy_signal(buy_signal)
+            # Simulate buying:
+            active_positions[token.tokenId] = open_position(buy_signal, security_result)
+            signals.append(buy_signal)
+            count_signal(buy_signal)
+            if self.journal is not None:
+                self.journal.record_buy(buy_signal, active_positions[token.tokenId])
+        return signals
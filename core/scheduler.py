@@ -0,0 +1,195 @@
+# core/scheduler.py
+# Long-running scan loop. Each cycle re-analyzes only "dirty" tokens: those whose
+# snapshot, candles or transactions changed since they were last processed (or
+# whose position state changed), plus held positions whose PositionBook re-check
+# is due. Held positions go first, then the remaining candidates by 5-minute
+# volume or recency, until the cycle's time budget is spent; whatever didn't fit
+# stays dirty and is picked up next cycle.
+#
+# Planning is bounded too: recon only re-runs when the source hands back a new
+# token list, held positions are looked up by id, and only a round-robin slice of
+# max_checks_per_cycle candidates has its file versions checked each cycle, so a
+# universe far larger than one cycle can stat still reaches every token in turn.
+# Tokens that drop out of the source have their per-token state (whale windows,
+# streaming TA, derived bars, version bookkeeping) freed, so a long run stays bounded.
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.models import TokenSnapshot
+from core.position_book import PositionBook
+from core.scanner import TokenScanner
+from utils import data_loader
+
+
+class SnapshotFileSource:
+    """Re-reads a snapshot file only when it changes; otherwise returns the same token objects
+    (so transaction streams and other attached state survive between cycles)."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._version: Optional[Tuple[int, int]] = None
+        self._tokens: List[TokenSnapshot] = []
+
+    def __call__(self) -> List[TokenSnapshot]:
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return self._tokens
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version != self._version:
+            self._version = version
+            self._tokens = data_loader.load_token_snapshots(self.filepath)
+        return self._tokens
+
+
+class ScanScheduler:
+    def __init__(self, scanner: TokenScanner, config: Dict, source: Callable[[], List[TokenSnapshot]]):
+        self.scanner = scanner
+        self.source = source
+        self.cycle_budget_seconds = config.get("scheduler_cycle_budget_seconds", 2.0)
+        self.interval_seconds = config.get("scheduler_interval_seconds", 5.0)
+        self.priority = config.get("scheduler_priority", "volume") # "volume" (5m USD) or "recency"
+        self.max_deferrals = config.get("scheduler_max_deferrals", 5) # Cycles a token may wait before it jumps the queue
+        self.max_checks_per_cycle = config.get("scheduler_max_checks_per_cycle", 10000) # 0 = every candidate
+        self.active_positions: Dict[str, Dict] = {}
+        self._processed_versions: Dict[str, Tuple] = {} # token_id -> versions at its last analysis
+        self._transaction_versions: Dict[str, Tuple[int, int]] = {} # token_id -> transaction file version loaded
+        self._deferrals: Dict[str, int] = {}
+        self._universe: Optional[List[TokenSnapshot]] = None # Source list the candidates were filtered from
+        self._tokens_by_id: Dict[str, TokenSnapshot] = {}
+        self._candidates: List[TokenSnapshot] = []
+        self._cursor = 0 # Next candidate to version-check (round robin)
+        self._dirty: Dict[str, Tuple[TokenSnapshot, Tuple]] = {} # Candidates found dirty, not processed yet
+        self.cycles = 0
+        self.last_cycle: Dict[str, float] = {}
+
+    def token_versions(self, token: TokenSnapshot) -> Tuple:
+        scanner = self.scanner
+        return (
+            token.timestampCollected,
+            data_loader.historical_data_version(token.tokenId, scanner.historical_path, scanner.candle_store),
+            data_loader.transaction_stream_version(token.tokenId, scanner.transaction_path),
+            token.tokenId in self.active_positions, # Positions opened/closed elsewhere make the token dirty
+        )
+
+    def _priority_key(self, token: TokenSnapshot):
+        if self.priority == "recency":
+            return token.timestampCollected or ""
+        return (token.volume.five_min_usd or 0) if token.volume else 0
+
+    def _refresh_universe(self, tokens: List[TokenSnapshot]):
+        """Re-runs recon only when the source returns a different token list."""
+        if tokens is self._universe:
+            return
+        self._universe = tokens
+        previous = self._tokens_by_id
+        self._tokens_by_id = {token.tokenId: token for token in tokens}
+        for token_id in previous.keys() - self._tokens_by_id.keys():
+            if token_id not in self.active_positions: # A held token keeps its state until it's back or sold
+                self._forget(token_id)
+        self._candidates = self.scanner.recon.filter_tokens(tokens)
+        self._cursor = 0
+        candidate_ids = {token.tokenId for token in self._candidates}
+        # Pending dirty candidates move to the new token objects, or go if recon dropped them
+        self._dirty = {token_id: (self._tokens_by_id[token_id], versions)
+                       for token_id, (_, versions) in self._dirty.items() if token_id in candidate_ids}
+
+    def _forget(self, token_id: str):
+        """Frees a token's state once it has left the source."""
+        self.scanner.forget(token_id)
+        self._processed_versions.pop(token_id, None)
+        self._transaction_versions.pop(token_id, None)
+        self._deferrals.pop(token_id, None)
+
+    def plan_cycle(self, tokens: List[TokenSnapshot]) -> Tuple[List[Tuple[TokenSnapshot, Tuple]], int]:
+        """Dirty tokens in processing order, each with its current versions; plus how many were clean."""
+        self._refresh_universe(tokens)
+        held, overdue, rest = [], [], []
+        clean = 0
+        # Held positions first and every cycle; recon only gates new entries. With a PositionBook a
+        # crossed stop/take-profit or a due re-check makes the token dirty even if no file changed.
+        book = self.active_positions if isinstance(self.active_positions, PositionBook) else None
+        for token_id in list(self.active_positions):
+            token = self._tokens_by_id.get(token_id)
+            if token is None:
+                continue
+            versions = self.token_versions(token)
+            if self._processed_versions.get(token_id) == versions and not (book is not None and book.is_due(token)):
+                clean += 1
+            else:
+                held.append((token, versions))
+        candidates = self._candidates
+        checks = len(candidates)
+        if self.max_checks_per_cycle:
+            checks = min(checks, self.max_checks_per_cycle)
+        for k in range(checks):
+            token = candidates[(self._cursor + k) % len(candidates)]
+            if token.tokenId in self.active_positions:
+                continue
+            versions = self.token_versions(token)
+            if self._processed_versions.get(token.tokenId) == versions:
+                clean += 1
+                self._dirty.pop(token.tokenId, None)
+            else:
+                self._dirty[token.tokenId] = (token, versions)
+        if candidates:
+            self._cursor = (self._cursor + checks) % len(candidates)
+        for token_id, item in self._dirty.items():
+            if token_id in self.active_positions:
+                continue
+            if self._deferrals.get(token_id, 0) >= self.max_deferrals:
+                overdue.append(item)
+            else:
+                rest.append(item)
+        rest.sort(key=lambda item: self._priority_key(item[0]), reverse=True)
+        overdue.sort(key=lambda item: self._deferrals[item[0].tokenId], reverse=True)
+        return held + overdue + rest, clean
+
+    def run_cycle(self) -> Dict[str, float]:
+        started = time.perf_counter()
+        deadline = started + self.cycle_budget_seconds
+        queue, clean = self.plan_cycle(self.source())
+        processed = 0
+        held_latency = 0.0
+        signals = []
+        for i, (token, versions) in enumerate(queue):
+            if processed and time.perf_counter() >= deadline:
+                for deferred, _ in queue[i:]:
+                    self._deferrals[deferred.tokenId] = self._deferrals.get(deferred.tokenId, 0) + 1
+                break
+            if self._transaction_versions.get(token.tokenId) != versions[2] or token.transactionStream is None:
+                self.scanner.load_transactions(token)
+                self._transaction_versions[token.tokenId] = versions[2]
+            was_held = token.tokenId in self.active_positions
+            signals.extend(self.scanner.process(token, self.active_positions))
+            # Stored with the position flag as this pass left it: its own buy/sell doesn't re-queue the token
+            self._processed_versions[token.tokenId] = versions[:3] + (token.tokenId in self.active_positions,)
+            self._deferrals.pop(token.tokenId, None)
+            self._dirty.pop(token.tokenId, None)
+            processed += 1
+            if was_held:
+                held_latency = time.perf_counter() - started
+        self.cycles += 1
+        self.last_cycle = {
+            "dirty": len(queue),
+            "processed": processed,
+            "deferred": len(queue) - processed,
+            "clean": clean,
+            "signals": len(signals),
+            "held_positions_seconds": held_latency,
+            "seconds": time.perf_counter() - started,
+        }
+        return self.last_cycle
+
+    def run(self, max_cycles: int = 0):
+        """Runs cycles every interval_seconds; max_cycles=0 runs until interrupted."""
+        try:
+            while not max_cycles or self.cycles < max_cycles:
+                stats = self.run_cycle()
+                print(f"Scheduler cycle {self.cycles}: {stats}")
+                if max_cycles and self.cycles >= max_cycles:
+                    break
+                time.sleep(max(0.0, self.interval_seconds - stats["seconds"]))
+        except KeyboardInterrupt:
+            print("Scheduler stopped.")
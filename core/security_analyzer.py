@@ -1,110 +1,115 @@
 # core/security_analyzer.py
-from typing import List, Dict, Tuple
-from core.models import TokenSnapshot, SecurityCheckResult, SecurityInfo
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from core.models import TokenSnapshot, SecurityCheckResult
+from core.security_rules import CompiledRules, DetailTemplate, DEFAULT_RULES, SecurityRule
+from core.token_table import TokenTable
+from utils.metrics import get_metrics
 
-class SecurityAnalyzer:
-    def __init__(self, config: Dict):
-        self.max_top_holder_percent = config.get("sec_max_top_holder_percent", 15.0)
-        self.max_dev_holdings_percent = config.get("sec_max_dev_holdings_percent", 1.0) # Allow small for error margin
-        self.max_total_bundled_percent = config.get("sec_max_total_bundled_percent", 8.0)
-        # Add more config as needed
+_metrics = get_metrics()
 
-    def _add_result(self, details_list: List, check_name: str, status: str, reason: str):
-        details_list.append({"check": check_name, "status": status, "reason": reason})
 
-    def analyze(self, token: TokenSnapshot) -> SecurityCheckResult:
-        details: List[Dict[str, str]] = []
-        critical_failures = 0
-        high_risk_flags = 0
-        warnings = 0
+class SecurityDetails(Sequence):
+    """Read-only list of check dicts, rendered from templates on first access.
 
-        if not token.security:
-            self._add_result(details, "Overall Security Data", "FAIL_CRITICAL", "Security data missing for token.")
-            return SecurityCheckResult(token.tokenId, "SCAM_LIKELY", details)
+    Cached results share one instance, so a fingerprint's details are formatted at
+    most once, and callers that only look at overall_status never format them.
+    """
+    __slots__ = ("_templates", "_rendered")
 
-        sec_info: SecurityInfo = token.security
+    def __init__(self, templates: Tuple[DetailTemplate, ...]):
+        self._templates = templates
+        self._rendered: Optional[List[Dict[str, str]]] = None
 
-        # Mint Authority
-        if sec_info.mintAuthorityDisabled is False: # Explicitly False
-            self._add_result(details, "Mint Authority", "FAIL_CRITICAL", "Mint authority is ENABLED.")
-            critical_failures += 1
-        else:
-            self._add_result(details, "Mint Authority", "PASS", "Mint authority disabled.")
+    def _render(self) -> List[Dict[str, str]]:
+        if self._rendered is None:
+            self._rendered = [{"check": check, "status": status, "reason": reason.format(*args)}
+                              for check, status, reason, args in self._templates]
+        return self._rendered
 
-        # Freeze Authority
-        if sec_info.freezeAuthorityDisabled is False: # Explicitly False
-            self._add_result(details, "Freeze Authority", "FAIL_CRITICAL", "Freeze authority is ENABLED (Honeypot risk).")
-            critical_failures += 1
-        else:
-            self._add_result(details, "Freeze Authority", "PASS", "Freeze authority disabled.")
-
-        # LP Burned/Locked
-        # This needs more nuance based on origin (Pump.fun vs Radium direct)
-        if token.liquidity and token.liquidity.lpBurnedPercent is not None:
-            if token.liquidity.lpBurnedPercent < 99.0: # Pump.fun tokens should be 100% after migration
-                 # For non-pump.fun, you'd check if LP is locked if not burned (more complex)
-                self._add_result(details, "LP Burn", "FAIL_HIGH_RISK", f"LP Burned: {token.liquidity.lpBurnedPercent}% (Should be >99% for migrated Pump.fun).")
-                high_risk_flags +=1
-            else:
-                self._add_result(details, "LP Burn", "PASS", f"LP Burned: {token.liquidity.lpBurnedPercent}%.")
-        else:
-            self._add_result(details, "LP Burn", "WARNING", "LP Burn information missing or not applicable.")
-            warnings +=1
+    def __getitem__(self, index):
+        return self._render()[index]
 
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, SecurityDetails):
+            other = other._render()
+        return self._render() == other
+
+    def __repr__(self) -> str:
+        return repr(self._render())
 
-        # Top Holders
-        if token.holders and token.holders.top10HolderPercent is not None:
-            if token.holders.top10HolderPercent > self.max_top_holder_percent:
-                self._add_result(details, "Top 10 Holders", "FAIL_HIGH_RISK", f"Top 10 holders own {token.holders.top10HolderPercent}%. Limit: {self.max_top_holder_percent}%.")
-                high_risk_flags += 1
-            else:
-                self._add_result(details, "Top 10 Holders", "PASS", f"Top 10 holders own {token.holders.top10HolderPercent}%.")
-        else:
-            self._add_result(details, "Top 10 Holders", "WARNING", "Top 10 holder information missing.")
-            warnings += 1
-
-        # Dev Holdings
-        if sec_info.devHoldingsPercent is not None:
-            if sec_info.devHoldingsPercent > self.max_dev_holdings_percent:
-                self._add_result(details, "Dev Holdings", "WARNING", f"Dev holds {sec_info.devHoldingsPercent}%. Limit: {self.max_dev_holdings_percent}%.")
-                warnings +=1 # Could be high risk depending on context
-            else:
-                 self._add_result(details, "Dev Holdings", "PASS", f"Dev holds {sec_info.devHoldingsPercent}%.")
-        else:
-            self._add_result(details, "Dev Holdings", "INFO", "Dev holdings info not available or 0%.")
-
-
-        # Bundler Analysis
-        if sec_info.bundlerAnalysis:
-            ba = sec_info.bundlerAnalysis
-            if ba.totalBundledPercent is not None and ba.totalBundledPercent > self.max_total_bundled_percent:
-                self._add_result(details, "Bundled Supply", "FAIL_HIGH_RISK", f"Total bundled supply is {ba.totalBundledPercent}%. Limit: {self.max_total_bundled_percent}%.")
-                high_risk_flags += 1
-            elif ba.totalBundledPercent is not None:
-                 self._add_result(details, "Bundled Supply", "PASS", f"Total bundled supply is {ba.totalBundledPercent}%.")
-
-            if ba.freshWalletBundles:
-                self._add_result(details, "Fresh Wallet Bundles", "WARNING", "Fresh wallets involved in bundling detected.")
-                warnings += 1
-            else:
-                self._add_result(details, "Fresh Wallet Bundles", "INFO", "No significant fresh wallet bundling detected.")
-        else:
-            self._add_result(details, "Bundler Analysis", "INFO", "Bundler analysis data not available.")
 
-        # Copycat
-        if sec_info.isCopycat:
-            self._add_result(details, "Copycat Check", "FAIL_HIGH_RISK", "Token identified as a potential copycat.")
-            high_risk_flags += 1
+class SecurityAnalyzer:
+    def __init__(self, config: Dict, rules: Optional[Sequence[SecurityRule]] = None):
+        # Checks and their thresholds (sec_max_top_holder_percent, ...) live in core/security_rules.py
+        self.rules = CompiledRules(DEFAULT_RULES if rules is None else rules, config)
+        self.cache_max_entries = config.get("sec_cache_max_entries", 4096)
+        # fingerprint -> [overall_status, SecurityDetails or None until details are asked for]; LRU order
+        self._cache: "OrderedDict[tuple, list]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, token: TokenSnapshot) -> tuple:
+        """Exactly the inputs the rules read. Equal fingerprints always produce equal results."""
+        return self.rules.fingerprint(token)
+
+    def _entry(self, fp: tuple) -> Optional[list]:
+        try:
+            entry = self._cache.get(fp)
+        except TypeError: # Unhashable field value in odd data; evaluate without caching
+            return None
+        if entry is not None:
+            self._cache.move_to_end(fp)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self._cache[fp] = [None, None]
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+        return entry
+
+    def analyze_status(self, token: TokenSnapshot) -> str:
+        """overall_status only; stops at the first critical failure and never builds details."""
+        fp = self.fingerprint(token)
+        entry = self._entry(fp)
+        if entry is None:
+            status = self.rules.status(fp)
         else:
-            self._add_result(details, "Copycat Check", "PASS", "Token does not appear to be a copycat.")
-
-        # --- Determine Overall Status ---
-        overall_status = "SAFE"
-        if critical_failures > 0:
-            overall_status = "SCAM_LIKELY"
-        elif high_risk_flags > 0:
-            overall_status = "HIGH_RISK"
-        elif warnings > 0:
-            overall_status = "MODERATE_RISK"
-
-        return SecurityCheckResult(token.tokenId, overall_status, details)
\ No newline at end of file
+            if entry[0] is None:
+                entry[0] = self.rules.status(fp)
+            status = entry[0]
+        _metrics.inc("security_status", status=status)
+        return status
+
+    def analyze(self, token: TokenSnapshot) -> SecurityCheckResult:
+        fp = self.fingerprint(token)
+        entry = self._entry(fp)
+        if entry is None or entry[1] is None:
+            status, templates = self.rules.evaluate(fp)
+            details = SecurityDetails(templates)
+            if entry is None:
+                _metrics.inc("security_status", status=status)
+                return SecurityCheckResult(token.tokenId, status, details)
+            entry[0], entry[1] = status, details
+        _metrics.inc("security_status", status=entry[0])
+        return SecurityCheckResult(token.tokenId, entry[0], entry[1])
+
+    def analyze_batch(self, tokens) -> np.ndarray:
+        """overall_status for every token (a TokenTable or a list of snapshots), vectorized per rule."""
+        table = tokens if isinstance(tokens, TokenTable) else TokenTable.from_snapshots(tokens, ())
+        statuses = self.rules.evaluate_table(table)
+        if _metrics.enabled:
+            for status, count in zip(*np.unique(statuses, return_counts=True)):
+                _metrics.inc("security_status", int(count), status=status)
+        return statuses
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,205 @@
+# core/security_rules.py
+# Declarative security checks. Each SecurityRule names the snapshot field it reads,
+# the predicate that makes it fail, the severity of a failure and (optionally) the
+# config key of its threshold. CompiledRules turns the table into:
+#   - a detailed single-token path (every check, with reasons),
+#   - a status-only single-token path that stops at the first critical failure,
+#   - a vectorized path over a TokenTable that yields overall_status for every row.
+# Adding a check is a new table entry; no per-token code is needed.
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.token_table import TokenTable
+
+SEVERITY_RANK = {"PASS": 0, "INFO": 0, "WARNING": 1, "FAIL_HIGH_RISK": 2, "FAIL_CRITICAL": 3}
+OVERALL_STATUS = ("SAFE", "MODERATE_RISK", "HIGH_RISK", "SCAM_LIKELY") # Indexed by the worst rank seen
+_CRITICAL = SEVERITY_RANK["FAIL_CRITICAL"]
+
+# (check, status, reason format string, format args); reasons are only formatted when read
+DetailTemplate = Tuple[str, str, str, Tuple[Any, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class SecurityRule:
+    check: str
+    field: str # Dotted path on TokenSnapshot
+    predicate: str # When the check fails: "present" (never, see missing_*), "is_false", "truthy", "lt", "gt"
+    severity: str # Status recorded on failure
+    fail_reason: str = "" # Format args: {0} = value, {1} = threshold
+    pass_reason: Optional[str] = None # None: a passing check records nothing
+    pass_status: str = "PASS"
+    threshold: Optional[float] = None
+    threshold_key: Optional[str] = None # Config key overriding the default threshold
+    missing_status: Optional[str] = "PASS" # Value missing: "PASS" reuses the pass entry, None records nothing
+    missing_reason: str = ""
+    requires: Optional[str] = None # Dotted path that must be present, else the rule is skipped
+    halt: bool = False # A failure ends evaluation (no further checks are reported)
+
+
+DEFAULT_RULES: Tuple[SecurityRule, ...] = (
+    SecurityRule("Overall Security Data", "security", "present", "FAIL_CRITICAL",
+                 missing_status="FAIL_CRITICAL", missing_reason="Security data missing for token.", halt=True),
+    SecurityRule("Mint Authority", "security.mintAuthorityDisabled", "is_false", "FAIL_CRITICAL",
+                 "Mint authority is ENABLED.", "Mint authority disabled."),
+    SecurityRule("Freeze Authority", "security.freezeAuthorityDisabled", "is_false", "FAIL_CRITICAL",
+                 "Freeze authority is ENABLED (Honeypot risk).", "Freeze authority disabled."),
+    # This needs more nuance based on origin (Pump.fun vs Radium direct); pump.fun tokens should be 100% after migration
+    SecurityRule("LP Burn", "liquidity.lpBurnedPercent", "lt", "FAIL_HIGH_RISK",
+                 "LP Burned: {0}% (Should be >{1:g}% for migrated Pump.fun).", "LP Burned: {0}%.",
+                 threshold=99.0, threshold_key="sec_min_lp_burned_percent",
+                 missing_status="WARNING", missing_reason="LP Burn information missing or not applicable."),
+    SecurityRule("Top 10 Holders", "holders.top10HolderPercent", "gt", "FAIL_HIGH_RISK",
+                 "Top 10 holders own {0}%. Limit: {1}%.", "Top 10 holders own {0}%.",
+                 threshold=15.0, threshold_key="sec_max_top_holder_percent",
+                 missing_status="WARNING", missing_reason="Top 10 holder information missing."),
+    SecurityRule("Dev Holdings", "security.devHoldingsPercent", "gt", "WARNING", # Could be high risk depending on context
+                 "Dev holds {0}%. Limit: {1}%.", "Dev holds {0}%.",
+                 threshold=1.0, threshold_key="sec_max_dev_holdings_percent",
+                 missing_status="INFO", missing_reason="Dev holdings info not available or 0%."),
+    SecurityRule("Bundler Analysis", "security.bundlerAnalysis", "present", "INFO",
+                 missing_status="INFO", missing_reason="Bundler analysis data not available."),
+    SecurityRule("Bundled Supply", "security.bundlerAnalysis.totalBundledPercent", "gt", "FAIL_HIGH_RISK",
+                 "Total bundled supply is {0}%. Limit: {1}%.", "Total bundled supply is {0}%.",
+                 threshold=8.0, threshold_key="sec_max_total_bundled_percent",
+                 missing_status=None, requires="security.bundlerAnalysis"),
+    SecurityRule("Fresh Wallet Bundles", "security.bundlerAnalysis.freshWalletBundles", "truthy", "WARNING",
+                 "Fresh wallets involved in bundling detected.", "No significant fresh wallet bundling detected.",
+                 pass_status="INFO", requires="security.bundlerAnalysis"),
+    SecurityRule("Copycat Check", "security.isCopycat", "truthy", "FAIL_HIGH_RISK",
+                 "Token identified as a potential copycat.", "Token does not appear to be a copycat."),
+)
+
+
+def _resolve(obj: Any, parts: Sequence[str]) -> Any:
+    for part in parts:
+        obj = getattr(obj, part, None)
+        if obj is None:
+            return None
+    # Scalars as-is; nested objects and lists only matter for their presence/truthiness
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    return bool(obj)
+
+
+class CompiledRules:
+    def __init__(self, rules: Sequence[SecurityRule], config: Dict):
+        self.rules = tuple(rules)
+        self.thresholds = tuple(
+            config.get(rule.threshold_key, rule.threshold) if rule.threshold_key else rule.threshold
+            for rule in self.rules)
+        # Every path any rule reads, in first-use order; a fingerprint is their values
+        self.fields: List[str] = []
+        for rule in self.rules:
+            for path in (rule.requires, rule.field):
+                if path and path not in self.fields:
+                    self.fields.append(path)
+        self._paths = [tuple(path.split(".")) for path in self.fields]
+        index = {path: i for i, path in enumerate(self.fields)}
+        # Per rule: (rule, threshold, value slot, requires slot or None, severity rank, missing rank)
+        self._plan = [
+            (rule, threshold, index[rule.field], index[rule.requires] if rule.requires else None,
+             SEVERITY_RANK[rule.severity],
+             SEVERITY_RANK[rule.pass_status if rule.missing_status == "PASS" else rule.missing_status]
+             if rule.missing_status else 0)
+            for rule, threshold in zip(self.rules, self.thresholds)
+        ]
+
+    def fingerprint(self, token: Any) -> tuple:
+        """Values of exactly the fields the rules read; equal fingerprints give equal results."""
+        return tuple(_resolve(token, parts) for parts in self._paths)
+
+    @staticmethod
+    def _missing(rule: SecurityRule, value: Any) -> bool:
+        return not value if rule.predicate == "present" else value is None
+
+    @staticmethod
+    def _fails(rule: SecurityRule, value: Any, threshold: Optional[float]) -> bool:
+        predicate = rule.predicate
+        if predicate == "is_false":
+            return value is False
+        if predicate == "truthy":
+            return bool(value)
+        if predicate == "lt":
+            return value < threshold
+        if predicate == "gt":
+            return value > threshold
+        return False # "present": only the missing case can record anything
+
+    def evaluate(self, values: tuple) -> Tuple[str, Tuple[DetailTemplate, ...]]:
+        """Detailed path: overall status plus one detail template per reported check."""
+        details: List[DetailTemplate] = []
+        worst = 0
+        for rule, threshold, slot, requires_slot, severity_rank, missing_rank in self._plan:
+            if requires_slot is not None and not values[requires_slot]:
+                continue
+            value = values[slot]
+            if self._missing(rule, value):
+                if rule.missing_status is None:
+                    continue
+                if rule.missing_status == "PASS":
+                    details.append((rule.check, rule.pass_status, rule.pass_reason or "", (value, threshold)))
+                else:
+                    details.append((rule.check, rule.missing_status, rule.missing_reason, (value, threshold)))
+                worst = max(worst, missing_rank)
+                if rule.halt and missing_rank:
+                    break
+            elif self._fails(rule, value, threshold):
+                details.append((rule.check, rule.severity, rule.fail_reason, (value, threshold)))
+                worst = max(worst, severity_rank)
+                if rule.halt:
+                    break
+            elif rule.pass_reason is not None:
+                details.append((rule.check, rule.pass_status, rule.pass_reason, (value, threshold)))
+        return OVERALL_STATUS[worst], tuple(details)
+
+    def status(self, values: tuple) -> str:
+        """Status-only path: no details, and stops at the first critical failure."""
+        worst = 0
+        for rule, threshold, slot, requires_slot, severity_rank, missing_rank in self._plan:
+            if requires_slot is not None and not values[requires_slot]:
+                continue
+            value = values[slot]
+            if self._missing(rule, value):
+                rank = missing_rank
+            elif self._fails(rule, value, threshold):
+                rank = severity_rank
+            else:
+                continue
+            if rank >= _CRITICAL:
+                return OVERALL_STATUS[_CRITICAL]
+            worst = max(worst, rank)
+        return OVERALL_STATUS[worst]
+
+    def evaluate_table(self, table: TokenTable) -> np.ndarray:
+        """overall_status for every row of a TokenTable, as an array of strings."""
+        rows = len(table)
+        worst = np.zeros(rows, dtype=np.int8)
+        active = np.ones(rows, dtype=bool) # Rows not stopped by a halting rule
+        for rule, threshold, slot, requires_slot, severity_rank, missing_rank in self._plan:
+            values = table.column(rule.field)
+            applies = active.copy()
+            if rule.requires:
+                required = table.column(rule.requires)
+                applies &= ~np.isnan(required) & (required != 0)
+            missing = np.isnan(values)
+            if rule.predicate == "present":
+                missing |= values == 0
+            present = ~missing
+            if rule.predicate == "is_false":
+                fails = present & (values == 0)
+            elif rule.predicate == "truthy":
+                fails = present & (values != 0)
+            elif rule.predicate == "lt":
+                fails = present & (values < threshold)
+            elif rule.predicate == "gt":
+                fails = present & (values > threshold)
+            else:
+                fails = np.zeros(rows, dtype=bool)
+            if missing_rank:
+                np.maximum(worst, np.where(applies & missing, missing_rank, 0).astype(np.int8), out=worst)
+            np.maximum(worst, np.where(applies & fails, severity_rank, 0).astype(np.int8), out=worst)
+            if rule.halt:
+                active &= ~(applies & (fails | (missing & (missing_rank > 0))))
+        return np.array(OVERALL_STATUS)[worst]
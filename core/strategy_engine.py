@@ -1,10 +1,233 @@
-from typing import List, Dict
+# core/strategy_engine.py
+# Strategies are data: each one is a list of clauses (OR), each clause a tuple of
+# named predicates (AND), and each predicate compares one field of the TA / whale /
+# volume inputs against a literal or a config threshold. A StrategyRegistry holds
+# the declarations; compile() resolves thresholds and category codes once, after
+# which the same table is evaluated either for one token (plain Python compares)
+# or for a whole batch of candidates (one array compare per predicate, one &/| per
+# clause), so adding a strategy adds array operations, not per-token Python work.
+import operator
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
 from core.models import TokenSnapshot, TechnicalAnalysisResult, WhaleSummaryResult, SecurityCheckResult
-import datetime
+from core.patterns import PATTERNS
+
+RISKY_STATUSES = ("SCAM_LIKELY", "HIGH_RISK") # Don't suggest strategies for very risky tokens
+
+# Categorical fields are integer codes in batch columns: index + 1, 0 = no result
+EMA_STATES = ("BULLISH_CROSS_RECENT", "BEARISH_CROSS_RECENT", "BULLISH_ABOVE", "BEARISH_BELOW", "NEUTRAL")
+RSI_STATES = ("OVERBOUGHT", "OVERSOLD", "NEUTRAL_RISING", "NEUTRAL_FALLING")
+MACD_STATES = ("BULLISH_CROSS_HIST", "BEARISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST", "BEARISH_MOMENTUM_HIST", "NEUTRAL")
+CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "identified_pattern": PATTERNS,
+    "ema_cross_state": EMA_STATES,
+    "rsi_state": RSI_STATES,
+    "macd_state": MACD_STATES,
+}
+NUMERIC_FIELDS = ("rsi_14_value", "volume_5m_usd", "whale_net_buy_15m")
+FIELDS = tuple(CATEGORIES) + NUMERIC_FIELDS
+
+_OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+    "==": operator.eq, "!=": operator.ne,
+}
+
+
+def encode(field: str, values: Sequence[Optional[str]]) -> np.ndarray:
+    """Category codes for a batch column (None or unknown states become 0)."""
+    codes = {name: i + 1 for i, name in enumerate(CATEGORIES[field])}
+    return np.fromiter((codes.get(value, 0) for value in values), dtype=np.int8, count=len(values))
+
+
+class Threshold(NamedTuple):
+    key: str # config key
+    default: float
+
+
+class Predicate(NamedTuple):
+    field: str
+    op: str # One of _OPS, "in" or "not in"
+    value: Any # Literal, tuple of literals for in/not in, or a Threshold
+    fill: Optional[float] = None # Stands in for a missing (None/NaN) or zero value, like `value or fill`
+
+
+class StrategyRegistry:
+    def __init__(self):
+        self.predicates: Dict[str, Predicate] = {}
+        self.strategies: Dict[str, Tuple[Tuple[str, ...], ...]] = {} # Insertion order = priority order
+
+    def predicate(self, name: str, field: str, op: str, value: Any, fill: Optional[float] = None):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown strategy input field: {field}")
+        if op not in _OPS and op not in ("in", "not in"):
+            raise ValueError(f"Unknown predicate operator: {op}")
+        self.predicates[name] = Predicate(field, op, value, fill)
+
+    def strategy(self, name: str, *clauses: Sequence[str]):
+        """Registers a strategy that applies when all predicates of any one clause hold."""
+        for clause in clauses:
+            unknown = [p for p in clause if p not in self.predicates]
+            if unknown:
+                raise ValueError(f"Strategy {name} uses unknown predicates: {unknown}")
+        self.strategies[name] = tuple(tuple(clause) for clause in clauses)
+
+    def compile(self, config: Dict) -> "StrategyTable":
+        return StrategyTable(self, config)
+
+
+class _Compiled(NamedTuple):
+    field: str
+    op: str
+    value: Any # Scalar-path value: strings for categories, thresholds resolved from config
+    code: Any # Batch-path value: category codes, or the Threshold itself (resolved per call)
+    fill: Optional[float]
+
+
+class StrategyTable:
+    """A registry compiled against one config. names are the strategies in priority order."""
+
+    def __init__(self, registry: StrategyRegistry, config: Dict):
+        self.config = config
+        self.names: Tuple[str, ...] = tuple(registry.strategies)
+        self.predicates: Dict[str, _Compiled] = {}
+        for name, pred in registry.predicates.items():
+            value, code = pred.value, pred.value
+            if isinstance(value, Threshold):
+                value = config.get(value.key, value.default)
+            elif pred.field in CATEGORIES:
+                literals = value if pred.op in ("in", "not in") else (value,)
+                codes = tuple(CATEGORIES[pred.field].index(literal) + 1 for literal in literals)
+                code = codes if pred.op in ("in", "not in") else codes[0]
+            self.predicates[name] = _Compiled(pred.field, pred.op, value, code, pred.fill)
+        self.clauses = [registry.strategies[name] for name in self.names]
+
+    # --- One token ---
+
+    @staticmethod
+    def _compare(op: str, x: Any, value: Any) -> bool:
+        if op == "in":
+            return x in value
+        if op == "not in":
+            return x not in value
+        return x is not None and bool(_OPS[op](x, value)) # None never satisfies a comparison
+
+    def match(self, values: Dict[str, Any]) -> List[str]:
+        """Applicable strategies for one token's inputs ({field: value}), in priority order."""
+        results: Dict[str, bool] = {}
+
+        def holds(name: str) -> bool:
+            if name not in results:
+                pred = self.predicates[name]
+                x = values.get(pred.field)
+                if pred.fill is not None and (not x or x != x):
+                    x = pred.fill
+                results[name] = self._compare(pred.op, x, pred.value)
+            return results[name]
+
+        return [name for name, clauses in zip(self.names, self.clauses)
+                if any(all(holds(p) for p in clause) for clause in clauses)]
+
+    # --- Batch ---
+
+    def masks(self, columns: Dict[str, np.ndarray],
+              thresholds: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+        """One boolean mask per strategy over a batch of candidates.
+
+        columns holds one array per field (categories as encode() codes, NaN for missing
+        numbers). thresholds overrides config values by key; an array of shape (C, 1) there
+        evaluates C threshold combinations at once and makes the affected masks (C, N).
+        """
+        thresholds = thresholds or {}
+        evaluated: Dict[str, np.ndarray] = {}
+
+        def mask(name: str) -> np.ndarray:
+            if name not in evaluated:
+                pred = self.predicates[name]
+                x = columns[pred.field]
+                if pred.fill is not None:
+                    x = np.where(np.isnan(x) | (x == 0), pred.fill, x)
+                value = pred.code
+                if isinstance(value, Threshold):
+                    value = thresholds.get(value.key, pred.value)
+                with np.errstate(invalid="ignore"):
+                    if pred.op in ("in", "not in"):
+                        evaluated[name] = np.isin(x, value, invert=pred.op == "not in")
+                    else:
+                        evaluated[name] = _OPS[pred.op](x, value)
+            return evaluated[name]
+
+        out = {}
+        for name, clauses in zip(self.names, self.clauses):
+            result = None
+            for clause in clauses:
+                term = mask(clause[0])
+                for p in clause[1:]:
+                    term = term & mask(p)
+                result = term if result is None else result | term
+            out[name] = result
+        return out
+
+    def first_match(self, columns: Dict[str, np.ndarray], thresholds: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Index + 1 (in names) of the first applicable strategy per candidate, 0 for none."""
+        masks = list(self.masks(columns, thresholds).values())
+        shape = np.broadcast_shapes(*(m.shape for m in masks)) if masks else (len(next(iter(columns.values()))),)
+        return np.select([np.broadcast_to(m, shape) for m in masks],
+                         np.arange(1, len(masks) + 1, dtype=np.int8), default=0).astype(np.int8)
+
+
+def default_registry() -> StrategyRegistry:
+    registry = StrategyRegistry()
+    p = registry.predicate
+    p("hockey_stick", "identified_pattern", "==", "POTENTIAL_HOCKEY_STICK")
+    p("floor_formation", "identified_pattern", "==", "FLOOR_FORMATION_DOUBLE_BOUNCE")
+    p("ema_above", "ema_cross_state", "==", "BULLISH_ABOVE")
+    p("ema_bullish", "ema_cross_state", "in", ("BULLISH_CROSS_RECENT", "BULLISH_ABOVE"))
+    p("rsi_oversold", "rsi_state", "==", "OVERSOLD")
+    p("rsi_rising", "rsi_state", "==", "NEUTRAL_RISING")
+    p("rsi_not_overbought", "rsi_state", "not in", ("OVERBOUGHT",))
+    p("rsi_below_45", "rsi_14_value", "<", 45, fill=0.0)
+    p("rsi_below_68", "rsi_14_value", "<", 68, fill=100.0) # Not too close to overbought
+    p("macd_bullish", "macd_state", "in", ("BULLISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST"))
+    p("asia_volume", "volume_5m_usd", ">", Threshold("asia_min_volume", 50000), fill=0.0)
+    p("post_rug_volume", "volume_5m_usd", ">", Threshold("post_rug_min_volume", 15000), fill=0.0)
+    p("momentum_volume", "volume_5m_usd", ">", Threshold("momentum_min_volume", 20000), fill=0.0)
+    p("momentum_whale_net_buy", "whale_net_buy_15m", ">", Threshold("momentum_min_whale_net_buy", 500.0))
+
+    # Asia Time Hunter: a hockey stick, or an established uptrend on volume. The time-of-day window
+    # (about 11PM - 1AM EST) needs timezone awareness and isn't checked yet.
+    registry.strategy("AsiaTime", ("hockey_stick",), ("ema_above", "asia_volume"))
+    # Post Rug Opportunist: a floor after the rug (identified_pattern stands in for past MCAP history),
+    # on volume, with RSI oversold or turning up from a low level
+    registry.strategy("PostRug", ("floor_formation", "post_rug_volume", "rsi_oversold"),
+                      ("floor_formation", "post_rug_volume", "rsi_rising", "rsi_below_45"))
+    # Momentum Rider: bullish EMA/RSI/MACD plus volume and whale accumulation
+    registry.strategy("MomentumRider", ("ema_bullish", "rsi_not_overbought", "rsi_below_68", "macd_bullish",
+                                        "momentum_volume", "momentum_whale_net_buy"))
+    return registry
+
+
+DEFAULT_REGISTRY = default_registry()
+
 
 class StrategyEngine:
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, registry: Optional[StrategyRegistry] = None):
         self.config = config
+        self.table = (registry or DEFAULT_REGISTRY).compile(config)
+
+    @staticmethod
+    def inputs(token: TokenSnapshot, ta_result: TechnicalAnalysisResult,
+               whale_summary: WhaleSummaryResult) -> Dict[str, Any]:
+        return {
+            "identified_pattern": ta_result.identified_pattern,
+            "ema_cross_state": ta_result.ema_cross_state,
+            "rsi_state": ta_result.rsi_state,
+            "macd_state": ta_result.macd_state,
+            "rsi_14_value": ta_result.rsi_14_value,
+            "volume_5m_usd": token.volume.five_min_usd,
+            "whale_net_buy_15m": whale_summary.net_buy_volume_usd_15m,
+        }
 
     def get_applicable_strategies(
         self,
@@ -13,38 +236,29 @@ class StrategyEngine:
         whale_summary: WhaleSummaryResult,
         security_result: SecurityCheckResult # Needed to avoid suggesting strategies for unsafe tokens
     ) -> List[str]:
-        applicable = []
-
-        if security_result.overall_status in ["SCAM_LIKELY", "HIGH_RISK"]:
-            return [] # Don't suggest strategies for very risky tokens
-
-        # --- Asia Time Hunter ---
-        # Simplistic time check - a real one needs timezone awareness
-        # current_hour_est = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=-5))).hour
-        # if 23 <= current_hour_est or current_hour_est <= 1: # Approx 11PM - 1AM EST
-        if ta_result.identified_pattern == "POTENTIAL_HOCKEY_STICK" or \
-           (ta_result.ema_cross_state == "BULLISH_ABOVE" and (token.volume.five_min_usd or 0) > self.config.get("asia_min_volume", 50000)):
-            # Add (mock) meta fit check here if possible
-            applicable.append("AsiaTime")
-
-        # --- Post Rug Opportunist ---
-        # Condition: Token had a significant past run-up & rug, now showing floor formation
-        # This requires knowledge of past MCAP, which isn't directly in TokenSnapshot unless it's stored
-        # For now, rely on ta_result.identified_pattern
-        if ta_result.identified_pattern == "FLOOR_FORMATION_DOUBLE_BOUNCE" and \
-           (token.volume.five_min_usd or 0) > self.config.get("post_rug_min_volume", 15000) and \
-           ta_result.rsi_state == "OVERSOLD" or (ta_result.rsi_state == "NEUTRAL_RISING" and (ta_result.rsi_14_value or 0) < 45) :
-            applicable.append("PostRug")
-
-        # --- Momentum Rider ---
-        is_bullish_ta = (
-            ta_result.ema_cross_state in ["BULLISH_CROSS_RECENT", "BULLISH_ABOVE"] and
-            ta_result.rsi_state not in ["OVERBOUGHT"] and (ta_result.rsi_14_value or 100) < 68 and # Not too close to overbought
-            ta_result.macd_state in ["BULLISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST"]
-        )
-        if is_bullish_ta and \
-           (token.volume.five_min_usd or 0) > self.config.get("momentum_min_volume", 20000) and \
-           whale_summary.net_buy_volume_usd_15m > self.config.get("momentum_min_whale_net_buy", 500.0):
-            applicable.append("MomentumRider")
-
-        return list(set(applicable)) # Ensure unique strategies
\ No newline at end of file
+        """Applicable strategies in priority order (registry order: AsiaTime, PostRug, MomentumRider)."""
+        if security_result.overall_status in RISKY_STATUSES:
+            return []
+        return self.table.match(self.inputs(token, ta_result, whale_summary))
+
+    def batch_columns(self, tokens: Sequence[TokenSnapshot], ta_results: Sequence[TechnicalAnalysisResult],
+                      whale_summaries: Sequence[WhaleSummaryResult]) -> Dict[str, np.ndarray]:
+        """Columns for StrategyTable.masks() from per-token results."""
+        columns: Dict[str, np.ndarray] = {
+            field: encode(field, [getattr(ta, field) for ta in ta_results]) for field in CATEGORIES}
+        as_float = lambda values: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        columns["rsi_14_value"] = as_float([ta.rsi_14_value for ta in ta_results])
+        columns["volume_5m_usd"] = as_float([token.volume.five_min_usd for token in tokens])
+        columns["whale_net_buy_15m"] = as_float([whale.net_buy_volume_usd_15m for whale in whale_summaries])
+        return columns
+
+    def applicable_batch(self, tokens: Sequence[TokenSnapshot], ta_results: Sequence[TechnicalAnalysisResult],
+                         whale_summaries: Sequence[WhaleSummaryResult],
+                         security_results: Sequence[SecurityCheckResult]) -> List[List[str]]:
+        """get_applicable_strategies() for many tokens, with every strategy evaluated as array masks."""
+        if not tokens:
+            return []
+        masks = self.table.masks(self.batch_columns(tokens, ta_results, whale_summaries))
+        allowed = np.array([s.overall_status not in RISKY_STATUSES for s in security_results], dtype=bool)
+        matrix = np.stack([masks[name] & allowed for name in self.table.names], axis=1).tolist()
+        return [[name for name, hit in zip(self.table.names, row) if hit] for row in matrix]
@@ -1,8 +1,14 @@
 # core/technical_analyzer.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from core.models import TokenSnapshot, TechnicalAnalysisResult, Candle
+from core.indicators import IndicatorState, ema_rows, rsi_rows, macd_rows
+from core.patterns import PatternDetector, pattern_names
+import numpy as np
 import pandas as pd
 import pandas_ta as ta # Make sure to install this: pip install pandas_ta
+from utils.metrics import get_metrics
+
+_metrics = get_metrics()
 
 class TechnicalAnalyzer:
     def __init__(self, config: Dict):
@@ -12,18 +18,39 @@ class TechnicalAnalyzer:
         self.rsi_overbought = config.get("ta_rsi_overbought", 70)
         self.rsi_oversold = config.get("ta_rsi_oversold", 30)
         # MACD default periods are usually fine (12, 26, 9)
+        self.macd_fast, self.macd_slow, self.macd_signal = 12, 26, 9
+        self.min_bars = max(self.ema_long_period, self.rsi_period, self.macd_slow)
+        # Timeframes tried in order until one has enough bars (any key of historicalCandleData,
+        # e.g. "15m" or "1h" bars maintained by core/resampler.py)
+        self.timeframes: List[str] = list(config.get("ta_timeframes", ["1m", "5m"]))
+        # Chart patterns for identified_pattern (core/patterns.py), from the last `lookback` bars
+        self.patterns = PatternDetector(config) if config.get("ta_patterns", True) else None
+        # Streaming mode: one IndicatorState per (token_id, timeframe)
+        self._stream_states: Dict[Tuple[str, str], IndicatorState] = {}
+
+    @staticmethod
+    def _is_columnar(series: Any) -> bool:
+        # CandleColumns (utils.candle_store) or anything else exposing NumPy OHLCV columns
+        return hasattr(series, "close") and hasattr(series, "timestamp")
 
     def _get_candle_dataframe(self, historical_data: Dict[str, List[Dict[str, Any]]], timeframe: str = "1m") -> Optional[pd.DataFrame]:
-        if timeframe not in historical_data or not historical_data[timeframe]:
+        series = historical_data.get(timeframe)
+        if series is None or len(series.close if self._is_columnar(series) else series) == 0:
             print(f"Warning: No historical data for timeframe {timeframe}")
             return None
         try:
-            df = pd.DataFrame(historical_data[timeframe])
-            # Ensure correct dtypes - this is critical for TA libraries
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                 df[col] = pd.to_numeric(df[col], errors='coerce')
-            df.set_index('timestamp', inplace=True)
+            if self._is_columnar(series):
+                # Already typed columns with epoch-second timestamps; nothing to parse
+                df = pd.DataFrame({col: getattr(series, col) for col in ['open', 'high', 'low', 'close', 'volume']},
+                                  index=pd.to_datetime(np.asarray(series.timestamp), unit='s'))
+                df.index.name = 'timestamp'
+            else:
+                df = pd.DataFrame(series)
+                # Ensure correct dtypes - this is critical for TA libraries
+                df['timestamp'] = pd.to_datetime(df['timestamp'])
+                for col in ['open', 'high', 'low', 'close', 'volume']:
+                     df[col] = pd.to_numeric(df[col], errors='coerce')
+                df.set_index('timestamp', inplace=True)
             df.dropna(inplace=True) # Drop rows with NaN if any conversion failed
             if len(df) < max(self.ema_long_period, self.rsi_period, 26): # MACD needs at least 26 periods
                 print(f"Warning: Not enough data points ({len(df)}) for TA calculations on timeframe {timeframe}.")
@@ -34,15 +61,74 @@ class TechnicalAnalyzer:
             return None
 
 
-    def analyze(self, token: TokenSnapshot) -> TechnicalAnalysisResult:
-        # Prioritize shorter timeframes for meme coins if available, e.g., "1m" or "5m"
-        # For this example, let's assume we want to use "1m" if available, else "5m"
-        df = self._get_candle_dataframe(token.historicalCandleData, "1m")
-        if df is None or len(df) < 26: # Check length again
-            df = self._get_candle_dataframe(token.historicalCandleData, "5m")
-            if df is None or len(df) < 26:
-                 print(f"TA: Not enough data for {token.ticker} on primary timeframes.")
-                 return TechnicalAnalysisResult(token_id=token.tokenId) # Return empty result
+    # --- State classification (shared by the pandas_ta path and the streaming path) ---
+    # None/NaN inputs compare False, matching how the pandas Series comparisons behave.
+
+    def _count_timeframe(self, timeframe: Optional[str]):
+        """Which timeframe TA ran on: the first of ta_timeframes normally, a later one when it's too short,
+        None if none is usable."""
+        if not _metrics.enabled:
+            return
+        if timeframe is None:
+            _metrics.inc("ta_insufficient_data")
+            return
+        _metrics.inc("ta_timeframe", timeframe=timeframe)
+        if timeframe != self.timeframes[0]:
+            _metrics.inc("ta_fallback", source=self.timeframes[0], target=timeframe)
+
+    @staticmethod
+    def _nan_if_none(value: Optional[float]) -> float:
+        return float("nan") if value is None else value
+
+    def _classify_ema_cross(self, short_now, long_now, short_prev, long_prev) -> str:
+        short_now, long_now = self._nan_if_none(short_now), self._nan_if_none(long_now)
+        short_prev, long_prev = self._nan_if_none(short_prev), self._nan_if_none(long_prev)
+        if short_now > long_now and short_prev <= long_prev:
+            return "BULLISH_CROSS_RECENT"
+        elif short_now < long_now and short_prev >= long_prev:
+            return "BEARISH_CROSS_RECENT"
+        elif short_now > long_now:
+            return "BULLISH_ABOVE"
+        elif short_now < long_now:
+            return "BEARISH_BELOW"
+        return "NEUTRAL"
+
+    def _classify_rsi(self, rsi_now, rsi_prev, has_prev: bool = True) -> str:
+        rsi_now, rsi_prev = self._nan_if_none(rsi_now), self._nan_if_none(rsi_prev)
+        if rsi_now > self.rsi_overbought:
+            return "OVERBOUGHT"
+        elif rsi_now < self.rsi_oversold:
+            return "OVERSOLD"
+        elif has_prev:
+            if rsi_now > rsi_prev: # Rising
+                return "NEUTRAL_RISING"
+            return "NEUTRAL_FALLING"
+        return "NEUTRAL"
+
+    def _classify_macd(self, hist_now, hist_prev, has_prev: bool = True) -> str:
+        hist_now, hist_prev = self._nan_if_none(hist_now), self._nan_if_none(hist_prev)
+        if hist_now > 0 and (not has_prev or hist_prev <= 0):
+            return "BULLISH_CROSS_HIST" # Histogram just crossed positive
+        elif hist_now < 0 and (not has_prev or hist_prev >= 0):
+            return "BEARISH_CROSS_HIST"
+        elif hist_now > 0:
+            return "BULLISH_MOMENTUM_HIST"
+        elif hist_now < 0:
+            return "BEARISH_MOMENTUM_HIST"
+        return "NEUTRAL"
+
+    def analyze(self, token: TokenSnapshot, timeframes: Optional[List[str]] = None) -> TechnicalAnalysisResult:
+        # Prioritize shorter timeframes for meme coins if available: "1m", else "5m" by default
+        # (ta_timeframes), or whatever the caller asks for
+        for timeframe in timeframes or self.timeframes:
+            df = self._get_candle_dataframe(token.historicalCandleData, timeframe)
+            if df is not None and len(df) >= 26: # Check length again
+                break
+        else:
+            self._count_timeframe(None)
+            print(f"TA: Not enough data for {token.ticker} on primary timeframes.")
+            return TechnicalAnalysisResult(token_id=token.tokenId) # Return empty result
+        self._count_timeframe(timeframe)
 
         close_prices = df['close']
 
@@ -51,14 +137,8 @@ class TechnicalAnalyzer:
         ema_long = ta.ema(close_prices, length=self.ema_long_period)
         ema_cross_state = "NEUTRAL"
         if ema_short is not None and ema_long is not None and not ema_short.empty and not ema_long.empty:
-            if ema_short.iloc[-1] > ema_long.iloc[-1] and ema_short.iloc[-2] <= ema_long.iloc[-2]:
-                ema_cross_state = "BULLISH_CROSS_RECENT"
-            elif ema_short.iloc[-1] < ema_long.iloc[-1] and ema_short.iloc[-2] >= ema_long.iloc[-2]:
-                ema_cross_state = "BEARISH_CROSS_RECENT"
-            elif ema_short.iloc[-1] > ema_long.iloc[-1]:
-                ema_cross_state = "BULLISH_ABOVE"
-            elif ema_short.iloc[-1] < ema_long.iloc[-1]:
-                ema_cross_state = "BEARISH_BELOW"
+            ema_cross_state = self._classify_ema_cross(ema_short.iloc[-1], ema_long.iloc[-1],
+                                                       ema_short.iloc[-2], ema_long.iloc[-2])
         else:
             print(f"TA: Could not calculate EMAs for {token.ticker}")
 
@@ -69,50 +149,32 @@ class TechnicalAnalyzer:
         current_rsi_value = None
         if rsi is not None and not rsi.empty:
             current_rsi_value = rsi.iloc[-1]
-            if current_rsi_value > self.rsi_overbought:
-                rsi_state = "OVERBOUGHT"
-            elif current_rsi_value < self.rsi_oversold:
-                rsi_state = "OVERSOLD"
-            elif len(rsi) > 1:
-                if current_rsi_value > rsi.iloc[-2]: # Rising
-                    rsi_state = "NEUTRAL_RISING"
-                else: # Falling
-                    rsi_state = "NEUTRAL_FALLING"
+            rsi_state = self._classify_rsi(current_rsi_value, rsi.iloc[-2] if len(rsi) > 1 else None, len(rsi) > 1)
         else:
             print(f"TA: Could not calculate RSI for {token.ticker}")
 
 
         # MACD
-        macd_df = ta.macd(close_prices) # Uses default 12, 26, 9
+        macd_df = ta.macd(close_prices, fast=self.macd_fast, slow=self.macd_slow, signal=self.macd_signal)
         macd_state = "NEUTRAL"
         current_macd_val, current_macd_sig, current_macd_hist = None, None, None
         if macd_df is not None and not macd_df.empty:
-            current_macd_val = macd_df[f'MACD_{macd_df.columns[0].split("_")[1]}_{macd_df.columns[0].split("_")[2]}_{macd_df.columns[1].split("_")[2]}'].iloc[-1] # Column names can vary
-            current_macd_sig = macd_df[f'MACDs_{macd_df.columns[0].split("_")[1]}_{macd_df.columns[0].split("_")[2]}_{macd_df.columns[1].split("_")[2]}'].iloc[-1]
-            current_macd_hist = macd_df[f'MACDh_{macd_df.columns[0].split("_")[1]}_{macd_df.columns[0].split("_")[2]}_{macd_df.columns[1].split("_")[2]}'].iloc[-1]
-
-            if current_macd_hist > 0 and (len(macd_df) < 2 or macd_df[f'MACDh_{macd_df.columns[0].split("_")[1]}_{macd_df.columns[0].split("_")[2]}_{macd_df.columns[1].split("_")[2]}'].iloc[-2] <=0):
-                macd_state = "BULLISH_CROSS_HIST" # Histogram just crossed positive
-            elif current_macd_hist < 0 and (len(macd_df) < 2 or macd_df[f'MACDh_{macd_df.columns[0].split("_")[1]}_{macd_df.columns[0].split("_")[2]}_{macd_df.columns[1].split("_")[2]}'].iloc[-2] >=0):
-                macd_state = "BEARISH_CROSS_HIST"
-            elif current_macd_hist > 0 :
-                macd_state = "BULLISH_MOMENTUM_HIST"
-            elif current_macd_hist < 0 :
-                macd_state = "BEARISH_MOMENTUM_HIST"
+            # Columns are MACD_f_s_sig, MACDh_f_s_sig and MACDs_f_s_sig; pick them by prefix
+            columns = {col.split("_")[0]: col for col in macd_df.columns}
+            macd_hist = macd_df[columns["MACDh"]]
+            current_macd_val = macd_df[columns["MACD"]].iloc[-1]
+            current_macd_sig = macd_df[columns["MACDs"]].iloc[-1]
+            current_macd_hist = macd_hist.iloc[-1]
+            macd_state = self._classify_macd(current_macd_hist, macd_hist.iloc[-2] if len(macd_df) > 1 else None,
+                                             len(macd_df) > 1)
         else:
             print(f"TA: Could not calculate MACD for {token.ticker}")
 
 
-        # Pattern Recognition (Very Basic Heuristics - needs significant improvement)
+        # Pattern Recognition (hockey stick, floor formation, blow-off top; see core/patterns.py)
         identified_pattern = None
-        # Example: Hockey Stick (needs volume data from df too)
-        if len(close_prices) > 5:
-            price_change_last_5_periods = (close_prices.iloc[-1] - close_prices.iloc[-6]) / close_prices.iloc[-6]
-            # Add volume check here from df['volume']
-            if price_change_last_5_periods > 0.50: # e.g. 50% increase in last 5 periods
-                # A real hockey stick needs more context (low base, rapid acceleration)
-                # identified_pattern = "POTENTIAL_HOCKEY_STICK"
-                pass # This is too naive, leave for later improvement
+        if self.patterns is not None:
+            identified_pattern = self.patterns.detect(close_prices.to_numpy(), df['volume'].to_numpy())
 
 
         return TechnicalAnalysisResult(
@@ -127,4 +189,270 @@ class TechnicalAnalyzer:
             macd_histogram_value=current_macd_hist,
             macd_state=macd_state,
             identified_pattern=identified_pattern
-        )
\ No newline at end of file
+        )
+
+    # --- Streaming mode ---
+    # Each (token, timeframe) keeps an IndicatorState, so appending a candle is O(1)
+    # instead of rebuilding a DataFrame and rerunning pandas_ta over the full history.
+
+    def _get_stream_state(self, token_id: str, timeframe: str) -> IndicatorState:
+        key = (token_id, timeframe)
+        state = self._stream_states.get(key)
+        if state is None:
+            state = IndicatorState(self.ema_short_period, self.ema_long_period, self.rsi_period,
+                                   self.macd_fast, self.macd_slow, self.macd_signal,
+                                   window=self.patterns.lookback if self.patterns is not None else 0)
+            self._stream_states[key] = state
+        return state
+
+    def stream_state(self, token_id: str, timeframe: str = "1m") -> IndicatorState:
+        """The token's streaming IndicatorState on one timeframe, for callers that feed bars themselves."""
+        return self._get_stream_state(token_id, timeframe)
+
+    def stream_result(self, token_id: str, timeframe: str = "1m") -> TechnicalAnalysisResult:
+        """Current TA result of the token's streaming state on one timeframe."""
+        return self._stream_result(token_id, self._get_stream_state(token_id, timeframe))
+
+    def _stream_result(self, token_id: str, state: IndicatorState) -> TechnicalAnalysisResult:
+        if state.bars < self.min_bars:
+            return TechnicalAnalysisResult(token_id=token_id)
+        macd = state.macd
+        return TechnicalAnalysisResult(
+            token_id=token_id,
+            ema_9_value=state.ema_short.value,
+            ema_21_value=state.ema_long.value,
+            ema_cross_state=self._classify_ema_cross(state.ema_short.value, state.ema_long.value,
+                                                     state.prev_ema_short, state.prev_ema_long),
+            rsi_14_value=state.rsi.value,
+            rsi_state=self._classify_rsi(state.rsi.value, state.prev_rsi),
+            macd_value=macd.macd,
+            macd_signal_value=macd.signal,
+            macd_histogram_value=macd.histogram,
+            macd_state=self._classify_macd(macd.histogram, state.prev_histogram),
+            identified_pattern=self.patterns.detect(state.closes, state.volumes) if self.patterns is not None else None
+        )
+
+    def _append_candle(self, state: IndicatorState, candle: Dict[str, Any], partial: bool = False) -> bool:
+        try:
+            close = float(candle['close'])
+        except (KeyError, TypeError, ValueError):
+            return False # Same as the dropna() in _get_candle_dataframe
+        if close != close: # NaN
+            return False
+        try:
+            volume = float(candle.get('volume') or 0.0)
+        except (TypeError, ValueError):
+            volume = 0.0
+        state.update(close, candle.get('timestamp'), partial, volume)
+        return True
+
+    def update_candle(self, token_id: str, candle: Dict[str, Any], timeframe: str = "1m",
+                      partial: bool = False) -> TechnicalAnalysisResult:
+        """Appends one candle to the token's streaming state and returns the updated TA result.
+
+        partial=True marks a candle that is still forming; the next update with the same
+        timestamp replaces it rather than adding a bar.
+        """
+        state = self._get_stream_state(token_id, timeframe)
+        self._append_candle(state, candle, partial)
+        return self._stream_result(token_id, state)
+
+    def _sync_stream(self, token_id: str, candles: List[Dict[str, Any]], timeframe: str) -> IndicatorState:
+        state = self._get_stream_state(token_id, timeframe)
+        if self._is_columnar(candles):
+            # Timestamps are sorted epoch seconds, so the first unseen bar is a binary search away
+            start = 0 if state.last_timestamp is None else \
+                int(np.searchsorted(candles.timestamp, state.last_timestamp, side="right"))
+            for timestamp, close, volume in zip(candles.timestamp[start:].tolist(), candles.close[start:].tolist(),
+                                                candles.volume[start:].tolist()):
+                state.update(close, timestamp, volume=volume)
+            return state
+        # Walk back from the end to find candles newer than the last one consumed: O(new candles)
+        new_candles = []
+        for candle in reversed(candles):
+            if state.last_timestamp is not None and candle.get('timestamp') is not None \
+                    and candle['timestamp'] <= state.last_timestamp:
+                break
+            new_candles.append(candle)
+        for candle in reversed(new_candles):
+            self._append_candle(state, candle)
+        return state
+
+    def analyze_incremental(self, token: TokenSnapshot) -> TechnicalAnalysisResult:
+        """Streaming counterpart of analyze(): only candles not seen on a previous call are processed."""
+        candle_data = token.historicalCandleData or {}
+        for timeframe in self.timeframes:
+            series = candle_data.get(timeframe)
+            state = self._sync_stream(token.tokenId, series if series is not None else [], timeframe)
+            if state.bars >= self.min_bars:
+                break
+        else:
+            self._count_timeframe(None)
+            print(f"TA: Not enough data for {token.ticker} on primary timeframes.")
+            return TechnicalAnalysisResult(token_id=token.tokenId)
+        self._count_timeframe(timeframe)
+        return self._stream_result(token.tokenId, state)
+
+    def reset_stream(self, token_id: Optional[str] = None):
+        """Drops streaming state for one token (e.g. after a data gap), or for all tokens."""
+        if token_id is None:
+            self._stream_states.clear()
+            return
+        for key in [k for k in self._stream_states if k[0] == token_id]:
+            del self._stream_states[key]
+
+    # --- Batch mode ---
+    # One padded (tokens x bars) float64 matrix per call; indicators and states are
+    # computed for every row in vectorized passes instead of one DataFrame per token.
+
+    @staticmethod
+    def _close_volume_values(candles: List[Dict[str, Any]]) -> Tuple[List[float], List[float]]:
+        closes, volumes = [], []
+        for candle in candles or []:
+            try:
+                close = float(candle['close'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if close == close: # Drop NaN like _get_candle_dataframe does
+                closes.append(close)
+                try:
+                    volumes.append(float(candle.get('volume') or 0.0))
+                except (TypeError, ValueError):
+                    volumes.append(0.0)
+        return closes, volumes
+
+    def _select_series(self, candle_data: Dict[str, Any]) -> Optional[Tuple[Any, Any]]:
+        """(closes, volumes) of the first usable timeframe (1m, else 5m by default): lists, or the column views as-is."""
+        for timeframe in self.timeframes:
+            series = candle_data.get(timeframe)
+            if self._is_columnar(series):
+                closes, volumes = series.close, series.volume
+            else:
+                closes, volumes = self._close_volume_values(series)
+            if len(closes) >= self.min_bars:
+                self._count_timeframe(timeframe)
+                return closes, volumes
+        self._count_timeframe(None)
+        return None
+
+    def _select_closes(self, candle_data: Dict[str, Any]) -> Optional[Any]:
+        """Close prices of the first usable timeframe: a list, or the column view as-is."""
+        selected = self._select_series(candle_data)
+        return selected[0] if selected is not None else None
+
+    def _batch_closes(self, token: TokenSnapshot) -> Optional[Any]:
+        return self._select_closes(token.historicalCandleData or {})
+
+    def _batch_series(self, token: TokenSnapshot) -> Optional[Tuple[Any, Any]]:
+        return self._select_series(token.historicalCandleData or {})
+
+    def detect_patterns(self, series: List[Optional[Tuple[Any, Any]]]) -> List[Optional[str]]:
+        """identified_pattern for each (closes, volumes) pair (None rows stay None), in one batched pass
+        over the last `lookback` bars of every row."""
+        if self.patterns is None:
+            return [None] * len(series)
+        rows = [row for row, pair in enumerate(series) if pair is not None]
+        names: List[Optional[str]] = [None] * len(series)
+        if rows:
+            codes = self.patterns.detect_last([series[row][0] for row in rows], [series[row][1] for row in rows])
+            for row, name in zip(rows, pattern_names(codes)):
+                names[row] = name
+        return names
+
+    def _classify_ema_cross_rows(self, short_now, long_now, short_prev, long_prev) -> np.ndarray:
+        above, below = short_now > long_now, short_now < long_now
+        return np.select(
+            [above & (short_prev <= long_prev), below & (short_prev >= long_prev), above, below],
+            ["BULLISH_CROSS_RECENT", "BEARISH_CROSS_RECENT", "BULLISH_ABOVE", "BEARISH_BELOW"],
+            default="NEUTRAL")
+
+    def _classify_rsi_rows(self, rsi_now, rsi_prev) -> np.ndarray:
+        return np.select(
+            [rsi_now > self.rsi_overbought, rsi_now < self.rsi_oversold, rsi_now > rsi_prev],
+            ["OVERBOUGHT", "OVERSOLD", "NEUTRAL_RISING"],
+            default="NEUTRAL_FALLING")
+
+    def _classify_macd_rows(self, hist_now, hist_prev) -> np.ndarray:
+        positive, negative = hist_now > 0, hist_now < 0
+        return np.select(
+            [positive & (hist_prev <= 0), negative & (hist_prev >= 0), positive, negative],
+            ["BULLISH_CROSS_HIST", "BEARISH_CROSS_HIST", "BULLISH_MOMENTUM_HIST", "BEARISH_MOMENTUM_HIST"],
+            default="NEUTRAL")
+
+    def analyze_close_matrix(self, closes: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+        """Runs EMA/RSI/MACD over a left-aligned, NaN-padded close matrix.
+
+        Returns one array per TechnicalAnalysisResult field (last bar of each row);
+        rows shorter than min_bars are left as NaN / None states.
+        """
+        rows = np.arange(closes.shape[0])
+        last = np.maximum(lengths - 1, 0)
+        prev = np.maximum(lengths - 2, 0)
+        with np.errstate(invalid="ignore"):
+            ema_short = ema_rows(closes, self.ema_short_period)
+            ema_long = ema_rows(closes, self.ema_long_period)
+            rsi = rsi_rows(closes, self.rsi_period)
+            macd, macd_signal, macd_hist = macd_rows(closes, self.macd_fast, self.macd_slow, self.macd_signal)
+
+            fields = {
+                "ema_9_value": ema_short[rows, last],
+                "ema_21_value": ema_long[rows, last],
+                "rsi_14_value": rsi[rows, last],
+                "macd_value": macd[rows, last],
+                "macd_signal_value": macd_signal[rows, last],
+                "macd_histogram_value": macd_hist[rows, last],
+            }
+            fields["ema_cross_state"] = self._classify_ema_cross_rows(
+                fields["ema_9_value"], fields["ema_21_value"], ema_short[rows, prev], ema_long[rows, prev])
+            fields["rsi_state"] = self._classify_rsi_rows(fields["rsi_14_value"], rsi[rows, prev])
+            fields["macd_state"] = self._classify_macd_rows(fields["macd_histogram_value"], macd_hist[rows, prev])
+
+        short_rows = lengths < self.min_bars
+        for name in ("ema_cross_state", "rsi_state", "macd_state"):
+            fields[name] = fields[name].astype(object)
+            fields[name][short_rows] = None
+        return fields
+
+    def _result_from_fields(self, token_id: str, fields: Dict[str, np.ndarray], row: int,
+                            identified_pattern: Optional[str] = None) -> TechnicalAnalysisResult:
+        value_fields = ("ema_9_value", "ema_21_value", "rsi_14_value",
+                        "macd_value", "macd_signal_value", "macd_histogram_value")
+        values = {name: fields[name][row].item() for name in value_fields}
+        return TechnicalAnalysisResult(
+            token_id=token_id,
+            ema_cross_state=fields["ema_cross_state"][row],
+            rsi_state=fields["rsi_state"][row],
+            macd_state=fields["macd_state"][row],
+            identified_pattern=identified_pattern,
+            **{name: (None if value != value else value) for name, value in values.items()}
+        )
+
+    def analyze_columns(self, token_id: str, candle_columns: Dict[str, Any]) -> TechnicalAnalysisResult:
+        """TA straight from column views (e.g. CandleStore.load()): the close array is used in place."""
+        selected = self._select_series(candle_columns)
+        if selected is None:
+            print(f"TA: Not enough data for {token_id} on primary timeframes.")
+            return TechnicalAnalysisResult(token_id=token_id)
+        closes = np.asarray(selected[0], dtype=np.float64).reshape(1, -1) # A view for float64 input
+        fields = self.analyze_close_matrix(closes, np.array([closes.shape[1]], dtype=np.int64))
+        return self._result_from_fields(token_id, fields, 0, self.detect_patterns([selected])[0])
+
+    def analyze_batch(self, tokens: List[TokenSnapshot]) -> List[TechnicalAnalysisResult]:
+        """Batched analyze(): one TechnicalAnalysisResult per token, in input order."""
+        series = [self._batch_series(token) for token in tokens]
+        lengths = np.array([0 if pair is None else len(pair[0]) for pair in series], dtype=np.int64)
+        closes = np.full((len(tokens), int(lengths.max()) if len(tokens) else 0), np.nan, dtype=np.float64)
+        for row, pair in enumerate(series):
+            if pair is not None:
+                closes[row, :len(pair[0])] = pair[0]
+
+        fields = self.analyze_close_matrix(closes, lengths) if len(tokens) else {}
+        patterns = self.detect_patterns(series)
+        results = []
+        for row, token in enumerate(tokens):
+            if series[row] is None:
+                print(f"TA: Not enough data for {token.ticker} on primary timeframes.")
+                results.append(TechnicalAnalysisResult(token_id=token.tokenId))
+                continue
+            results.append(self._result_from_fields(token.tokenId, fields, row, patterns[row]))
+        return results
@@ -0,0 +1,109 @@
+# core/token_table.py
+# Columnar view of a token universe: one float64 NumPy column per scalar snapshot
+# field, addressed by its dotted attribute path ("volume.five_min_usd"), so filters
+# are boolean masks over whole columns instead of attribute walks per token.
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from core.models import TokenSnapshot
+
+DEFAULT_FIELDS = (
+    "marketCap",
+    "volume.five_min_usd",
+    "volume.one_hr_usd",
+    "volume.six_hr_usd",
+    "volume.twenty_four_hr_usd",
+    "holders.count",
+    "holders.top10HolderPercent",
+    "liquidity.poolSizeUSD",
+    "liquidity.lpBurnedPercent",
+    "bondingCurvePercent",
+    "devMigrations",
+    "technicalAnalysis.priceUSD",
+)
+
+
+def _scalar(value: Any) -> float:
+    # None -> NaN, bools -> 1/0, numbers as-is, any other object -> its truthiness (a presence flag)
+    if value is None:
+        return np.nan
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    return 1.0 if value else 0.0
+
+
+def extract_column(tokens: Sequence[Any], path: str) -> np.ndarray:
+    parts = path.split(".")
+    values = np.empty(len(tokens), dtype=np.float64)
+    for i, token in enumerate(tokens):
+        obj = token
+        for part in parts:
+            obj = getattr(obj, part, None)
+            if obj is None:
+                break
+        values[i] = _scalar(obj)
+    return values
+
+
+class TokenTable:
+    def __init__(self, token_ids: Sequence[str], columns: Dict[str, np.ndarray],
+                 tokens: Optional[Sequence[TokenSnapshot]] = None):
+        self.token_ids = list(token_ids)
+        self.columns = columns
+        self.tokens = tokens # Source snapshots, if built from them (needed for lazy columns and take())
+        self._market_cap_order: Optional[np.ndarray] = None
+        self._market_cap_sorted: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_snapshots(cls, tokens: Sequence[TokenSnapshot], fields: Iterable[str] = DEFAULT_FIELDS) -> "TokenTable":
+        tokens = list(tokens)
+        return cls([t.tokenId for t in tokens], {path: extract_column(tokens, path) for path in fields}, tokens)
+
+    @classmethod
+    def from_columns(cls, token_ids: Sequence[str], columns: Dict[str, Any]) -> "TokenTable":
+        """For feeds that already arrive columnar; no snapshot objects are created."""
+        return cls(token_ids, {path: np.asarray(values, dtype=np.float64) for path, values in columns.items()})
+
+    def __len__(self) -> int:
+        return len(self.token_ids)
+
+    def column(self, path: str) -> np.ndarray:
+        """Column for a dotted field path; extracted from the source snapshots on first use."""
+        values = self.columns.get(path)
+        if values is None:
+            if self.tokens is None:
+                raise KeyError(f"TokenTable has no column '{path}' and no source snapshots to extract it from")
+            values = self.columns[path] = extract_column(self.tokens, path)
+        return values
+
+    def ensure_columns(self, paths: Iterable[str]):
+        for path in paths:
+            self.column(path)
+
+    def take(self, indices: np.ndarray) -> List[TokenSnapshot]:
+        if self.tokens is None:
+            raise ValueError("TokenTable was built from columns; use subset() instead")
+        return [self.tokens[i] for i in indices]
+
+    def subset(self, indices: np.ndarray) -> "TokenTable":
+        indices = np.asarray(indices, dtype=np.int64)
+        return TokenTable([self.token_ids[i] for i in indices],
+                          {path: values[indices] for path, values in self.columns.items()},
+                          self.take(indices) if self.tokens is not None else None)
+
+    # --- Sorted market-cap index ---
+
+    def _build_market_cap_index(self):
+        market_cap = self.column("marketCap")
+        order = np.argsort(market_cap, kind="stable") # NaNs sort to the end
+        self._market_cap_order = order
+        self._market_cap_sorted = market_cap[order]
+
+    def market_cap_range(self, low: float, high: float) -> np.ndarray:
+        """Row indices with low <= marketCap <= high (ascending row order), via binary search."""
+        if self._market_cap_order is None:
+            self._build_market_cap_index()
+        start = np.searchsorted(self._market_cap_sorted, low, side="left")
+        end = np.searchsorted(self._market_cap_sorted, high, side="right")
+        return np.sort(self._market_cap_order[start:end])
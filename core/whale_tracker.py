@@ -1,15 +1,169 @@
 # core/whale_tracker.py
-from typing import List, Dict, Set
-from core.models import TokenSnapshot, WhaleSummaryResult
+from collections import deque
+from typing import List, Dict, Set, Any, Optional, Iterable
+from core.models import TokenSnapshot, WhaleSummaryResult, TransactionSeries, parse_timestamp
+
+
+class WhaleWindow:
+    """Rolling tracked-whale flow for one token over the lookback window.
+
+    Events are kept in timestamp order and expired from the left of a deque, so
+    each one is added and removed exactly once (amortized O(1)) instead of
+    rescanning the window on every query. A late transaction that is still inside
+    the window is inserted at its place in time order rather than appended (feeds
+    deliver slightly out of order; the scan back from the tail is short); one
+    already outside the window is dropped.
+    """
+    __slots__ = ("window_seconds", "events", "net_buy_usd", "buy_counts", "last_timestamp")
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self.events: deque = deque() # (timestamp, wallet, signed_usd, is_buy)
+        self.net_buy_usd = 0.0
+        self.buy_counts: Dict[str, int] = {} # wallet -> buys still inside the window
+        self.last_timestamp: Optional[int] = None
+
+    def add(self, timestamp: int, wallet: str, amount_usd: float, is_buy: bool):
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp - self.window_seconds:
+            return # Already outside the window
+        signed_usd = amount_usd if is_buy else -amount_usd
+        events = self.events
+        if events and timestamp < events[-1][0]:
+            i = len(events) - 1
+            while i > 0 and events[i - 1][0] > timestamp:
+                i -= 1
+            events.insert(i, (timestamp, wallet, signed_usd, is_buy))
+        else:
+            events.append((timestamp, wallet, signed_usd, is_buy))
+        self.net_buy_usd += signed_usd
+        if is_buy:
+            self.buy_counts[wallet] = self.buy_counts.get(wallet, 0) + 1
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            self.last_timestamp = timestamp
+        self.expire(self.last_timestamp)
+
+    def expire(self, now: int):
+        cutoff = now - self.window_seconds
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            _, wallet, signed_usd, is_buy = events.popleft()
+            self.net_buy_usd -= signed_usd
+            if is_buy:
+                remaining = self.buy_counts[wallet] - 1
+                if remaining:
+                    self.buy_counts[wallet] = remaining
+                else:
+                    del self.buy_counts[wallet]
+        if not events:
+            self.net_buy_usd = 0.0 # Reset float drift whenever the window empties
+
+    @property
+    def distinct_buying_whales(self) -> int:
+        return len(self.buy_counts)
+
 
 class WhaleTracker:
     def __init__(self, config: Dict, tracked_whale_wallets: Set[str]):
-        self.tracked_wallets = tracked_whale_wallets
+        self.tracked_wallets = tracked_whale_wallets # Any container with `in` (a set or a WalletIndex)
         self.lookback_period_minutes = config.get("whale_lookback_minutes", 15)
+        self._windows: Dict[str, WhaleWindow] = {}
+        self._consumed: Dict[str, int] = {} # token_id -> transactions of its stream already ingested
+
+    def _window(self, token_id: str) -> WhaleWindow:
+        window = self._windows.get(token_id)
+        if window is None:
+            window = self._windows[token_id] = WhaleWindow(self.lookback_period_minutes * 60)
+        return window
+
+    def ingest(self, token_id: str, txn: Dict[str, Any]):
+        """Feeds one transaction dict (timestamp, type, walletAddress, amountUSD) into the token's window."""
+        wallet = txn.get("walletAddress")
+        if wallet not in self.tracked_wallets:
+            return
+        try:
+            timestamp = parse_timestamp(txn["timestamp"])
+            amount_usd = float(txn.get("amountUSD") or 0.0)
+        except (KeyError, TypeError, ValueError):
+            return
+        self._window(token_id).add(timestamp, wallet, amount_usd, txn.get("type") == "BUY")
+
+    def _tracked_flags(self, wallets: List[str]) -> List[bool]:
+        # A WalletIndex answers a whole batch in one vectorized lookup; a set goes one by one
+        contains_many = getattr(self.tracked_wallets, "contains_many", None)
+        if contains_many is not None:
+            return contains_many(wallets).tolist()
+        return [wallet in self.tracked_wallets for wallet in wallets]
+
+    def ingest_many(self, token_id: str, transactions: Iterable[Dict[str, Any]]):
+        transactions = list(transactions)
+        wallets = list({txn.get("walletAddress") for txn in transactions} - {None})
+        tracked = {wallet for wallet, hit in zip(wallets, self._tracked_flags(wallets)) if hit}
+        for txn in transactions:
+            wallet = txn.get("walletAddress")
+            if wallet not in tracked:
+                continue
+            try:
+                timestamp = parse_timestamp(txn["timestamp"])
+                amount_usd = float(txn.get("amountUSD") or 0.0)
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._window(token_id).add(timestamp, wallet, amount_usd, txn.get("type") == "BUY")
+
+    def _ingest_series(self, token_id: str, series: TransactionSeries, start: int):
+        window = self._window(token_id)
+        tracked = self._tracked_flags(series.wallets) # One lookup per distinct wallet
+        for i in range(start, len(series)):
+            wallet_id = series.wallet[i]
+            if tracked[wallet_id]:
+                window.add(series.timestamp[i], series.wallets[wallet_id], series.amount_usd[i], series.side[i] > 0)
+
+    def summary(self, token_id: str, now: Optional[int] = None) -> WhaleSummaryResult:
+        """Current window totals; `now` (epoch seconds) expires anything older than the lookback."""
+        window = self._windows.get(token_id)
+        if window is None:
+            return WhaleSummaryResult(token_id=token_id)
+        if now is not None:
+            window.expire(now)
+        return WhaleSummaryResult(
+            token_id=token_id,
+            net_buy_volume_usd_15m=window.net_buy_usd,
+            distinct_buying_whales_15m=window.distinct_buying_whales
+        )
+
+    def reset(self, token_id: Optional[str] = None):
+        if token_id is None:
+            self._windows.clear()
+            self._consumed.clear()
+        else:
+            self._windows.pop(token_id, None)
+            self._consumed.pop(token_id, None)
+
+    def _sync_stream(self, token: TokenSnapshot) -> bool:
+        """Ingests transactions not seen on a previous call. False if the token has no stream."""
+        stream = token.transactionStream
+        if stream is None or len(stream) == 0:
+            return False
+        start = self._consumed.get(token.tokenId, 0)
+        if start > len(stream): # Stream was replaced by a shorter one; start over
+            self.reset(token.tokenId)
+            start = 0
+        if isinstance(stream, TransactionSeries):
+            self._ingest_series(token.tokenId, stream, start)
+        else:
+            self.ingest_many(token.tokenId, stream[start:])
+        self._consumed[token.tokenId] = len(stream)
+        self._window(token.tokenId) # A stream with no whale activity still yields a (zero) window
+        return True
+
+    def analyze(self, token: TokenSnapshot, now: Optional[int] = None) -> WhaleSummaryResult:
+        if self._sync_stream(token):
+            if now is None and token.timestampCollected:
+                try:
+                    now = parse_timestamp(token.timestampCollected)
+                except ValueError:
+                    now = None
+            return self.summary(token.tokenId, now)
 
-    def analyze(self, token: TokenSnapshot) -> WhaleSummaryResult:
-        # This is a simplified version that uses the pre-aggregated snapshot
-        # A real version would process token.transactionStream
         net_buy_usd = 0.0
         distinct_buyers = 0
 
@@ -17,14 +171,10 @@ class WhaleTracker:
             net_buy_usd = token.whaleActivity.netBuyVolumeLast15MinUSD or 0.0
             distinct_buyers = token.whaleActivity.distinctBuyingWhales or 0
         else:
-            # Placeholder: if you had transactionStream, you'd iterate here
-            # and check if tx.walletAddress is in self.tracked_wallets
-            # and sum up buy/sell amounts within self.lookback_period_minutes
-            print(f"WhaleTracker: No pre-aggregated whaleActivity for {token.ticker}, or transactionStream processing not implemented.")
-            pass
+            print(f"WhaleTracker: No transactionStream or pre-aggregated whaleActivity for {token.ticker}.")
 
         return WhaleSummaryResult(
             token_id=token.tokenId,
             net_buy_volume_usd_15m=net_buy_usd,
             distinct_buying_whales_15m=distinct_buyers
-        )
\ No newline at end of file
+        )
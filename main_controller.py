@@ -1,19 +1,28 @@
 import json
+import os
 import time
+from typing import Dict, List, Optional, Set, Union
 from core import models # This might need to be from core.models import ... depending on your structure
 from utils import data_loader
-from core.recon_filters import Reconnaissance
-from core.security_analyzer import SecurityAnalyzer
-from core.technical_analyzer import TechnicalAnalyzer
-from core.whale_tracker import WhaleTracker
-from core.strategy_engine import StrategyEngine
-from core.decision_engine import DecisionEngine
+from utils.candle_store import CandleStore
+from utils.candle_cache import configure_shared_cache
+from utils.metrics import configure_metrics, SamplingProfiler
+from utils.signal_journal import SignalJournal, replay_positions
+from utils.wallet_index import WalletIndex
+from core.scanner import TokenScanner
+from core.position_book import PositionBook
+from core.async_pipeline import AsyncPipeline
+from core.parallel_ta import ParallelTA
+from core.scheduler import ScanScheduler, SnapshotFileSource
 
 def load_config(filepath="config.json") -> Dict:
     with open(filepath, 'r') as f:
         return json.load(f)
 
-def load_tracked_whales(filepath: str) -> Set[str]:
+def load_tracked_whales(filepath: str, index_path: Optional[str] = None) -> Union[Set[str], WalletIndex]:
+    # A prebuilt index (python -m utils.wallet_index build ...) scales to millions of wallets
+    if index_path and os.path.exists(index_path):
+        return WalletIndex.open(index_path)
     try:
         with open(filepath, 'r') as f:
             return {line.strip() for line in f if line.strip()}
@@ -24,118 +33,101 @@ def load_tracked_whales(filepath: str) -> Set[str]:
 def main():
     print("Starting Vic's Viper AI (Mock Data Mode)...")
     config = load_config()
-    tracked_whales = load_tracked_whales(config.get("tracked_whale_wallets_file", ""))
+    # Counters/timers around every module call; near-free while metrics_enabled is false
+    metrics = configure_metrics(config)
+    profiler = None
+    if config.get("metrics_profile", False):
+        profiler = SamplingProfiler(config.get("metrics_profile_interval_ms", 5) / 1000.0).start()
+    tracked_whales = load_tracked_whales(config.get("tracked_whale_wallets_file", ""), config.get("tracked_whale_index_file"))
 
     # --- Load Mock Data ---
     # Assuming your JSON is structured as a list of token snapshot dicts
     raw_token_snapshots_data = data_loader.load_token_snapshots("mock_data/token_snapshots.json")
     all_token_snapshots: List[models.TokenSnapshot] = []
 
+    pipeline_mode = config.get("pipeline_mode", False)
+
     # Populate historical and transaction data for each snapshot
     for snap_data in raw_token_snapshots_data: # snap_data is now a TokenSnapshot object
-        # The data_loader.py example needs to be more robust to create TokenSnapshot directly
-        # For now, let's assume snap_data is a TokenSnapshot object.
-        # If it's still a dict, you'd instantiate here.
         # snap_data.historicalCandleData = data_loader.load_historical_data(snap_data.tokenId)
-        # snap_data.transactionStream = data_loader.load_transaction_stream(snap_data.tokenId) # If you implement this
+        if not pipeline_mode: # The pipeline's load stage fetches transactions for candidates only
+            snap_data.transactionStream = data_loader.load_transaction_stream(snap_data.tokenId)
         all_token_snapshots.append(snap_data)
 
 
     print(f"Loaded {len(all_token_snapshots)} total token snapshots.")
 
+    # Columnar candle store (python -m utils.candle_store to import the JSON files); JSON otherwise
+    store_path = config.get("candle_store_path")
+    candle_store = CandleStore(store_path) if store_path and os.path.isdir(store_path) else None
+    # Shared across the sell and buy paths (and across scans), bounded by cache_max_bytes
+    candle_cache = configure_shared_cache(config.get("cache_max_bytes", 256 * 1024 * 1024))
+
     # --- Initialize Modules ---
-    recon_module = Reconnaissance(config)
-    security_module = SecurityAnalyzer(config)
-    ta_module = TechnicalAnalyzer(config)
-    whale_module = WhaleTracker(config, tracked_whales)
-    strategy_module = StrategyEngine(config)
-    decision_module = DecisionEngine(config)
+    # Append-only record of every signal and position change; replayed below to restore open positions
+    journal = SignalJournal.from_config(config)
+    scanner = TokenScanner(config, tracked_whales, candle_store, candle_cache, "mock_data/historical_data", journal=journal)
 
     # --- Main Processing Loop (Simulated) ---
-    # In a real system, this would run continuously or on a schedule
-    # For mock data, we process once.
-
-    potential_candidates = recon_module.filter_tokens(all_token_snapshots)
+    # By default the mock data is processed once; scheduler_mode keeps running (core/scheduler.py)
 
     active_positions = {} # Simulate open trades: {token_id: {"entry_price": ..., "amount_held": ..., "buy_strategy": ...}}
-
-    for token in potential_candidates:
-        print(f"\n--- Analyzing Token: {token.ticker} ({token.contractAddress}) ---")
-
-        # If we have an active position, check for SELL signals first
-        if token.tokenId in active_positions:
-            current_pos_details = active_positions[token.tokenId]
-            # Re-run TA and Security for current state
-            # In a real system, you'd fetch fresh data for the token here
-            # For mock, we use the same snapshot, but TA should be on its historical.
-            # We need to ensure the token snapshot being used for TA is the *latest*
-            # For simplicity with mock, we'll use the existing ta_result if available from the snapshot,
-            # but ideally, it should be recalculated based on the *current time* relative to historical data.
-            # This is a limitation of static mock data processing.
-
-            # Let's assume historical data is part of the token object for TA module
-            token.historicalCandleData = data_loader.load_historical_data(token.tokenId, "mock_data/historical_data") # Reload for TA
-            
-            current_ta_result = ta_module.analyze(token)
-            current_security_result = security_module.analyze(token) # Re-check security
-
-            sell_signal = decision_module.generate_sell_signal(
-                token, current_pos_details, current_ta_result, current_security_result
-            )
-            if sell_signal:
-                print(f"SELL SIGNAL for {sell_signal.ticker}: Type: {sell_signal.sell_type}, Price: ${sell_signal.suggested_exit_price:.6f}")
-                for reason in sell_signal.reasoning: print(f"  - {reason}")
-                # Simulate selling:
-                del active_positions[token.tokenId]
-                continue # Don't check for buy if we just sold
-
-
-        # If no active position, or didn't sell, check for BUY signals
-        security_result = security_module.analyze(token)
-        if security_result.overall_status in ["SCAM_LIKELY", "HIGH_RISK"]:
-            print(f"Security Risk for {token.ticker}: {security_result.overall_status}. Details:")
-            # for detail in security_result.details: print(f"  - {detail['check']}: {detail['status']} - {detail['reason']}")
-            continue
-
-        # Load historical data for TA
-        token.historicalCandleData = data_loader.load_historical_data(token.tokenId, "mock_data/historical_data")
-        if not token.historicalCandleData:
-             print(f"No historical data for {token.ticker} to perform TA. Skipping TA.")
-             # Decide if you want to proceed without TA or skip
-             # For now, let's require TA
-             continue
-
-
-        ta_result = ta_module.analyze(token)
-        whale_summary = whale_module.analyze(token) # Uses snapshot data if available
-        
-        print(f"  TA: EMA: {ta_result.ema_cross_state}, RSI: {ta_result.rsi_state} ({ta_result.rsi_14_value:.2f}), MACD: {ta_result.macd_state}")
-        print(f"  Whales: Net Buy 15m: ${whale_summary.net_buy_volume_usd_15m:.0f}, Buyers: {whale_summary.distinct_buying_whales_15m}")
-        print(f"  Security: {security_result.overall_status}")
-
-
-        applicable_strategies = strategy_module.get_applicable_strategies(
-            token, ta_result, whale_summary, security_result
-        )
-        print(f"  Applicable Strategies: {applicable_strategies}")
-
-        if applicable_strategies:
-            buy_signal = decision_module.generate_buy_signal(
-                token, applicable_strategies, ta_result, whale_summary, security_result
-            )
-            if buy_signal:
-                print(f"BUY SIGNAL for {buy_signal.ticker}: Strategy: {buy_signal.strategy}, Confidence: {buy_signal.confidence_score:.2f}")
-                print(f"  Entry Range: ${buy_signal.suggested_entry_price_range[0]:.6f} - ${buy_signal.suggested_entry_price_range[1]:.6f}")
-                for reason in buy_signal.reasoning: print(f"  - {reason}")
-                # Simulate buying:
-                active_positions[token.tokenId] = {
-                    "entry_price": (buy_signal.suggested_entry_price_range[0] + buy_signal.suggested_entry_price_range[1]) / 2,
-                    "amount_held": 1000, # Dummy amount
-                    "buy_strategy": buy_signal.strategy,
-                    "initial_security_status": security_result.overall_status # Store for sell logic
-                }
+    if journal is not None:
+        active_positions, last_seq = replay_positions(journal.path)
+        print(f"Restored {len(active_positions)} open positions from {journal.path} (through event {last_seq}).")
+    if config.get("position_book", False):
+        # Held positions get the full TA + security re-check only when price crosses their stop/take-profit
+        # level or every position_recheck_seconds, instead of on every pass
+        book = PositionBook(config, scanner.decision)
+        book.update(active_positions)
+        for token_id in book:
+            book.request_check(token_id) # Restored positions are re-checked on the first pass
+        active_positions = book
+
+    if config.get("scheduler_mode", False):
+        # Continuous mode: each cycle re-analyzes only tokens whose data changed, held positions first
+        scheduler = ScanScheduler(scanner, config, SnapshotFileSource("mock_data/token_snapshots.json"))
+        scheduler.active_positions = active_positions
+        scheduler.run(config.get("scheduler_max_cycles", 0))
+    elif pipeline_mode:
+        pipeline = AsyncPipeline(scanner, config)
+        pipeline.run_sync(scanner.recon.filter_tokens(all_token_snapshots), active_positions)
+        print(f"Pipeline stages: {pipeline.stats}")
+    else:
+        potential_candidates = scanner.recon.filter_tokens(all_token_snapshots)
+
+        # Batch TA: one vectorized pass over every candidate instead of one DataFrame per token
+        batch_ta_results = {}
+        if config.get("ta_batch", False):
+            for token in potential_candidates:
+                scanner.load_candles(token)
+            if config.get("ta_parallel", False): # Shard rows across worker processes (shared-memory close matrix)
+                with ParallelTA(config) as parallel_ta:
+                    batch_results = parallel_ta.analyze_batch(potential_candidates)
+            else:
+                batch_results = scanner.ta.analyze_batch(potential_candidates)
+            batch_ta_results = {result.token_id: result for result in batch_results}
+
+        for token in potential_candidates:
+            scanner.process(token, active_positions, batch_ta_results.get(token.tokenId))
 
     print("\n--- Processing Complete ---")
+    if journal is not None:
+        journal.close() # Drains the writer queue and fsyncs (unless journal_fsync is "never")
+        print(f"Signal journal: {journal.stats()}")
+    print(f"Candle cache: {candle_cache.stats()}")
+    print(f"Security cache: {scanner.security.stats()}")
+    if isinstance(active_positions, PositionBook):
+        print(f"Position book: {active_positions.stats()}")
+    if profiler is not None:
+        profiler.stop()
+        print("\n".join(profiler.report()))
+    if metrics.enabled:
+        print("Metrics:")
+        print("\n".join(metrics.summary_lines()))
+        export_path = config.get("metrics_export_path")
+        if export_path: # <path>.prom (Prometheus text format) and <path>.json
+            metrics.write(export_path)
     if active_positions:
         print("Simulated Active Positions:")
         for token_id, pos_details in active_positions.items():
@@ -1 +1 @@
-from .data_loader import load_token_snapshots, load_historical_data
\ No newline at end of file
+from .data_loader import load_token_snapshots, iter_token_snapshots, load_historical_data, load_transaction_stream
\ No newline at end of file
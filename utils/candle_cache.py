@@ -0,0 +1,134 @@
+# utils/candle_cache.py
+# Process-wide LRU cache for historical candles, keyed by (tokenId, timeframe).
+# Every entry carries the version of the data it was loaded from (file mtime/size
+# for JSON, bar count/mtime for the columnar store), so a changed file or newly
+# appended bars make the entry stale instead of serving old candles.
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def estimate_nbytes(value: Any) -> int:
+    """Rough in-memory size of a cached candle series (column arrays or a list of candle dicts)."""
+    if hasattr(value, "_fields"): # CandleColumns
+        return sum(getattr(column, "nbytes", 0) for column in value)
+    if hasattr(value, "nbytes"): # CandleSeries / TransactionSeries
+        return value.nbytes
+    if isinstance(value, list):
+        if not value:
+            return sys.getsizeof(value)
+        first = value[0]
+        per_item = sys.getsizeof(first)
+        if isinstance(first, dict):
+            per_item += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in first.items())
+        return sys.getsizeof(value) + per_item * len(value)
+    return sys.getsizeof(value)
+
+
+class CandleCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Hashable, Any, int]]" = OrderedDict()
+        self._timeframes: Dict[str, Set[str]] = {} # tokenId -> cached timeframes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.RLock() # Loaders may run on worker threads (pipeline mode)
+
+    def get(self, token_id: str, timeframe: str, version: Hashable) -> Optional[Any]:
+        with self._lock:
+            key = (token_id, timeframe)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token_id: str, timeframe: str, version: Hashable, value: Any, nbytes: Optional[int] = None):
+        with self._lock:
+            key = (token_id, timeframe)
+            if key in self._entries:
+                self._remove(key)
+            nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+            if nbytes > self.max_bytes:
+                return # Would evict everything else and still not fit
+            self._entries[key] = (version, value, nbytes)
+            self._timeframes.setdefault(token_id, set()).add(timeframe)
+            self.bytes_used += nbytes
+            self._evict_to_budget()
+
+    def _evict_to_budget(self):
+        with self._lock:
+            while self.bytes_used > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries))) # Least recently used first
+                self.evictions += 1
+
+    def timeframes(self, token_id: str) -> List[str]:
+        with self._lock:
+            return sorted(self._timeframes.get(token_id, ()))
+
+    def invalidate(self, token_id: str, timeframe: Optional[str] = None):
+        """Drops one series, or every cached timeframe of a token (e.g. after bars were appended)."""
+        with self._lock:
+            timeframes = [timeframe] if timeframe is not None else self.timeframes(token_id)
+            for tf in timeframes:
+                if (token_id, tf) in self._entries:
+                    self._remove((token_id, tf))
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._timeframes.clear()
+            self.bytes_used = 0
+
+    def _remove(self, key: Tuple[str, str]):
+        _, _, nbytes = self._entries.pop(key)
+        self.bytes_used -= nbytes
+        token_timeframes = self._timeframes.get(key[0])
+        if token_timeframes is not None:
+            token_timeframes.discard(key[1])
+            if not token_timeframes:
+                del self._timeframes[key[0]]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+_shared_cache: Optional[CandleCache] = None
+
+
+def get_shared_cache() -> CandleCache:
+    """The process-wide cache, created with the default budget on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = CandleCache()
+    return _shared_cache
+
+
+def configure_shared_cache(max_bytes: int) -> CandleCache:
+    """Sets the byte budget of the process-wide cache, evicting down to it if needed."""
+    cache = get_shared_cache()
+    cache.max_bytes = max_bytes
+    cache._evict_to_budget()
+    return cache
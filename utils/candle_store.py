@@ -0,0 +1,177 @@
+# utils/candle_store.py
+# Binary columnar OHLCV store. Each token/timeframe is a directory with one raw
+# column file per field (int64 epoch-second timestamps, float64 OHLCV), so reads
+# are memory maps handed straight to NumPy and appends are plain file appends.
+#
+#   <root>/<tokenId>/<timeframe>/timestamp.i64
+#   <root>/<tokenId>/<timeframe>/{open,high,low,close,volume}.f64
+import json
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.models import parse_timestamp
+
+COLUMNS: Tuple[Tuple[str, Any], ...] = (
+    ("timestamp", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+)
+
+
+class CandleColumns(NamedTuple):
+    """Read-only column views for one token/timeframe (memory-mapped when loaded from a store)."""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    @property
+    def bars(self) -> int:
+        return len(self.timestamp)
+
+
+def _column_filename(name: str, dtype) -> str:
+    return f"{name}.{'i64' if np.dtype(dtype).kind == 'i' else 'f64'}"
+
+
+def candles_to_columns(candles: List[Dict[str, Any]]) -> CandleColumns:
+    """Parses a list of candle dicts once into column arrays, dropping malformed rows."""
+    rows = []
+    for candle in candles or []:
+        try:
+            row = (parse_timestamp(candle["timestamp"]),) + tuple(
+                float(candle[name]) for name, _ in COLUMNS[1:])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if all(v == v for v in row[1:]): # Skip NaN rows
+            rows.append(row)
+    return CandleColumns(*[
+        np.array([row[i] for row in rows], dtype=dtype) for i, (_, dtype) in enumerate(COLUMNS)
+    ])
+
+
+class CandleStore:
+    def __init__(self, root: str):
+        self.root = root
+        # (token_id, timeframe) -> (bars mapped, CandleColumns); remapped when the files grow
+        self._maps: Dict[Tuple[str, str], Tuple[int, CandleColumns]] = {}
+
+    def _series_dir(self, token_id: str, timeframe: str) -> str:
+        return os.path.join(self.root, token_id, timeframe)
+
+    def timeframes(self, token_id: str) -> List[str]:
+        token_dir = os.path.join(self.root, token_id)
+        if not os.path.isdir(token_dir):
+            return []
+        return sorted(name for name in os.listdir(token_dir) if os.path.isdir(os.path.join(token_dir, name)))
+
+    def bar_count(self, token_id: str, timeframe: str) -> int:
+        # Columns are appended one after another, so a torn append can leave them uneven;
+        # only bars present in every column count.
+        series_dir = self._series_dir(token_id, timeframe)
+        counts = []
+        for name, dtype in COLUMNS:
+            path = os.path.join(series_dir, _column_filename(name, dtype))
+            if not os.path.exists(path):
+                return 0
+            counts.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def version(self, token_id: str, timeframe: str) -> Tuple[int, int]:
+        """(bars, mtime_ns) of a series; changes whenever bars are appended or files rewritten."""
+        path = os.path.join(self._series_dir(token_id, timeframe), _column_filename(*COLUMNS[0]))
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return (0, 0)
+        return (self.bar_count(token_id, timeframe), mtime_ns)
+
+    def read(self, token_id: str, timeframe: str) -> Optional[CandleColumns]:
+        """Memory-mapped column views; no parsing, no copy. None if the series doesn't exist."""
+        bars = self.bar_count(token_id, timeframe)
+        if bars == 0:
+            return None
+        key = (token_id, timeframe)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == bars:
+            return cached[1]
+        series_dir = self._series_dir(token_id, timeframe)
+        columns = CandleColumns(*[
+            np.memmap(os.path.join(series_dir, _column_filename(name, dtype)), dtype=dtype, mode="r", shape=(bars,))
+            for name, dtype in COLUMNS
+        ])
+        self._maps[key] = (bars, columns)
+        return columns
+
+    def load(self, token_id: str) -> Dict[str, CandleColumns]:
+        """All timeframes for a token, shaped like TokenSnapshot.historicalCandleData."""
+        data = {}
+        for timeframe in self.timeframes(token_id):
+            columns = self.read(token_id, timeframe)
+            if columns is not None:
+                data[timeframe] = columns
+        return data
+
+    def append(self, token_id: str, timeframe: str, columns: CandleColumns) -> int:
+        """Appends bars newer than the last stored timestamp. Returns the number of bars written.
+
+        The new bars are sorted first and a repeated timestamp keeps its last bar, so a
+        stored series stays strictly increasing (readers binary-search the timestamps).
+        """
+        timestamps = np.asarray(columns.timestamp)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        keep = np.ones(len(timestamps), dtype=bool)
+        keep[:-1] = timestamps[1:] != timestamps[:-1]
+        existing = self.read(token_id, timeframe)
+        if existing is not None and len(existing.timestamp):
+            keep &= timestamps > existing.timestamp[-1]
+        rows = order[keep]
+        if not len(rows):
+            return 0
+        series_dir = self._series_dir(token_id, timeframe)
+        os.makedirs(series_dir, exist_ok=True)
+        for (name, dtype), values in zip(COLUMNS, columns):
+            path = os.path.join(series_dir, _column_filename(name, dtype))
+            with open(path, "ab") as f:
+                f.write(np.ascontiguousarray(np.asarray(values)[rows], dtype=dtype).tobytes())
+        return len(rows)
+
+    def append_candles(self, token_id: str, timeframe: str, candles: List[Dict[str, Any]]) -> int:
+        return self.append(token_id, timeframe, candles_to_columns(candles))
+
+    def import_json_file(self, filepath: str, token_id: str) -> int:
+        """Imports one <tokenId>_ohlcv.json file ({"1m": [candles], "5m": [...]})."""
+        with open(filepath, "r") as f:
+            data = json.load(f)
+        return sum(self.append_candles(token_id, timeframe, candles) for timeframe, candles in data.items())
+
+    def import_json_dir(self, src_dir: str, suffix: str = "_ohlcv.json") -> Dict[str, int]:
+        """Imports every <tokenId>_ohlcv.json in src_dir. Re-running only appends new bars."""
+        imported = {}
+        for filename in sorted(os.listdir(src_dir)):
+            if not filename.endswith(suffix):
+                continue
+            token_id = filename[:-len(suffix)]
+            try:
+                imported[token_id] = self.import_json_file(os.path.join(src_dir, filename), token_id)
+            except json.JSONDecodeError:
+                print(f"Error: Could not decode JSON from {filename}, skipped.")
+        return imported
+
+
+if __name__ == "__main__":
+    # python -m utils.candle_store <json_dir> <store_dir>
+    src = sys.argv[1] if len(sys.argv) > 1 else "mock_data/historical_data"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "mock_data/candle_store"
+    counts = CandleStore(dst).import_json_dir(src)
+    for token_id, bars in counts.items():
+        print(f"{token_id}: {bars} bars imported")
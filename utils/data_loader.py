@@ -1,63 +1,34 @@
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Hashable, Iterator, Optional, Tuple
 from core.models import TokenSnapshot # Assuming models.py is in a 'core' sibling directory or package
+from utils.candle_store import CandleStore, CandleColumns
+from utils.candle_cache import CandleCache
+from utils.snapshot_decoder import SnapshotDecoder, iter_json_records
+
+_snapshot_decoder = SnapshotDecoder() # Field plans are compiled once per process
+
+
+def iter_token_snapshots(filepath: str) -> Iterator[TokenSnapshot]:
+    """Lazily decodes token snapshots from a JSON array or NDJSON file, one at a time.
+
+    Nested dataclasses (volume, holders, liquidity, security, ...) are fully typed,
+    and JSON names such as "5minUSD" map through the field metadata in core.models.
+    """
+    for item_data in iter_json_records(filepath):
+        try:
+            yield _snapshot_decoder.decode(TokenSnapshot, item_data)
+        except TypeError as e:
+            print(f"Error instantiating TokenSnapshot for item: {item_data.get('ticker', 'N/A')}. Error: {e}")
+            print("Problematic item data:", item_data)
 
-# Helper to convert JSON keys with specific metadata
-def _convert_keys(d, key_map):
-    if isinstance(d, dict):
-        return {key_map.get(k, k): _convert_keys(v, key_map) for k, v in d.items()}
-    elif isinstance(d, list):
-        return [_convert_keys(i, key_map) for i in d]
-    return d
 
 def load_token_snapshots(filepath: str) -> List[TokenSnapshot]:
-    """Loads token snapshots from a JSON file."""
+    """Loads token snapshots from a JSON (array or NDJSON) file."""
     snapshots = []
-    # Define key mappings based on your TokenSnapshot VolumeInfo field metadata
-    # This is a simplified example; a more robust solution would inspect dataclass metadata
-    key_map = {
-        "5minUSD": "five_min_usd",
-        "1hrUSD": "one_hr_usd",
-        "6hrUSD": "six_hr_usd",
-        "24hrUSD": "twenty_four_hr_usd"
-    }
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-            for item_data in data:
-                # Apply key conversion specifically for the volume part if needed
-                if 'volume' in item_data and isinstance(item_data['volume'], dict):
-                    item_data['volume'] = _convert_keys(item_data['volume'], key_map)
-
-                # Handle nested dataclasses by pre-constructing them if necessary
-                # This part can get complex and might need a library like dacite or manual construction
-                # For simplicity, we'll assume direct mapping works for most fields
-                # or that the JSON is structured to match the dataclass.
-                # Example for one nested class:
-                if 'security' in item_data and item_data['security'] and 'bundlerAnalysis' in item_data['security'] and item_data['security']['bundlerAnalysis']:
-                     item_data['security']['bundlerAnalysis'] = models.BundleAnalysisInfo(**item_data['security']['bundlerAnalysis'])
-                if 'security' in item_data and item_data['security']:
-                    item_data['security'] = models.SecurityInfo(**item_data['security'])
-                if 'links' in item_data and item_data['links']:
-                    item_data['links'] = models.LinkInfo(**item_data['links'])
-                # ... and so on for other nested dataclasses like LiquidityInfo, VolumeInfo, HolderInfo etc.
-                # This is where a library like `dacite` would be very helpful:
-                # from dacite import from_dict
-                # snapshot = from_dict(data_class=TokenSnapshot, data=item_data)
-
-                try:
-                    # Simplistic instantiation, may fail with complex nesting without proper pre-processing
-                    # or a library like dacite.
-                    # For now, let's assume the JSON structure is massaged to fit or
-                    # we manually instantiate nested objects.
-                    snapshot = TokenSnapshot(**item_data) # This is very basic
-                    snapshots.append(snapshot)
-                except TypeError as e:
-                    print(f"Error instantiating TokenSnapshot for item: {item_data.get('ticker', 'N/A')}. Error: {e}")
-                    print("Problematic item data:", item_data)
-
-
+        for snapshot in iter_token_snapshots(filepath):
+            snapshots.append(snapshot)
     except FileNotFoundError:
         print(f"Error: File not found at {filepath}")
     except json.JSONDecodeError:
@@ -65,12 +36,47 @@ def load_token_snapshots(filepath: str) -> List[TokenSnapshot]:
     return snapshots
 
 
-def load_historical_data(token_id: str, base_path: str = "mock_data/historical_data") -> Dict[str, List[Dict[str, Any]]]:
-    """Loads historical OHLCV data for a specific token."""
+# tokenId -> (file version, timeframes in the file), so a cached JSON token can be served
+# without reading the file; kept beside the cache so it only holds (and counts) candle series
+_json_timeframes: Dict[str, Tuple[Hashable, Tuple[str, ...]]] = {}
+
+
+def load_historical_data(token_id: str, base_path: str = "mock_data/historical_data",
+                         store: Optional[CandleStore] = None, cache: Optional[CandleCache] = None) -> Dict[str, Any]:
+    """Loads historical OHLCV data for a specific token.
+
+    With a CandleStore the timeframes come back as memory-mapped CandleColumns
+    (TechnicalAnalyzer accepts either shape); otherwise the JSON file is parsed.
+    With a CandleCache, unchanged series are served from memory. Cached candle
+    lists are shared between callers, so treat them as read-only.
+    """
+    if store is not None:
+        return load_historical_columns(token_id, store, cache)
     filepath = os.path.join(base_path, f"{token_id}_ohlcv.json")
     try:
+        known = None
+        if cache is not None:
+            stat = os.stat(filepath)
+            version = (stat.st_mtime_ns, stat.st_size)
+            known = _json_timeframes.get(token_id)
+            if known is not None and known[0] != version:
+                # Rewritten file: drop every old series, including timeframes it no longer has
+                cache.invalidate(token_id)
+                known = None
+            if known is not None:
+                # Every timeframe of the file must still be cached, else it is re-read
+                cached = {tf: cache.get(token_id, tf, version) for tf in known[1]}
+                if all(candles is not None for candles in cached.values()):
+                    return cached
         with open(filepath, 'r') as f:
-            return json.load(f) # Expects format: {"1m": [candles], "5m": [candles]}
+            data = json.load(f) # Expects format: {"1m": [candles], "5m": [candles]}
+        if cache is not None:
+            for timeframe, candles in data.items():
+                if known is None:
+                    cache.get(token_id, timeframe, version) # The lookup the file's timeframes weren't known for: a miss
+                cache.put(token_id, timeframe, version, candles)
+            _json_timeframes[token_id] = (version, tuple(data))
+        return data
     except FileNotFoundError:
         print(f"Warning: Historical data not found for {token_id} at {filepath}")
         return {}
@@ -78,4 +84,61 @@ def load_historical_data(token_id: str, base_path: str = "mock_data/historical_d
         print(f"Error: Could not decode JSON from {filepath}")
         return {}
 
-# Add similar loader for transaction_stream if needed
\ No newline at end of file
+
+def forget_historical_data(token_id: str):
+    """Drops what load_historical_data remembers about a token's JSON file (for tokens leaving the universe)."""
+    _json_timeframes.pop(token_id, None)
+
+
+def load_historical_columns(token_id: str, store: CandleStore, cache: Optional[CandleCache] = None) -> Dict[str, CandleColumns]:
+    """NumPy column views for every stored timeframe of a token; no parsing or copying."""
+    if cache is None:
+        data = store.load(token_id)
+    else:
+        data = {}
+        for timeframe in store.timeframes(token_id):
+            version = store.version(token_id, timeframe) # Appended bars bump the version
+            columns = cache.get(token_id, timeframe, version)
+            if columns is None:
+                columns = store.read(token_id, timeframe)
+                if columns is None:
+                    continue
+                cache.put(token_id, timeframe, version, columns)
+            data[timeframe] = columns
+    if not data:
+        print(f"Warning: Historical data not found for {token_id} in candle store {store.root}")
+    return data
+
+def load_transaction_stream(token_id: str, base_path: str = "mock_data/transaction_data") -> List[Dict[str, Any]]:
+    """Loads a token's transaction stream (<tokenId>_txns.json), sorted by timestamp for WhaleTracker."""
+    filepath = os.path.join(base_path, f"{token_id}_txns.json")
+    try:
+        with open(filepath, 'r') as f:
+            transactions = json.load(f)
+    except FileNotFoundError:
+        return [] # Most tokens have no transaction feed; WhaleTracker falls back to the snapshot
+    except json.JSONDecodeError:
+        print(f"Error: Could not decode JSON from {filepath}")
+        return []
+    transactions.sort(key=lambda txn: txn.get("timestamp", ""))
+    return transactions
+
+def _file_version(filepath: str) -> Tuple[int, int]:
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def historical_data_version(token_id: str, base_path: str = "mock_data/historical_data",
+                            store: Optional[CandleStore] = None) -> Tuple:
+    """Cheap change marker for a token's candles (no parsing); differs whenever new bars land."""
+    if store is not None:
+        return tuple(store.version(token_id, timeframe) for timeframe in store.timeframes(token_id))
+    return _file_version(os.path.join(base_path, f"{token_id}_ohlcv.json"))
+
+
+def transaction_stream_version(token_id: str, base_path: str = "mock_data/transaction_data") -> Tuple[int, int]:
+    """Change marker for a token's transaction file: (mtime_ns, size), (0, 0) if there is none."""
+    return _file_version(os.path.join(base_path, f"{token_id}_txns.json"))
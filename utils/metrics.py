@@ -0,0 +1,276 @@
+# utils/metrics.py
+# Process-wide counters and timers for the scan, exportable as Prometheus text or
+# JSON. Disabled by default: every recording call then returns after a single
+# attribute check, and timer() hands back a shared no-op context manager, so the
+# instrumented code paths cost next to nothing unless metrics_enabled is set.
+#
+# SamplingProfiler is the optional profiler hook: a background thread samples the
+# Python stacks of the profiled thread every few milliseconds and reports the
+# functions that were on top (self) or anywhere on the stack (total) most often.
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds for timers, in seconds
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets) # Non-cumulative; exported cumulatively
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ()
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False, prefix: str = "scanner", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock() # The asyncio pipeline records from worker threads too
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._timers: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    # --- Recording ---
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._timers.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            histogram.add(seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording the wall time of its block into timer `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    # --- Export ---
+
+    def counter_value(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Plain-dict view of every series, suitable for json.dumps."""
+        with self._lock:
+            counters = {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                        for name, series in self._counters.items()}
+            timers = {name: [{"labels": dict(key), "count": h.count, "sum_seconds": h.sum, "max_seconds": h.max,
+                              "mean_seconds": h.sum / h.count if h.count else 0.0,
+                              "buckets": dict(zip((str(b) for b in h.buckets), h.counts))}
+                             for key, h in series.items()]
+                      for name, series in self._timers.items()}
+        return {"timestamp": time.time(), "counters": counters, "timers": timers}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (counters as *_total, timers as *_seconds histograms)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}" if name.endswith("_total") else f"{self.prefix}_{name}_total"
+                if name in self._help:
+                    lines.append(f"# HELP {metric} {self._help[name]}")
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._timers.items()):
+                metric = f"{self.prefix}_{name}" if name.endswith("_seconds") else f"{self.prefix}_{name}_seconds"
+                if name in self._help:
+                    lines.append(f"# HELP {metric} {self._help[name]}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets, h.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {h.sum:.9g}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path_prefix: str):
+        """Writes <prefix>.prom and <prefix>.json."""
+        with open(f"{path_prefix}.prom", "w") as f:
+            f.write(self.to_prometheus())
+        with open(f"{path_prefix}.json", "w") as f:
+            f.write(self.to_json())
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for name, series in sorted(self._counters.items()):
+            for key, value in sorted(series.items()):
+                lines.append(f"  {name}{_format_labels(key)}: {value:g}")
+        for name, series in sorted(self._timers.items()):
+            for key, h in sorted(series.items()):
+                mean_ms = 1000 * h.sum / h.count if h.count else 0.0
+                lines.append(f"  {name}{_format_labels(key)}: n={h.count} total={h.sum:.4f}s "
+                             f"mean={mean_ms:.3f}ms max={1000 * h.max:.3f}ms")
+        return lines
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval from a background thread."""
+
+    def __init__(self, interval_seconds: float = 0.005, thread_id: Optional[int] = None, max_depth: int = 64):
+        self.interval_seconds = interval_seconds
+        self.thread_id = thread_id
+        self.max_depth = max_depth
+        self.samples = 0
+        self.self_counts: Counter = Counter() # Function on top of the stack
+        self.total_counts: Counter = Counter() # Function anywhere on the stack (counted once per sample)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _frame_key(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_filename}:{code.co_firstlineno}({code.co_name})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_counts[self._frame_key(frame)] += 1
+            seen = set()
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                key = self._frame_key(frame)
+                if key not in seen:
+                    seen.add(key)
+                    self.total_counts[key] += 1
+                frame = frame.f_back
+                depth += 1
+
+    def start(self) -> "SamplingProfiler":
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def top(self, n: int = 15, by: str = "self") -> List[Tuple[str, int, int]]:
+        """(function, self samples, total samples) for the n hottest functions."""
+        counts = self.self_counts if by == "self" else self.total_counts
+        return [(key, self.self_counts[key], self.total_counts[key]) for key, _ in counts.most_common(n)]
+
+    def report(self, n: int = 15) -> List[str]:
+        lines = [f"Profiler: {self.samples} samples every {1000 * self.interval_seconds:g}ms"]
+        for key, own, total in self.top(n):
+            share = 100.0 * own / self.samples if self.samples else 0.0
+            lines.append(f"  {share:5.1f}% self  {total:>6} total  {key}")
+        return lines
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """The process-wide registry every instrumented module records into."""
+    return _metrics
+
+
+def configure_metrics(config: Dict) -> Metrics:
+    """Turns the process-wide registry on or off (metrics_enabled); can be flipped at runtime."""
+    _metrics.enabled = bool(config.get("metrics_enabled", False))
+    return _metrics
@@ -0,0 +1,255 @@
+# utils/signal_journal.py
+# Append-only journal of Buy/Sell signals and the position changes they cause.
+#
+# Each record is   <u32 payload length><u32 crc32(payload)><payload: compact JSON>
+# and carries a sequence number, a wall-clock time, the event type and its data.
+# append() only enqueues; a background thread encodes whatever has queued up and
+# writes it as one batch, then fsyncs according to the policy ("always" after
+# every batch, "interval" at most every fsync_interval_seconds, "never"). Readers
+# stop at the first short or corrupt record, so a torn write from a crash costs at
+# most the last batch; the writer truncates such a tail when it reopens the file.
+#
+#   python -m utils.signal_journal tail <journal> [--follow]
+#   python -m utils.signal_journal positions <journal>
+import dataclasses
+import functools
+import itertools
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from core.models import BuySignal, SellSignal
+
+_HEADER = struct.Struct("<II")
+_MAX_RECORD_BYTES = 16 * 1024 * 1024 # Anything larger is treated as corruption
+_STOP = object()
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _scan(f, offset: int = 0) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """(offset, end offset, record) for each intact record from offset; stops at the first bad one."""
+    f.seek(offset)
+    while True:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        length, crc = _HEADER.unpack(header)
+        if length > _MAX_RECORD_BYTES:
+            return
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            return
+        end = offset + _HEADER.size + length
+        yield offset, end, record
+        offset = end
+
+
+def read_journal(path: str, offset: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(end offset, record) for every intact record; resume later from the last end offset."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for _, end, record in _scan(f, offset):
+            yield end, record
+
+
+def follow(path: str, offset: int = 0, poll_seconds: float = 0.1,
+           stop: Optional[threading.Event] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Like read_journal, then keeps polling for new records (tail -f) until `stop` is set."""
+    while stop is None or not stop.is_set():
+        progressed = False
+        for offset, record in read_journal(path, offset):
+            progressed = True
+            yield offset, record
+        if not progressed:
+            time.sleep(poll_seconds)
+
+
+def apply_event(positions: Dict[str, Dict], record: Dict[str, Any]):
+    """Applies one journal record to a positions dict shaped like active_positions."""
+    event = record.get("event")
+    if event in ("open", "update"):
+        positions[record["token_id"]] = dict(record["position"])
+    elif event == "close":
+        positions.pop(record["token_id"], None)
+
+
+def replay_positions(path: str) -> Tuple[Dict[str, Dict], int]:
+    """Rebuilds active_positions from a journal. Returns (positions, last sequence number)."""
+    positions: Dict[str, Dict] = {}
+    last_seq = 0
+    for _, record in read_journal(path):
+        apply_event(positions, record)
+        last_seq = record.get("seq", last_seq)
+    return positions, last_seq
+
+
+@functools.lru_cache(maxsize=None)
+def _signal_fields(cls) -> Tuple[str, ...]:
+    return tuple(field.name for field in dataclasses.fields(cls))
+
+
+class SignalJournal:
+    def __init__(self, path: str, fsync: str = "interval", fsync_interval_seconds: float = 1.0,
+                 batch_max_records: int = 4096, queue_max_records: int = 65536):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.batch_max_records = batch_max_records
+        self.records_written = 0
+        self.batches_written = 0
+        self.error: Optional[BaseException] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        last_seq, valid_end = 0, 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for _, valid_end, record in _scan(f):
+                    last_seq = record.get("seq", last_seq)
+        self._file = open(path, "ab")
+        if self._file.tell() != valid_end: # Drop a torn tail left by a crash mid-write
+            self._file.truncate(valid_end)
+            self._file.seek(valid_end)
+        self._seq = itertools.count(last_seq + 1)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_max_records) # Full queue = backpressure
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._writer, name="signal-journal", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["SignalJournal"]:
+        path = config.get("journal_path")
+        if not path:
+            return None
+        return cls(path, fsync=config.get("journal_fsync", "interval"),
+                   fsync_interval_seconds=config.get("journal_fsync_interval_seconds", 1.0),
+                   batch_max_records=config.get("journal_batch_max_records", 4096))
+
+    # --- Producer side (called from the analysis loop; never touches the file) ---
+
+    def append(self, event: str, token_id: str, **data) -> int:
+        """Queues one record and returns its sequence number."""
+        if self.error is not None:
+            raise RuntimeError(f"Signal journal writer failed: {self.error}")
+        seq = next(self._seq)
+        self._queue.put((seq, time.time(), event, token_id, data))
+        return seq
+
+    def record_buy(self, signal: BuySignal, position: Dict):
+        # Signals are converted to dicts on the writer thread; the position is copied now
+        self.append("buy", signal.token_id, signal=signal)
+        self.append("open", signal.token_id, position=dict(position))
+
+    def record_sell(self, signal: SellSignal, position: Optional[Dict] = None):
+        """position is what remains after the sell, or None when the position was closed."""
+        self.append("sell", signal.token_id, signal=signal)
+        if position is None:
+            self.append("close", signal.token_id)
+        else:
+            self.append("update", signal.token_id, position=dict(position))
+
+    def flush(self):
+        """Blocks until everything appended so far is written (and fsynced, unless the policy is "never")."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+        if self.error is not None:
+            raise RuntimeError(f"Signal journal writer failed: {self.error}")
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._file.close()
+
+    def __enter__(self) -> "SignalJournal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Writer thread ---
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            while len(items) < self.batch_max_records: # Drain whatever else is queued into this batch
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in items if isinstance(item, tuple)]
+            waiters = [item for item in items if isinstance(item, threading.Event)]
+            stopping = any(item is _STOP for item in items)
+            try:
+                if records:
+                    self._file.write(b"".join(encode_record(self._to_record(*record)) for record in records))
+                    self._file.flush()
+                    self.records_written += len(records)
+                    self.batches_written += 1
+                now = time.monotonic()
+                if self.fsync == "always" and records or \
+                   self.fsync == "interval" and (waiters or stopping or now - self._last_fsync >= self.fsync_interval_seconds):
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = now
+            except OSError as exc:
+                self.error = exc
+            for waiter in waiters:
+                waiter.set()
+
+    @staticmethod
+    def _to_record(seq: int, ts: float, event: str, token_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        record = {"seq": seq, "ts": ts, "event": event, "token_id": token_id}
+        for key, value in data.items():
+            if isinstance(value, (BuySignal, SellSignal)): # Flat dataclasses; much cheaper than asdict()
+                value = {name: getattr(value, name) for name in _signal_fields(type(value))}
+            record[key] = value
+        return record
+
+    def stats(self) -> Dict[str, int]:
+        return {"records": self.records_written, "batches": self.batches_written, "queued": self._queue.qsize()}
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ("tail", "positions"):
+        print("usage: python -m utils.signal_journal tail <journal> [--follow] | positions <journal>")
+        sys.exit(1)
+    command, path = args[0], args[1]
+    if command == "positions":
+        positions, last_seq = replay_positions(path)
+        print(json.dumps({"last_seq": last_seq, "positions": positions}, indent=2))
+        return
+    records = follow(path) if "--follow" in args else read_journal(path)
+    try:
+        for _, record in records:
+            print(json.dumps(record, separators=(",", ":")), flush=True)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# utils/snapshot_decoder.py
+# Schema-compiled decoding of JSON dicts into the core.models dataclasses, plus a
+# lazy record reader for JSON-array and NDJSON snapshot dumps.
+#
+# A field plan is compiled once per dataclass from its type hints and field
+# metadata (e.g. VolumeInfo's json_name "5minUSD"), so decoding a record is a
+# dict lookup and a call per key, and nested objects come back fully typed.
+import dataclasses
+import json
+import typing
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+_READ_CHUNK = 64 * 1024
+
+
+def _unwrap_optional(tp):
+    if typing.get_origin(tp) is typing.Union:
+        args = [a for a in typing.get_args(tp) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return tp
+
+
+class SnapshotDecoder:
+    def __init__(self):
+        # dataclass -> {json key: (attribute name, converter or None)}
+        self._plans: Dict[type, Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]]] = {}
+
+    def _converter_for(self, tp) -> Optional[Callable[[Any], Any]]:
+        tp = _unwrap_optional(tp)
+        if dataclasses.is_dataclass(tp):
+            self.plan_for(tp) # Compile nested plans up front
+            return lambda value, cls=tp: self.decode(cls, value) if isinstance(value, dict) else value
+        if typing.get_origin(tp) in (list, typing.List):
+            args = typing.get_args(tp)
+            item = self._converter_for(args[0]) if args else None
+            if item is not None:
+                return lambda value: [item(v) for v in value] if isinstance(value, list) else value
+        return None # Scalars, plain lists and dicts are taken as-is
+
+    def plan_for(self, cls: type) -> Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]]:
+        plan = self._plans.get(cls)
+        if plan is not None:
+            return plan
+        plan = {}
+        self._plans[cls] = plan # Registered before recursing, in case of self-referencing models
+        hints = typing.get_type_hints(cls)
+        for f in dataclasses.fields(cls):
+            entry = (f.name, self._converter_for(hints.get(f.name, Any)))
+            plan[f.name] = entry
+            json_name = f.metadata.get("json_name")
+            if json_name:
+                plan[json_name] = entry # Accept both the API name and the Python name
+        return plan
+
+    def decode(self, cls: Type, data: Dict[str, Any]):
+        """Builds cls (and every nested dataclass) from a JSON dict; unknown keys are ignored."""
+        plan = self._plans.get(cls) or self.plan_for(cls)
+        kwargs = {}
+        for key, value in data.items():
+            entry = plan.get(key)
+            if entry is None:
+                continue
+            name, convert = entry
+            kwargs[name] = convert(value) if convert is not None and value is not None else value
+        return cls(**kwargs)
+
+
+def _iter_json_array(f) -> Iterator[Any]:
+    """Yields the elements of a top-level JSON array one at a time, reading the file in chunks."""
+    decoder = json.JSONDecoder()
+    buf = f.read(_READ_CHUNK).lstrip()
+    if not buf.startswith("["):
+        raise json.JSONDecodeError("Expected a JSON array", buf, 0)
+    pos, eof, read_size = 1, False, _READ_CHUNK
+    while True:
+        # Skip separators between elements
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+        if pos >= len(buf):
+            raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            read_size *= 2 # An element larger than the chunk; grow to avoid quadratic re-parsing
+            continue
+        read_size = _READ_CHUNK
+        yield item
+        pos = end
+        if pos > _READ_CHUNK: # Drop consumed text so memory stays bounded by one element
+            buf, pos = buf[pos:], 0
+
+
+def iter_json_records(filepath: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yields records from a JSON array file or an NDJSON file (one object per line)."""
+    with open(filepath, "r") as f:
+        first = ""
+        while True:
+            ch = f.read(1)
+            if not ch or not ch.isspace():
+                first = ch
+                break
+        f.seek(0)
+        if first == "[":
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
@@ -0,0 +1,168 @@
+# utils/wallet_index.py
+# Compact, memory-mapped index of tracked whale wallets.
+#
+# Addresses are stored as fixed-width 32-byte keys (the decoded base58 public key;
+# anything that isn't a valid 32-byte base58 key is stored as its BLAKE2b-256
+# digest), sorted, so a lookup is a binary search over a memory map instead of a
+# multi-gigabyte Python set of strings. An optional Bloom filter in the same file
+# rejects most non-whale wallets without touching the key array.
+#
+# File layout (little-endian):
+#   0   8s  magic b"WIDX0001"
+#   8   Q   number of keys
+#   16  Q   Bloom filter size in bits (0 = no filter)
+#   24  I   Bloom hash count
+#   28  I   reserved
+#   32      count * 32-byte sorted keys, then the Bloom filter bytes
+import hashlib
+import math
+import os
+import struct
+import sys
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+MAGIC = b"WIDX0001"
+HEADER = struct.Struct("<8sQQII")
+KEY_SIZE = 32
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {ch: i for i, ch in enumerate(_B58_ALPHABET)}
+
+
+def b58decode(address: str) -> Optional[bytes]:
+    """Base58 (Bitcoin/Solana alphabet) decode; None if the string isn't valid base58."""
+    value = 0
+    for ch in address:
+        digit = _B58_INDEX.get(ch)
+        if digit is None:
+            return None
+        value = value * 58 + digit
+    leading_zeros = len(address) - len(address.lstrip("1"))
+    body = value.to_bytes((value.bit_length() + 7) // 8, "big") if value else b""
+    return b"\x00" * leading_zeros + body
+
+
+def address_key(address: str) -> bytes:
+    """32-byte index key for a wallet address."""
+    address = address.strip()
+    decoded = b58decode(address)
+    if decoded is not None and len(decoded) == KEY_SIZE:
+        return decoded
+    return hashlib.blake2b(address.encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def _bloom_positions(keys: np.ndarray, m_bits: int, k: int) -> np.ndarray:
+    """(n, k) bit positions via double hashing on the first 16 key bytes (keys are uniform already)."""
+    words = np.frombuffer(keys.tobytes(), dtype="<u8").reshape(-1, KEY_SIZE // 8)
+    h1 = words[:, 0]
+    h2 = words[:, 1] | np.uint64(1)
+    steps = np.arange(k, dtype=np.uint64)
+    return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(m_bits) # uint64 wraparound is fine
+
+
+def _as_key_array(keys: List[bytes]) -> np.ndarray:
+    return np.frombuffer(b"".join(keys), dtype=f"S{KEY_SIZE}") if keys else np.empty(0, dtype=f"S{KEY_SIZE}")
+
+
+class WalletIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, count, bloom_bits, bloom_hashes, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a wallet index file")
+        self.count = count
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self._keys = np.memmap(path, dtype=f"S{KEY_SIZE}", mode="r", offset=HEADER.size, shape=(count,)) \
+            if count else np.empty(0, dtype=f"S{KEY_SIZE}")
+        self._bloom = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.size + count * KEY_SIZE,
+                                shape=(bloom_bits // 8,)) if bloom_bits else None
+
+    @classmethod
+    def open(cls, path: str) -> "WalletIndex":
+        return cls(path)
+
+    @staticmethod
+    def build(addresses: Iterable[str], index_path: str, bloom_bits_per_key: int = 10) -> int:
+        """Writes a sorted, de-duplicated index (plus Bloom filter) for the addresses. Returns key count."""
+        keys = np.unique(_as_key_array([address_key(a) for a in addresses if a.strip()]))
+        count = len(keys)
+        bloom_bits = 0
+        bloom_hashes = 0
+        bloom = b""
+        if bloom_bits_per_key and count:
+            bloom_bits = max(64, (count * bloom_bits_per_key + 7) // 8 * 8)
+            bloom_hashes = max(1, round(bloom_bits_per_key * math.log(2)))
+            positions = _bloom_positions(keys, bloom_bits, bloom_hashes).ravel()
+            bits = np.zeros(bloom_bits, dtype=bool)
+            bits[positions.astype(np.int64)] = True
+            bloom = np.packbits(bits, bitorder="little").tobytes()
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, count, bloom_bits, bloom_hashes, 0))
+            f.write(keys.tobytes())
+            f.write(bloom)
+        os.replace(tmp_path, index_path) # Readers never see a half-written index
+        return count
+
+    @classmethod
+    def build_from_text(cls, text_path: str, index_path: str, bloom_bits_per_key: int = 10) -> int:
+        """Offline rebuild from a one-address-per-line file such as whale_wallets.txt."""
+        with open(text_path, "r") as f:
+            return cls.build((line for line in f), index_path, bloom_bits_per_key)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bloom_maybe(self, keys: np.ndarray) -> np.ndarray:
+        if self._bloom is None:
+            return np.ones(len(keys), dtype=bool)
+        positions = _bloom_positions(keys, self.bloom_bits, self.bloom_hashes).astype(np.int64)
+        bits = (self._bloom[positions >> 3] >> (positions & 7).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(keys), dtype=bool)
+        if not self.count or not len(keys):
+            return found
+        candidates = np.flatnonzero(self._bloom_maybe(keys))
+        if len(candidates):
+            probe = keys[candidates]
+            pos = np.searchsorted(self._keys, probe)
+            in_range = pos < self.count
+            hits = np.zeros(len(candidates), dtype=bool)
+            hits[in_range] = self._keys[pos[in_range]] == probe[in_range]
+            found[candidates] = hits
+        return found
+
+    def contains(self, address: str) -> bool:
+        if not isinstance(address, str):
+            return False
+        return bool(self._lookup(_as_key_array([address_key(address)]))[0])
+
+    __contains__ = contains
+
+    def contains_many(self, addresses: Iterable[str]) -> np.ndarray:
+        """Vectorized membership for a batch of addresses (e.g. one block's transactions)."""
+        addresses = list(addresses)
+        valid = np.array([isinstance(a, str) for a in addresses], dtype=bool)
+        found = np.zeros(len(addresses), dtype=bool)
+        found[valid] = self._lookup(_as_key_array([address_key(a) for a in addresses if isinstance(a, str)]))
+        return found
+
+
+if __name__ == "__main__":
+    # python -m utils.wallet_index build <wallets.txt> <index file> [bloom bits per key]
+    # python -m utils.wallet_index check <index file> <address> [...]
+    if len(sys.argv) >= 4 and sys.argv[1] == "build":
+        bits = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+        n = WalletIndex.build_from_text(sys.argv[2], sys.argv[3], bits)
+        print(f"Indexed {n} wallets into {sys.argv[3]}")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "check":
+        index = WalletIndex.open(sys.argv[2])
+        for address, hit in zip(sys.argv[3:], index.contains_many(sys.argv[3:])):
+            print(f"{address}: {'tracked' if hit else 'not tracked'}")
+    else:
+        print("usage: python -m utils.wallet_index build <wallets.txt> <index> [bits] | check <index> <address>...")